@@ -11,9 +11,9 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_LATITUDE, CONF_LONGITUDE, CONF_NAME, UnitOfLength
 from homeassistant.core import callback, HomeAssistant
 from homeassistant.helpers.dispatcher import async_dispatcher_connect
-from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.helpers.event import async_call_later, async_track_time_interval
 
-from homeassistant.util.json import json_loads_object
+from homeassistant.util.json import json_loads, json_loads_object
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM
 from homeassistant.util.unit_conversion import DistanceConverter
 
@@ -31,15 +31,26 @@ from .const import (
     DEFAULT_TIME_WINDOW,
     DEFAULT_UPDATE_INTERVAL,
     DOMAIN,
+    LIGHTNING_BATCH_WINDOW,
+    MAX_GEOHASH_SUBSCRIPTIONS,
     PLATFORMS,
     SERVER_STATS,
 )
-from .geohash_utils import geohash_overlap
+from .geohash_utils import (
+    box_min_distance,
+    filter_precision,
+    geohash_bbox,
+    plan_geohash_subscriptions,
+    topic_geohash,
+)
 from .mqtt import MQTT, MQTT_CONNECTED, MQTT_DISCONNECTED
 from .version import __version__
 
 _LOGGER = logging.getLogger(__name__)
 
+LIGHTNING_TOPIC_PREFIX = "blitzortung/1.1/"
+MAX_CACHED_TOPIC_FILTERS = 4096
+
 CONFIG_SCHEMA = vol.Schema(
     {DOMAIN: vol.Schema({vol.Optional(SERVER_STATS, default=False): bool})},
     extra=vol.ALLOW_EXTRA,
@@ -60,7 +71,7 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: BlitzortungConfig
 
     latitude = config_entry.data[CONF_LATITUDE]
     longitude = config_entry.data[CONF_LONGITUDE]
-    radius = config_entry.options[CONF_RADIUS]
+    radius = _radius_km(hass, config_entry)
     max_tracked_lightnings = config_entry.options[CONF_MAX_TRACKED_LIGHTNINGS]
     time_window_seconds = config_entry.options[CONF_TIME_WINDOW] * 60
 
@@ -71,13 +82,6 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: BlitzortungConfig
             max_tracked_lightnings,
         )
 
-    if hass.config.units == IMPERIAL_SYSTEM:
-        radius_mi = radius
-        radius = DistanceConverter.convert(
-            radius, UnitOfLength.MILES, UnitOfLength.KILOMETERS
-        )
-        _LOGGER.info("imperial system, %s mi -> %s km", radius_mi, radius)
-
     config_entry.runtime_data = BlitzortungCoordinator(
         hass,
         latitude,
@@ -98,9 +102,31 @@ async def async_setup_entry(hass: HomeAssistant, config_entry: BlitzortungConfig
     return True
 
 
+def _radius_km(hass: HomeAssistant, config_entry: BlitzortungConfigEntry):
+    """Return the radius option in km."""
+    radius = config_entry.options[CONF_RADIUS]
+    if hass.config.units == IMPERIAL_SYSTEM:
+        radius_mi = radius
+        radius = DistanceConverter.convert(
+            radius, UnitOfLength.MILES, UnitOfLength.KILOMETERS
+        )
+        _LOGGER.info("imperial system, %s mi -> %s km", radius_mi, radius)
+    return radius
+
+
 async def async_update_options(hass, config_entry: BlitzortungConfigEntry):
     """Update options."""
     _LOGGER.info("async_update_options")
+    coordinator = config_entry.runtime_data
+    if (
+        config_entry.options[CONF_MAX_TRACKED_LIGHTNINGS]
+        == coordinator.max_tracked_lightnings
+        and config_entry.options[CONF_TIME_WINDOW] * 60
+        == coordinator.time_window_seconds
+    ):
+        # only the radius changed, re-plan the subscriptions without a reload
+        await coordinator.async_set_radius(_radius_km(hass, config_entry))
+        return
     await hass.config_entries.async_reload(config_entry.entry_id)
 
 
@@ -189,18 +215,35 @@ class BlitzortungCoordinator:
         self.callbacks = []
         self.lightning_callbacks = []
         self.on_tick_callbacks = []
-        self.geohash_overlap = geohash_overlap(
-            self.latitude, self.longitude, self.radius
+        self.geohash_plan = plan_geohash_subscriptions(
+            self.latitude, self.longitude, self.radius, MAX_GEOHASH_SUBSCRIPTIONS
         )
+        self._geohash_subscriptions = {}
         self._disconnect_callbacks = []
         self.unloading = False
+        self._cos_lat = math.cos(self.latitude * math.pi / 180)
+        self._filter_precision = filter_precision(
+            self.latitude, self.geohash_plan.received_area, MAX_CACHED_TOPIC_FILTERS
+        )
+        self._topic_outside = {}
+        self._pending_lightnings = []
+        self._cancel_flush = None
+        self.event_stats = {}
+        self.lightning_stats = {
+            "received": 0,
+            "prefiltered": 0,
+            "decoded": 0,
+            "in_radius": 0,
+            "batches": 0,
+        }
 
         _LOGGER.info(
-            "lat: %s, lon: %s, radius: %skm, geohashes: %s",
+            "lat: %s, lon: %s, radius: %skm, geohashes: %s, over-fetch: %s",
             self.latitude,
             self.longitude,
             self.radius,
-            self.geohash_overlap,
+            self.geohash_plan.tiles,
+            self.geohash_plan.overfetch_ratio,
         )
 
         self.mqtt_client = MQTT(
@@ -228,27 +271,23 @@ class BlitzortungCoordinator:
             sensor.async_write_ha_state()
 
     def compute_polar_coords(self, lightning):
-        dy = (lightning["lat"] - self.latitude) * math.pi / 180
-        dx = (
-            (lightning["lon"] - self.longitude)
-            * math.pi
-            / 180
-            * math.cos(self.latitude * math.pi / 180)
-        )
-        distance = round(math.sqrt(dx * dx + dy * dy) * 6371, 1)
-        azimuth = round(math.atan2(dx, dy) * 180 / math.pi) % 360
-
-        lightning[ATTR_LIGHTNING_DISTANCE] = distance
-        lightning[ATTR_LIGHTNING_AZIMUTH] = azimuth
+        self.compute_polar_coords_batch([lightning])
+
+    def compute_polar_coords_batch(self, lightnings):
+        latitude, longitude, cos_lat = self.latitude, self.longitude, self._cos_lat
+        to_rad = math.pi / 180
+        to_deg = 180 / math.pi
+        sqrt, atan2 = math.sqrt, math.atan2
+        for lightning in lightnings:
+            dy = (lightning["lat"] - latitude) * to_rad
+            dx = (lightning["lon"] - longitude) * to_rad * cos_lat
+            lightning[ATTR_LIGHTNING_DISTANCE] = round(sqrt(dx * dx + dy * dy) * 6371, 1)
+            lightning[ATTR_LIGHTNING_AZIMUTH] = round(atan2(dx, dy) * to_deg) % 360
 
     async def connect(self):
         await self.mqtt_client.async_connect()
         _LOGGER.info("Connected to Blitzortung proxy mqtt server")
-        for geohash_code in self.geohash_overlap:
-            geohash_part = "/".join(geohash_code)
-            await self.mqtt_client.async_subscribe(
-                "blitzortung/1.1/{}/#".format(geohash_part), self.on_mqtt_message, qos=0
-            )
+        await self._async_subscribe_geohashes()
         if self.server_stats:
             await self.mqtt_client.async_subscribe(
                 "$SYS/broker/#", self.on_mqtt_message, qos=0
@@ -261,9 +300,46 @@ class BlitzortungCoordinator:
             async_track_time_interval(self.hass, self._tick, DEFAULT_UPDATE_INTERVAL)
         )
 
+    async def _async_subscribe_geohashes(self):
+        """Subscribe to the planned geohash tiles, dropping tiles no longer planned."""
+        topics = {
+            "{}{}/#".format(LIGHTNING_TOPIC_PREFIX, "/".join(geohash_code))
+            for geohash_code in self.geohash_plan.tiles
+        }
+        for topic in set(self._geohash_subscriptions) - topics:
+            self._geohash_subscriptions.pop(topic)()
+        for topic in sorted(topics - set(self._geohash_subscriptions)):
+            self._geohash_subscriptions[topic] = await self.mqtt_client.async_subscribe(
+                topic, self.on_mqtt_message, qos=0
+            )
+
+    async def async_set_radius(self, radius):
+        """Change the radius and re-plan the geohash subscriptions."""
+        if radius == self.radius:
+            return
+        self.radius = radius
+        self._topic_outside.clear()
+        self.geohash_plan = plan_geohash_subscriptions(
+            self.latitude, self.longitude, self.radius, MAX_GEOHASH_SUBSCRIPTIONS
+        )
+        self._filter_precision = filter_precision(
+            self.latitude, self.geohash_plan.received_area, MAX_CACHED_TOPIC_FILTERS
+        )
+        _LOGGER.info(
+            "radius: %skm, geohashes: %s, over-fetch: %s",
+            self.radius,
+            self.geohash_plan.tiles,
+            self.geohash_plan.overfetch_ratio,
+        )
+        await self._async_subscribe_geohashes()
+
     async def disconnect(self):
         self.unloading = True
+        if self._cancel_flush:
+            self._cancel_flush()
+            self._cancel_flush = None
         await self.mqtt_client.async_disconnect()
+        self._geohash_subscriptions.clear()
         for cb in self._disconnect_callbacks:
             cb()
 
@@ -290,19 +366,85 @@ class BlitzortungCoordinator:
                     notification_id="blitzortung_new_version_available",
                 )
 
-    async def on_mqtt_message(self, message, *args):
-        for callback in self.callbacks:
-            callback(message)
-        if message.topic.startswith("blitzortung/1.1"):
-            lightning = json_loads_object(message.payload)
-            self.compute_polar_coords(lightning)
-            if lightning[SensorDeviceClass.DISTANCE] < self.radius:
-                _LOGGER.debug("lightning data: %s", lightning)
-                self.last_time = time.time()
-                for callback in self.lightning_callbacks:
-                    await callback(lightning)
-                for sensor in self.sensors:
-                    sensor.update_lightning(lightning)
+    @callback
+    def on_mqtt_message(self, message, *args):
+        for message_cb in self.callbacks:
+            message_cb(message)
+        if message.topic.startswith(LIGHTNING_TOPIC_PREFIX):
+            self.lightning_stats["received"] += 1
+            if self._is_topic_outside(message.topic):
+                self.lightning_stats["prefiltered"] += 1
+                return
+            # strikes are decoded and dispatched in batches, a storm
+            # delivers far more of them than entities can be updated
+            payload = message.payload
+            if isinstance(payload, str):
+                payload = payload.encode()
+            self._pending_lightnings.append(payload)
+            if self._cancel_flush is None:
+                self._cancel_flush = async_call_later(
+                    self.hass, LIGHTNING_BATCH_WINDOW, self._flush_lightnings
+                )
+
+    def _is_topic_outside(self, topic):
+        """Check if the geohash of the topic lies completely outside the radius.
+
+        The check is done and cached for the geohash prefix at the filter
+        precision: when its tile lies outside the radius, so do all strikes in it.
+        """
+        gh = topic_geohash(topic, max_length=self._filter_precision)
+        outside = self._topic_outside.get(gh)
+        if outside is None:
+            outside = bool(gh) and round(
+                box_min_distance(self.latitude, self.longitude, geohash_bbox(gh)), 1
+            ) >= self.radius
+            if len(self._topic_outside) >= MAX_CACHED_TOPIC_FILTERS:
+                self._topic_outside.clear()
+            self._topic_outside[gh] = outside
+        return outside
+
+    def _decode_lightnings(self, payloads):
+        """Decode a batch of strike payloads with a single JSON decode."""
+        try:
+            lightnings = json_loads(b"[" + b",".join(payloads) + b"]")
+            if all(isinstance(lightning, dict) for lightning in lightnings):
+                return lightnings
+        except ValueError:
+            pass
+        lightnings = []
+        for payload in payloads:
+            try:
+                lightnings.append(json_loads_object(payload))
+            except ValueError:
+                _LOGGER.warning("Unable to decode lightning data: %s", payload)
+        return lightnings
+
+    async def _flush_lightnings(self, *args):
+        self._cancel_flush = None
+        payloads, self._pending_lightnings = self._pending_lightnings, []
+        if not payloads or self.unloading:
+            return
+
+        lightnings = self._decode_lightnings(payloads)
+        self.compute_polar_coords_batch(lightnings)
+        radius = self.radius
+        lightnings = [
+            lightning
+            for lightning in lightnings
+            if lightning[SensorDeviceClass.DISTANCE] < radius
+        ]
+        self.lightning_stats["decoded"] += len(payloads)
+        self.lightning_stats["in_radius"] += len(lightnings)
+        self.lightning_stats["batches"] += 1
+        if not lightnings:
+            return
+
+        _LOGGER.debug("lightning data: %s", lightnings)
+        self.last_time = time.time()
+        for lightning_cb in self.lightning_callbacks:
+            await lightning_cb(lightnings)
+        for sensor in self.sensors:
+            sensor.update_lightnings(lightnings)
 
     def register_sensor(self, sensor):
         self.sensors.append(sensor)
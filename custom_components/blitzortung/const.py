@@ -38,6 +38,8 @@ DEFAULT_RADIUS = 100
 DEFAULT_MAX_TRACKED_LIGHTNINGS = 100
 DEFAULT_TIME_WINDOW = 120
 DEFAULT_UPDATE_INTERVAL = datetime.timedelta(seconds=60)
+LIGHTNING_BATCH_WINDOW = 0.5  # seconds
+MAX_GEOHASH_SUBSCRIPTIONS = 32
 
 ATTR_LAT = "lat"
 ATTR_LON = "lon"
@@ -14,4 +14,5 @@ async def async_get_config_entry_diagnostics(
     return {
         "config_entry": config_entry.as_dict(),
         "coordinator": vars(config_entry.runtime_data),
+        "geohash_plan": config_entry.runtime_data.geohash_plan._asdict(),
     }
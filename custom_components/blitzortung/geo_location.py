@@ -1,7 +1,10 @@
 """Support for Blitzortung geo location events."""
 
-import bisect
+import asyncio
+import heapq
+import itertools
 import logging
+import sys
 import time
 import uuid
 
@@ -9,10 +12,6 @@ from homeassistant.components.geo_location import GeolocationEvent
 from homeassistant.components.geo_location import DOMAIN as platform
 from homeassistant.const import UnitOfLength
 from homeassistant.core import callback
-from homeassistant.helpers.dispatcher import (
-    async_dispatcher_connect,
-    async_dispatcher_send,
-)
 from homeassistant.util.dt import utc_from_timestamp
 from homeassistant.util.unit_system import IMPERIAL_SYSTEM
 from homeassistant.helpers import entity_registry as er
@@ -21,8 +20,6 @@ from .const import ATTR_EXTERNAL_ID, ATTR_PUBLICATION_DATE, ATTRIBUTION, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
-SIGNAL_DELETE_ENTITY = "blitzortung_delete_entity_{0}"
-
 
 async def async_setup_entry(
     hass, config_entry: BlitzortungConfigEntry, async_add_entities
@@ -45,51 +42,55 @@ async def async_setup_entry(
         async_add_entities,
         coordinator.max_tracked_lightnings,
         coordinator.time_window_seconds,
+        coordinator.event_stats,
     )
 
     coordinator.register_lightning_receiver(manager.lightning_cb)
     coordinator.register_on_tick(manager.tick)
 
 
-class Strikes(list):
+class Strikes:
+    """Bounded store of tracked strikes ordered by publication date.
+
+    Strikes are kept in a binary heap keyed by publication date, so the
+    oldest strike is always first: adding a strike, evicting it when over
+    capacity and expiring it are O(log n), no matter how out of order the
+    strikes arrive.
+    """
+
     def __init__(self, capacity):
-        self._keys = []
-        self._key_fn = lambda strike: strike._publication_date
-        self._max_key = 0
+        self._heap = []
+        self._seq = itertools.count()
         self._capacity = capacity
-        super().__init__()
 
-    def insort(self, item):
-        k = self._key_fn(item)
-        if k > self._max_key:
-            self._max_key = k
-            self._keys.append(k)
-            self.append(item)
-        else:
-            i = bisect.bisect_right(self._keys, k)
-            self._keys.insert(i, k)
-            self.insert(i, item)
-        n = len(self) - self._capacity
-        if n > 0:
-            del self._keys[0:n]
-            to_delete = self[0:n]
-            self[0:n] = []
-            return to_delete
-        return ()
+    def __len__(self):
+        return len(self._heap)
 
-    def cleanup(self, k):
-        if not self._keys or self._keys[0] > k:
-            return ()
+    def __iter__(self):
+        return (entry[2] for entry in self._heap)
 
-        i = bisect.bisect_right(self._keys, k)
-        if not i:
+    def insort(self, item):
+        entry = (item._publication_date, next(self._seq), item)
+        if len(self._heap) < self._capacity:
+            heapq.heappush(self._heap, entry)
             return ()
+        if not self._capacity:
+            return (item,)
+        return (heapq.heappushpop(self._heap, entry)[2],)
 
-        del self._keys[0:i]
-        to_delete = self[0:i]
-        self[0:i] = []
+    def cleanup(self, k):
+        heap = self._heap
+        to_delete = []
+        while heap and heap[0][0] <= k:
+            to_delete.append(heapq.heappop(heap)[2])
         return to_delete
 
+    def memory_size(self):
+        """Return the approximate size of the store in bytes."""
+        if not self._heap:
+            return sys.getsizeof(self._heap)
+        return sys.getsizeof(self._heap) + len(self._heap) * sys.getsizeof(self._heap[0])
+
 
 class BlitzortungEventManager:
     """Define a class to handle Blitzortung events."""
@@ -100,48 +101,93 @@ class BlitzortungEventManager:
         async_add_entities,
         max_tracked_lightnings,
         window_seconds,
+        stats=None,
     ):
         """Initialize."""
         self._async_add_entities = async_add_entities
         self._hass = hass
         self._strikes = Strikes(max_tracked_lightnings)
         self._window_seconds = window_seconds
+        self.stats = stats if stats is not None else {}
+        self.stats.update(
+            tracked=0,
+            peak_tracked=0,
+            added=0,
+            evicted=0,
+            expired=0,
+            dropped=0,
+            add_batches=0,
+            remove_batches=0,
+            store_bytes=0,
+        )
 
         if hass.config.units == IMPERIAL_SYSTEM:
             self._unit = UnitOfLength.MILES
         else:
             self._unit = UnitOfLength.KILOMETERS
 
-    async def lightning_cb(self, lightning):
-        _LOGGER.debug("geo_location lightning: %s", lightning)
-        event = BlitzortungEvent(
-            lightning["distance"],
-            lightning["lat"],
-            lightning["lon"],
-            self._unit,
-            lightning["time"],
-            lightning["status"],
-            lightning["region"],
-        )
-        to_delete = self._strikes.insort(event)
-        self._async_add_entities([event])
+    async def lightning_cb(self, lightnings):
+        _LOGGER.debug("geo_location lightnings: %s", len(lightnings))
+        events = []
+        to_delete = []
+        for lightning in lightnings:
+            event = BlitzortungEvent(
+                lightning["distance"],
+                lightning["lat"],
+                lightning["lon"],
+                self._unit,
+                lightning["time"],
+                lightning["status"],
+                lightning["region"],
+            )
+            events.append(event)
+            to_delete.extend(self._strikes.insort(event))
+        if to_delete:
+            # strikes of this batch pushed out again are never added
+            added = set(map(id, events))
+            deleted = set(map(id, to_delete))
+            events = [event for event in events if id(event) not in deleted]
+            to_delete = [event for event in to_delete if id(event) not in added]
+            self.stats["dropped"] += len(added & deleted)
+            self.stats["evicted"] += len(to_delete)
+        if events:
+            self.stats["added"] += len(events)
+            self.stats["add_batches"] += 1
+            self._async_add_entities(events)
         if to_delete:
             self._remove_events(to_delete)
+        self._update_stats()
         _LOGGER.debug("tracked lightnings: %s", len(self._strikes))
 
     @callback
     def _remove_events(self, events):
-        """Remove old geo location events."""
-        _LOGGER.debug("Going to remove %s", events)
-        for event in events:
-            async_dispatcher_send(
-                self._hass, SIGNAL_DELETE_ENTITY.format(event._strike_id)
+        """Remove old geo location events, all in one task."""
+        _LOGGER.debug("Going to remove %s events", len(events))
+        self.stats["remove_batches"] += 1
+        self._hass.async_create_task(
+            self._async_remove_events(events), "blitzortung remove strikes"
+        )
+
+    async def _async_remove_events(self, events):
+        # events not added yet remove themselves once they are
+        added = [event for event in events if not event.expire()]
+        if added:
+            await asyncio.gather(
+                *(event.async_remove(force_remove=True) for event in added)
             )
 
+    def _update_stats(self):
+        tracked = len(self._strikes)
+        self.stats["tracked"] = tracked
+        self.stats["peak_tracked"] = max(self.stats["peak_tracked"], tracked)
+        self.stats["store_bytes"] = self._strikes.memory_size()
+
     def tick(self):
         to_delete = self._strikes.cleanup(time.time() - self._window_seconds)
         if to_delete:
+            self.stats["expired"] += len(to_delete)
             self._remove_events(to_delete)
+            self._update_stats()
 
 
 class BlitzortungEvent(GeolocationEvent):
@@ -159,7 +205,8 @@ class BlitzortungEvent(GeolocationEvent):
         self._status = status
         self._region = region
         self._publication_date = time / 1e9
-        self._remove_signal_delete = None
+        self._added = False
+        self._expired = False
         self._strike_id = str(uuid.uuid4()).replace("-", "")
         self.entity_id = f"geo_location.lightning_strike_{self._strike_id}"
         self._attr_distance = distance
@@ -171,16 +218,14 @@ class BlitzortungEvent(GeolocationEvent):
         }
         self._attr_unit_of_measurement = unit
 
-    @callback
-    def _delete_callback(self):
-        """Remove this entity."""
-        self._remove_signal_delete()
-        self.hass.async_create_task(self.async_remove(force_remove=True))
+    def expire(self):
+        """Mark the event expired, return True if it is not added yet."""
+        self._expired = True
+        return not self._added
 
     async def async_added_to_hass(self):
         """Call when entity is added to hass."""
-        self._remove_signal_delete = async_dispatcher_connect(
-            self.hass,
-            SIGNAL_DELETE_ENTITY.format(self._strike_id),
-            self._delete_callback,
-        )
+        self._added = True
+        if self._expired:
+            # expired while it was being added
+            self.hass.async_create_task(self.async_remove(force_remove=True))
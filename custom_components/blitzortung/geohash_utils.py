@@ -1,3 +1,4 @@
+import heapq
 import math
 from collections import namedtuple
 
@@ -56,3 +57,119 @@ def geohash_overlap(lat, lon, radius, max_tiles=9):
         else:
             break
     return result
+
+
+def topic_geohash(topic, prefix_parts=2, max_length=None):
+    """Return the geohash of a strike from its topic, one character per level.
+
+    With max_length, only that many levels are read and a prefix of the
+    geohash is returned.
+    """
+    chars = []
+    parts = topic.split("/", -1 if max_length is None else prefix_parts + max_length)
+    for part in parts[prefix_parts:][:max_length]:
+        if len(part) != 1 or part not in geohash._base32:
+            break
+        chars.append(part)
+    return "".join(chars)
+
+
+def box_min_distance(lat, lon, box: Box):
+    """Return the smallest distance in km from a point to a box.
+
+    Uses the same equirectangular approximation as the strike distance, so a
+    box with a minimal distance beyond the radius holds no strike within it.
+    """
+    dy = (min(max(lat, box.s), box.n) - lat) * math.pi / 180
+    dx = (
+        (min(max(lon, box.w), box.e) - lon)
+        * math.pi
+        / 180
+        * math.cos(lat * math.pi / 180)
+    )
+    return math.sqrt(dx * dx + dy * dy) * 6371
+
+
+def filter_precision(lat, area, max_tiles=1024, max_precision=12):
+    """Return the finest geohash precision that covers the area in at most max_tiles.
+
+    Strikes can be tested against the radius by the tile of their geohash
+    prefix at this precision, with a bounded number of distinct tiles for
+    the received area (in km²).
+    """
+    km_per_degree = 40000 / 360
+    for precision in range(1, max_precision + 1):
+        lat_bits = 5 * precision // 2
+        lon_bits = 5 * precision - lat_bits
+        tile_area = (
+            180 / 2**lat_bits * km_per_degree
+            * 360 / 2**lon_bits * km_per_degree
+            * math.cos(lat * math.pi / 180)
+        )
+        if area / tile_area > max_tiles:
+            return max(1, precision - 1)
+    return max_precision
+
+
+Plan = namedtuple("Plan", ["tiles", "received_area", "circle_area", "overfetch_ratio"])
+
+
+def geohash_area(gh):
+    """Return the approximate area of a geohash tile in km²."""
+    box = geohash_bbox(gh)
+    km_per_degree = 40000 / 360
+    return (
+        (box.n - box.s)
+        * km_per_degree
+        * (box.e - box.w)
+        * km_per_degree
+        * math.cos((box.s + box.n) / 2 * math.pi / 180)
+    )
+
+
+def plan_geohash_subscriptions(lat, lon, radius, max_subscriptions=32, max_precision=12):
+    """Cover the circle with geohash tiles of mixed precision.
+
+    Starts with the single character tiles touching the circle and keeps
+    splitting the tile whose children (the ones touching the circle) save
+    the most received area per additional subscription, as long as the
+    number of subscriptions stays within max_subscriptions.
+    """
+
+    def touches(gh):
+        return box_min_distance(lat, lon, geohash_bbox(gh)) < radius
+
+    def split(gh):
+        children = [gh + c for c in geohash._base32 if touches(gh + c)]
+        gain = geohash_area(gh) - sum(geohash_area(child) for child in children)
+        return children, gain
+
+    tiles = {gh for gh in geohash._base32 if touches(gh)}
+    candidates = []
+    for gh in tiles:
+        children, gain = split(gh)
+        heapq.heappush(candidates, (-gain / max(1, len(children) - 1), gh, children))
+
+    while candidates:
+        _, gh, children = heapq.heappop(candidates)
+        if len(tiles) + len(children) - 1 > max_subscriptions:
+            continue
+        tiles.remove(gh)
+        tiles.update(children)
+        for child in children:
+            if len(child) < max_precision:
+                grandchildren, gain = split(child)
+                if gain > 0:
+                    heapq.heappush(
+                        candidates,
+                        (-gain / max(1, len(grandchildren) - 1), child, grandchildren),
+                    )
+
+    received_area = sum(geohash_area(gh) for gh in tiles)
+    circle_area = math.pi * radius * radius
+    return Plan(
+        sorted(tiles),
+        round(received_area, 1),
+        round(circle_area, 1),
+        round(received_area / circle_area, 2) if circle_area else None,
+    )
@@ -1,7 +1,9 @@
 """Support for MQTT message handling."""
 import asyncio
+from collections import deque
 import datetime as dt
 import logging
+import threading
 from itertools import groupby
 from operator import attrgetter
 from typing import Callable, List, Optional, Union
@@ -36,17 +38,6 @@ def _raise_on_error(result_code: int) -> None:
         )
 
 
-def _match_topic(subscription: str, topic: str) -> bool:
-    """Test if topic matches subscription."""
-    matcher = MQTTMatcher()
-    matcher[subscription] = True
-    try:
-        next(matcher.iter_match(topic))
-        return True
-    except StopIteration:
-        return False
-
-
 PublishPayloadType = Union[str, bytes, int, float, None]
 
 
@@ -97,6 +88,10 @@ class MQTT:
         self.connected = False
         self._mqttc: mqtt.Client = None
         self._paho_lock = asyncio.Lock()
+        self._matcher: Optional[MQTTMatcher] = None
+        self._received = deque()
+        self._received_lock = threading.Lock()
+        self._drain_scheduled = False
 
         self.init_client()
 
@@ -158,6 +153,7 @@ class MQTT:
 
         subscription = Subscription(topic, msg_callback, qos, encoding)
         self.subscriptions.append(subscription)
+        self._matcher = None
 
         # Only subscribe if currently connected.
         if self.connected:
@@ -169,6 +165,7 @@ class MQTT:
             if subscription not in self.subscriptions:
                 raise HomeAssistantError("Can't remove subscription twice")
             self.subscriptions.remove(subscription)
+            self._matcher = None
 
             if any(other.topic == topic for other in self.subscriptions):
                 # Other subscriptions on topic remaining - don't unsubscribe.
@@ -231,8 +228,36 @@ class MQTT:
             self.hass.add_job(self._async_perform_subscription, topic, max_qos)
 
     def _mqtt_on_message(self, _mqttc, _userdata, msg) -> None:
-        """Message received callback."""
-        self.hass.add_job(self._mqtt_handle_message, msg)
+        """Message received callback.
+
+        Messages are queued and handed to the event loop in batches, a single
+        wakeup handles everything received since the previous one.
+        """
+        self._received.append(msg)
+        with self._received_lock:
+            if self._drain_scheduled:
+                return
+            self._drain_scheduled = True
+        self.hass.loop.call_soon_threadsafe(self._mqtt_handle_messages)
+
+    @callback
+    def _mqtt_handle_messages(self) -> None:
+        with self._received_lock:
+            self._drain_scheduled = False
+        while self._received:
+            self._mqtt_handle_message(self._received.popleft())
+
+    def _get_matcher(self) -> MQTTMatcher:
+        """Return the topic matcher of the subscriptions, built once per change."""
+        if self._matcher is None:
+            matcher = MQTTMatcher()
+            for subscription in self.subscriptions:
+                try:
+                    matcher[subscription.topic].append(subscription)
+                except KeyError:
+                    matcher[subscription.topic] = [subscription]
+            self._matcher = matcher
+        return self._matcher
 
     @callback
     def _mqtt_handle_message(self, msg) -> None:
@@ -244,10 +269,12 @@ class MQTT:
         )
         timestamp = dt_util.utcnow()
 
-        for subscription in self.subscriptions:
-            if not _match_topic(subscription.topic, msg.topic):
-                continue
-
+        subscriptions = [
+            subscription
+            for matched in self._get_matcher().iter_match(msg.topic)
+            for subscription in matched
+        ]
+        for subscription in subscriptions:
             payload: SubscribePayloadType = msg.payload
             if subscription.encoding is not None:
                 try:
@@ -262,18 +289,18 @@ class MQTT:
                     )
                     continue
 
-            self.hass.async_create_task(
-                subscription.callback(
-                    Message(
-                        msg.topic,
-                        payload,
-                        msg.qos,
-                        msg.retain,
-                        subscription.topic,
-                        timestamp,
-                    )
+            result = subscription.callback(
+                Message(
+                    msg.topic,
+                    payload,
+                    msg.qos,
+                    msg.retain,
+                    subscription.topic,
+                    timestamp,
                 )
             )
+            if asyncio.iscoroutine(result):
+                self.hass.async_create_task(result)
 
     def _mqtt_on_disconnect(self, _mqttc, _userdata, result_code: int) -> None:
         """Disconnected callback."""
@@ -82,7 +82,7 @@ class BlitzortungSensor(SensorEntity):
     async def async_update(self):
         await self.coordinator.async_request_refresh()
 
-    def update_lightning(self, lightning):
+    def update_lightnings(self, lightnings):
         pass
 
     def on_message(self, message):
@@ -114,8 +114,9 @@ class LightningSensor(BlitzortungSensor):
 class DistanceSensor(LightningSensor):
     """Define a Blitzortung distance sensor."""
 
-    def update_lightning(self, lightning):
-        """Update the sensor data."""
+    def update_lightnings(self, lightnings):
+        """Update the sensor data from the latest lightning."""
+        lightning = lightnings[-1]
         self._attr_native_value = lightning[ATTR_LIGHTNING_DISTANCE]
         self._attr_extra_state_attributes = {
             ATTR_LAT: lightning[ATTR_LAT],
@@ -127,8 +128,9 @@ class DistanceSensor(LightningSensor):
 class AzimuthSensor(LightningSensor):
     """Define a Blitzortung azimuth sensor."""
 
-    def update_lightning(self, lightning):
-        """Update the sensor data."""
+    def update_lightnings(self, lightnings):
+        """Update the sensor data from the latest lightning."""
+        lightning = lightnings[-1]
         self._attr_native_value = lightning[ATTR_LIGHTNING_AZIMUTH]
         self._attr_extra_state_attributes = {
             ATTR_LAT: lightning[ATTR_LAT],
@@ -142,8 +144,8 @@ class CounterSensor(LightningSensor):
 
     INITIAL_STATE = 0
 
-    def update_lightning(self, lightning):
-        self._attr_native_value = self._attr_native_value + 1
+    def update_lightnings(self, lightnings):
+        self._attr_native_value = self._attr_native_value + len(lightnings)
         self.async_write_ha_state()
 
 
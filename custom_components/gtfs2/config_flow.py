@@ -64,6 +64,7 @@ from .gtfs_helper import (
     get_agency_list,
     get_local_stop_list
 )
+from .gtfs_import_helper import get_import_progress
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -78,6 +79,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         self._pygtfs = ""
         self._data: dict[str, str] = {}
         self._user_inputs: dict = {}
+        self._placeholders: dict[str, str] = {}
 
     async def async_step_user(self, user_input: dict | None = None) -> FlowResult:
         """Handle the source."""
@@ -135,7 +137,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         check_data = await self._check_data(self._user_inputs)
         if check_data :
             errors["base"] = check_data
-            return self.async_abort(reason=check_data)
+            return self.async_abort(reason=check_data, description_placeholders=self._placeholders)
         else:
             return self.async_create_entry(
                 title=user_input[CONF_NAME], data=self._user_inputs
@@ -177,7 +179,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         check_data = await self._check_data(user_input)
         if check_data :
             errors["base"] = check_data
-            return self.async_abort(reason=check_data)
+            return self.async_abort(reason=check_data, description_placeholders=self._placeholders)
         else:
             self._user_inputs.update(user_input)
             _LOGGER.debug(f"UserInputs Source: {self._user_inputs}")
@@ -217,7 +219,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         check_data = await self._check_data(self._user_inputs)
         if check_data :
             errors["base"] = check_data
-            return self.async_abort(reason=check_data)
+            return self.async_abort(reason=check_data, description_placeholders=self._placeholders)
         agencies = get_agency_list(self._pygtfs, self._user_inputs)
         if len(agencies) > 1:
             agencies[:0] = ["0: ALL"]
@@ -266,7 +268,7 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         _LOGGER.debug("Source check data: %s", check_data)
         if check_data :
             errors["base"] = check_data
-            return self.async_abort(reason=check_data)
+            return self.async_abort(reason=check_data, description_placeholders=self._placeholders)
         self._pygtfs = get_gtfs(
             self.hass,
             DEFAULT_PATH,
@@ -402,6 +404,14 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             get_gtfs, self.hass, DEFAULT_PATH, data, False
         )
         _LOGGER.debug("Checkdata pygtfs: %s with data: %s", self._pygtfs, data)
+        if self._pygtfs == 'extracting':
+            progress = await self.hass.async_add_executor_job(
+                get_import_progress, self.hass.config.path(DEFAULT_PATH), data["file"]
+            )
+            self._placeholders = {
+                "progress": f"{progress.get('rows', 0)} rows, {progress.get('rows_per_second', 0)} rows/s ({progress.get('status', 'extracting')})"
+            }
+            _LOGGER.info("Datasource %s still extracting: %s", data["file"], self._placeholders["progress"])
         if self._pygtfs in ['no_data_file', 'no_zip_file', 'extracting'] :
             return self._pygtfs
         check_index = await self.hass.async_add_executor_job(
@@ -17,6 +17,11 @@ DEFAULT_PATH = "gtfs2"
 DEFAULT_PATH_GEOJSON = "www/gtfs2"
 DEFAULT_PATH_RT = "www/gtfs2"
 DEFAULT_API_KEY_LOCATION = "not_applicable"
+DEFAULT_RT_FEED_MAX_AGE = 50
+DEFAULT_RT_FEED_TIMEOUT = 20
+DEFAULT_RT_FEED_EXPIRY = 3600
+
+RT_FEED_HUB = "gtfs2_rt_feed_hub"
 
 CONF_DATA = "data"
 CONF_DESTINATION = "destination"
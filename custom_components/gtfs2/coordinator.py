@@ -30,6 +30,7 @@ from .const import (
 )    
 from .gtfs_helper import get_gtfs, get_next_departure, check_datasource_index, create_trip_geojson, check_extracting, get_local_stops_next_departures
 from .gtfs_rt_helper import get_next_services, get_rt_alerts
+from .gtfs_query_helper import get_query_service
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -114,6 +115,7 @@ class GTFSUpdateCoordinator(DataUpdateCoordinator):
                 _LOGGER.error("Error getting gtfs data from generic helper: %s", ex)
                 return None
             _LOGGER.debug("GTFS coordinator data from helper: %s", self._data["next_departure"]) 
+            _LOGGER.debug("GTFS query timings for datasource %s: %s", data["file"], get_query_service(self._pygtfs).get_stats())
         
         # collect and return rt attributes
         # STILL REQUIRES A SOLUTION IF CONNECTION TIMING OUT
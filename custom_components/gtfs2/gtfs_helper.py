@@ -37,6 +37,28 @@ from .const import (
     TIME_STR_FORMAT
     )
 from .gtfs_rt_helper import get_rt_route_trip_statuses, get_gtfs_rt
+from .gtfs_index_helper import (
+    DEPARTURE_LOOKUP_LIMIT,
+    SECONDS_PER_DAY,
+    build_stops_spatial_index,
+    ensure_departure_index,
+    get_departure_index_key,
+    get_departure_index_query,
+    get_departure_timezones,
+    get_local_stop_ids,
+    rebuild_departure_index,
+    remove_departure_index_pairs,
+    )
+from .gtfs_import_helper import (
+    DATASOURCE_INDEXES,
+    IMPORT_PROGRESS_FILE,
+    UPDATE_DATASOURCE_FILE,
+    copy_datasource,
+    has_imported_members,
+    import_feed,
+    update_feed,
+)
+from .gtfs_query_helper import close_query_service, get_query_service
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -52,21 +74,9 @@ def get_next_departure(hass, _data):
     schedule = _data["schedule"]
     route_type = _data["route_type"]
     
-    # if type 2 (train) then filter on that and use name-like search 
-    if route_type == "2":
-        route_type_where = f"route_type in (2,100,101,102,103,104,105,106,107,108, 109,100,111,112,113,114,115,116,117)"
-        start_station_id = str(_data['origin'])+'%'
-        end_station_id = str(_data['destination'])+'%'
-        start_station_where = f"AND start_station.stop_id in (select stop_id from stops where stop_name like :origin_station_id)"
-        end_station_where = f"AND end_station.stop_id in (select stop_id from stops where stop_name like :end_station_id)"
-        _LOGGER.debug("Setting up TRAIN Route for start/end : %s / %s ", start_station_id, end_station_id)
-    else:
-        route_type_where = "1=1"
-        start_station_id = _data['origin'].split(': ')[0]
-        end_station_id = _data['destination'].split(': ')[0]
-        start_station_where = f"AND start_station.stop_id = :origin_station_id"
-        end_station_where = f"AND end_station.stop_id = :end_station_id"
-        _LOGGER.debug("Setting up Route for start/end : %s / %s ", start_station_id, end_station_id)
+    index_key = get_departure_index_key(route_type, _data['origin'], _data['destination'])
+    start_station_id = index_key[1]
+    _LOGGER.debug("Setting up Route for start/end : %s / %s ", index_key[1], index_key[2])
     offset = _data["offset"]
     include_tomorrow = _data["include_tomorrow"]
     now = dt_util.now().replace(tzinfo=None) + datetime.timedelta(minutes=offset)
@@ -81,184 +91,89 @@ def get_next_departure(hass, _data):
     tomorrow_date = tomorrow.strftime(dt_util.DATE_STR_FORMAT)
     tomorrow_date_local_tz = tomorrow_local_tz.strftime(dt_util.DATE_STR_FORMAT)
 
-    # Fetch all departures for yesterday, today and optionally tomorrow,
-    # up to an overkill maximum in case of a departure every minute for those
-    # days.
-    limit = 24 * 60 * 60 * 2
-    tomorrow_select = tomorrow_select2 = tomorrow_where = tomorrow_order = ""
-    tomorrow_calendar_date_where = f"AND (calendar_date_today.date = date('now'))"
+    # Departures of the origin/destination pair are materialized once per feed
+    # import, the lookup then only joins the (small) calendar tables.
+    ensure_departure_index(schedule, hass.config.path(_data['gtfs_dir']), _data['file'], index_key)
+    tomorrow_name = None
     if include_tomorrow:
         _LOGGER.debug("Include Tomorrow")
-        limit = int(limit / 2 * 3)
         tomorrow_name = tomorrow.strftime("%A").lower()
-        tomorrow_select = f"calendar.{tomorrow_name} AS tomorrow,"
-        tomorrow_where = f"OR calendar.{tomorrow_name} = 1"
-        tomorrow_order = f"calendar.{tomorrow_name} DESC,"
-        tomorrow_calendar_date_where = f"AND (calendar_date_today.date = date('now') or calendar_date_today.date = date('now','+1 day') )"
-        tomorrow_select2 = f"CASE WHEN date('now') < calendar_date_today.date THEN 1 else 0 END as tomorrow,"
-    sql_query = f"""
-        SELECT trip.trip_id, trip.route_id,trip.trip_headsign, trip.direction_id,
-               route.route_long_name,route.route_short_name,
-        	   start_station.stop_id as origin_stop_id,
-               start_station.stop_name as origin_stop_name,
-               start_station.stop_timezone as origin_stop_timezone,
-               agency.agency_timezone as agency_timezone,
-               time(origin_stop_time.arrival_time) AS origin_arrival_time,
-               time(origin_stop_time.departure_time) AS origin_depart_time,
-               date(origin_stop_time.departure_time) AS origin_depart_date,
-               origin_stop_time.drop_off_type AS origin_drop_off_type,
-               origin_stop_time.pickup_type AS origin_pickup_type,
-               origin_stop_time.shape_dist_traveled AS origin_dist_traveled,
-               origin_stop_time.stop_headsign AS origin_stop_headsign,
-               origin_stop_time.stop_sequence AS origin_stop_sequence,
-               origin_stop_time.timepoint AS origin_stop_timepoint,
-               end_station.stop_name as dest_stop_name,
-               end_station.stop_timezone as dest_stop_timezone,
-               time(destination_stop_time.arrival_time) AS dest_arrival_time,
-               time(destination_stop_time.departure_time) AS dest_depart_time,
-               destination_stop_time.drop_off_type AS dest_drop_off_type,
-               destination_stop_time.pickup_type AS dest_pickup_type,
-               destination_stop_time.shape_dist_traveled AS dest_dist_traveled,
-               destination_stop_time.stop_headsign AS dest_stop_headsign,
-               destination_stop_time.stop_sequence AS dest_stop_sequence,
-               destination_stop_time.timepoint AS dest_stop_timepoint,
-               calendar.{yesterday.strftime("%A").lower()} AS yesterday,
-               calendar.{now.strftime("%A").lower()} AS today,
-               {tomorrow_select}
-               calendar.start_date AS start_date,
-               calendar.end_date AS end_date,
-               "" as calendar_date,
-               0 as today_cd
-        FROM trips trip
-        INNER JOIN calendar calendar
-                   ON trip.service_id = calendar.service_id
-        INNER JOIN stop_times origin_stop_time
-                   ON trip.trip_id = origin_stop_time.trip_id
-        INNER JOIN stops start_station
-                   ON origin_stop_time.stop_id = start_station.stop_id
-        INNER JOIN stop_times destination_stop_time
-                   ON trip.trip_id = destination_stop_time.trip_id
-        INNER JOIN stops end_station
-                   ON destination_stop_time.stop_id = end_station.stop_id
-        INNER JOIN routes route
-                   ON route.route_id = trip.route_id 
-        INNER JOIN agency agency
-                   ON route.agency_id = agency.agency_id                 
-		WHERE {route_type_where}
-        {start_station_where}
-        {end_station_where}
-        AND origin_stop_sequence < dest_stop_sequence
-        AND calendar.start_date <= date('now')
-        AND calendar.end_date >= date('now')
-        AND trip.service_id not in (select service_id from calendar_dates where date = date('now') and exception_type = 2)
-		UNION ALL
-	    SELECT trip.trip_id, trip.route_id,trip.trip_headsign, trip.direction_id,
-               route.route_long_name,route.route_short_name,
-               start_station.stop_id as origin_stop_id,
-               start_station.stop_name as origin_stop_name,
-               start_station.stop_timezone as origin_stop_timezone,
-               agency.agency_timezone as agency_timezone,
-               time(origin_stop_time.arrival_time) AS origin_arrival_time,
-               time(origin_stop_time.departure_time) AS origin_depart_time,
-               date(origin_stop_time.departure_time) AS origin_depart_date,
-               origin_stop_time.drop_off_type AS origin_drop_off_type,
-               origin_stop_time.pickup_type AS origin_pickup_type,
-               origin_stop_time.shape_dist_traveled AS origin_dist_traveled,
-               origin_stop_time.stop_headsign AS origin_stop_headsign,
-               origin_stop_time.stop_sequence AS origin_stop_sequence,
-               origin_stop_time.timepoint AS origin_stop_timepoint,
-               end_station.stop_name as dest_stop_name,
-               end_station.stop_timezone as dest_stop_timezone,
-               time(destination_stop_time.arrival_time) AS dest_arrival_time,
-               time(destination_stop_time.departure_time) AS dest_depart_time,
-               destination_stop_time.drop_off_type AS dest_drop_off_type,
-               destination_stop_time.pickup_type AS dest_pickup_type,
-               destination_stop_time.shape_dist_traveled AS dest_dist_traveled,
-               destination_stop_time.stop_headsign AS dest_stop_headsign,
-               destination_stop_time.stop_sequence AS dest_stop_sequence,
-               destination_stop_time.timepoint AS dest_stop_timepoint,
-               '0' AS yesterday,
-               '0' AS today,
-               {tomorrow_select2}
-               date('now') AS start_date,
-               date('now') AS end_date,
-               calendar_date_today.date as calendar_date,
-               calendar_date_today.exception_type as today_cd
-        FROM trips trip
-        INNER JOIN stop_times origin_stop_time
-                   ON trip.trip_id = origin_stop_time.trip_id
-        INNER JOIN stops start_station
-                   ON origin_stop_time.stop_id = start_station.stop_id
-        INNER JOIN stop_times destination_stop_time
-                   ON trip.trip_id = destination_stop_time.trip_id
-        INNER JOIN stops end_station
-                   ON destination_stop_time.stop_id = end_station.stop_id
-        INNER JOIN routes route
-                   ON route.route_id = trip.route_id 
-        INNER JOIN calendar_dates calendar_date_today
-				   ON trip.service_id = calendar_date_today.service_id
-        INNER JOIN agency agency
-                   ON route.agency_id = agency.agency_id                    
-		WHERE {route_type_where}
-        {start_station_where}
-        {end_station_where}
-		AND origin_stop_sequence < dest_stop_sequence
-        AND today_cd = 1
-		{tomorrow_calendar_date_where}
-        ORDER BY calendar_date,origin_depart_date, today_cd, origin_depart_time
-        """  # noqa: S608
-    result = schedule.engine.connect().execute(
-        text(sql_query),
+    sql_query = get_departure_index_query(
+        yesterday.strftime("%A").lower(), now.strftime("%A").lower(), tomorrow_name
+    )
+    # Departures are looked up from now on, as the timetable below compares
+    # them: seconds since local midnight that have passed in the timezone of
+    # the departures (the earliest if the pair has several), with all
+    # departures up to the local time, which is checked first, in the gap.
+    query_service = get_query_service(schedule)
+    today_midnight = datetime.datetime.combine(now_local_tz.date(), datetime.time())
+    local_secs = int((now - today_midnight).total_seconds())
+    departure_clocks = []
+    for agency_timezone, origin_stop_timezone in get_departure_timezones(query_service, index_key):
+        departure_timezone = agency_timezone or origin_stop_timezone or hass.config.time_zone or "UTC"
+        departure_now = now_local_tz.astimezone(dt_util.get_time_zone(departure_timezone))
+        departure_clocks.append(int((departure_now.replace(tzinfo=None) - today_midnight).total_seconds()))
+    now_secs = min(departure_clocks or [local_secs])
+    clock_gap = max(departure_clocks + [local_secs]) - now_secs
+    result = query_service.execute(
+        "next_departure",
+        sql_query,
         {
-            "origin_station_id": start_station_id,
-            "end_station_id": end_station_id,
-            "limit": limit,
-            "route_type": route_type,
+            "route_type_key": index_key[0],
+            "origin_key": index_key[1],
+            "dest_key": index_key[2],
+            "yesterday_date": yesterday_date,
+            "tomorrow_date": tomorrow_date,
+            "yesterday_secs": max(now_secs, 0) + SECONDS_PER_DAY,
+            "today_secs": now_secs,
+            "tomorrow_secs": now_secs - SECONDS_PER_DAY,
+            "limit": DEPARTURE_LOOKUP_LIMIT,
+            "clock_gap": clock_gap,
         },
     )
     # Create lookup timetable for today and possibly tomorrow, taking into
     # account any departures from yesterday scheduled after midnight,
     # as long as all departures are within the calendar date range.
+    # Departures on the date of the first departure of a service day are on
+    # that day, later ones after midnight.
     timetable = {}
-    yesterday_start = today_start = tomorrow_start = None
+    firsts = set()
     yesterday_last = today_last = ""
     for row_cursor in result:
         row = row_cursor._asdict()
-        if row["yesterday"] == 1 and yesterday_date >= row["start_date"]:
+        day = row["day"]
+        start_date = str(datetime.date(1970, 1, 1) + datetime.timedelta(seconds=row["first_secs"]))
+        first = row["departure_secs"] == row["first_secs"] and day not in firsts
+        last = row["departure_secs"] == row["last_secs"]
+        if day == "yesterday":
             extras = {"day": "yesterday", "first": None, "last": False}
-            if yesterday_start is None:
-                yesterday_start = row["origin_depart_date"]
-            if yesterday_start != row["origin_depart_date"]:
+            if start_date != row["origin_depart_date"]:
                 idx = f"{now_date_local_tz} {row['origin_depart_time']}"
                 timetable[idx] = {**row, **extras}
-                yesterday_last = idx
-        if row["today"] == 1 or row["today_cd"] == 1:
-            extras = {"day": "today", "first": False, "last": False}
-            if today_start is None:
-                today_start = row["origin_depart_date"]
-                extras["first"] = True
-            if today_start == row["origin_depart_date"]:
+                if last:
+                    yesterday_last = idx
+        elif day == "today":
+            extras = {"day": "today", "first": first, "last": False}
+            if start_date == row["origin_depart_date"]:
                 idx_prefix = now_date_local_tz
             else:
                 idx_prefix = tomorrow_date_local_tz
             idx = f"{idx_prefix} {row['origin_depart_time']}"
             timetable[idx] = {**row, **extras}
-            today_last = idx
-            _LOGGER.debug("idx prefix today: %s", idx_prefix)        
-        if (
-            "tomorrow" in row
-            and row["tomorrow"] == 1
-            and ( tomorrow_date <= row["end_date"] or tomorrow_date == row["calendar_date"])
-        ):
-            extras = {"day": "tomorrow", "first": False, "last": None}
-            if tomorrow_start is None:
-                tomorrow_start = row["origin_depart_date"]
-                extras["first"] = True
-            if tomorrow_start == row["origin_depart_date"]:
+            if last:
+                today_last = idx
+            _LOGGER.debug("idx prefix today: %s", idx_prefix)
+        else:
+            extras = {"day": "tomorrow", "first": first, "last": None}
+            if start_date == row["origin_depart_date"]:
                 idx_prefix = tomorrow_date_local_tz
+            else:
+                idx_prefix = (tomorrow_local_tz + datetime.timedelta(days=1)).strftime(dt_util.DATE_STR_FORMAT)
             idx = f"{idx_prefix} {row['origin_depart_time']}"
             timetable[idx] = {**row, **extras}
             _LOGGER.debug("idx prefix tomorrow: %s", idx_prefix)
+        if first:
+            firsts.add(day)
     # Flag last departures.
     for idx in filter(None, [yesterday_last, today_last]):
         timetable[idx]["last"] = True
@@ -459,9 +374,12 @@ def get_gtfs(hass, path, data, update=False):
     if check_extracting(hass, gtfs_dir,filename) and not update :
         _LOGGER.debug("Cannot use this datasource as still unpacking: %s", filename)
         return "extracting"
+    # a datasource with the zip members of its import only reloads the changed tables
+    differential = update and has_imported_members(os.path.join(gtfs_dir, sqlite))
     if update and data["extract_from"] == "url" and os.path.exists(os.path.join(gtfs_dir, file)):
-        remove_datasource(hass, path, filename, True)
-    if update and data["extract_from"] == "zip" and os.path.exists(os.path.join(gtfs_dir, file)) and os.path.exists(os.path.join(gtfs_dir, sqlite)):
+        remove_datasource(hass, path, filename, not differential, False)
+    if update and not differential and data["extract_from"] == "zip" and os.path.exists(os.path.join(gtfs_dir, file)) and os.path.exists(os.path.join(gtfs_dir, sqlite)):
+        close_query_service(os.path.join(gtfs_dir, sqlite))
         os.remove(os.path.join(gtfs_dir, sqlite))      
     if data["extract_from"] == "zip":
         if not os.path.exists(os.path.join(gtfs_dir, file)):
@@ -487,12 +405,21 @@ def get_gtfs(hass, path, data, update=False):
     joined_path = os.path.join(gtfs_dir, sqlite_file)  
 
     gtfs = pygtfs.Schedule(joined_path)
+
+    if data.get("clean_feed_info", False):
+        remove_file = ['shapes.txt','transfers.txt','feed_info.txt']
+    else:
+        remove_file = ['shapes.txt','transfers.txt']
+
+    if differential and gtfs.feeds and os.path.exists(os.path.join(gtfs_dir, file)):
+        extract = Process(target=update_from_zip, args = (hass, gtfs_dir,file,remove_file))
+        extract.start()
+        extract.join()
+        _LOGGER.info("Exiting main after start subprocess for updating: %s", file)
+        return gtfs
    
     if not gtfs.feeds: 
-        if data.get("clean_feed_info", False):
-            extract = Process(target=extract_from_zip, args = (hass, gtfs,gtfs_dir,file,['shapes.txt','transfers.txt','feed_info.txt']))
-        else: 
-            extract = Process(target=extract_from_zip, args = (hass, gtfs,gtfs_dir,file,['shapes.txt','transfers.txt']))
+        extract = Process(target=extract_from_zip, args = (hass, gtfs,gtfs_dir,file,remove_file))
         extract.start()
         extract.join()
         _LOGGER.info("Exiting main after start subprocess for unpacking: %s", file)
@@ -505,9 +432,56 @@ def extract_from_zip(hass, gtfs, gtfs_dir, file, remove_file):
     clean = remove_from_zip(remove_file,gtfs_dir, file[:-4])
     if os.fork() != 0:
         return
-    pygtfs.append_feed(gtfs, os.path.join(gtfs_dir, file))
+    # the engine pool was inherited from the parent, do not share its connections
+    gtfs.engine.dispose(close=False)
+    try:
+        import_feed(gtfs, gtfs_dir, file[:-4])
+    except Exception as ex:  # pylint: disable=broad-except
+        _LOGGER.error("Error importing gtfs file: %s, error: %s", file, ex)
+        return
     check_datasource_index(hass, gtfs, gtfs_dir, file[:-4])
-    
+    build_stops_spatial_index(gtfs)
+    rebuild_departure_index(gtfs, gtfs_dir, file[:-4])
+
+def update_from_zip(hass, gtfs_dir, file, remove_file):
+    """Reload the changed tables in a copy of the datasource and swap it in."""
+    _LOGGER.debug("Updating gtfs file: %s", file)
+    remove_from_zip(remove_file,gtfs_dir, file[:-4])
+    if os.fork() != 0:
+        return
+    sqlite = os.path.join(gtfs_dir, file[:-4] + ".sqlite")
+    update_sqlite = os.path.join(gtfs_dir, file[:-4] + UPDATE_DATASOURCE_FILE)
+    # the sensors keep using the current datasource until the copy is swapped in
+    try:
+        copy_datasource(sqlite, update_sqlite)
+        gtfs = pygtfs.Schedule(f"{update_sqlite}?check_same_thread=False")
+        changed = update_feed(gtfs, gtfs_dir, file[:-4])
+        full_import = changed is None
+        if full_import:
+            # no zip members of a previous import to compare with, import it all
+            _LOGGER.info("No previous import recorded, importing all tables of: %s", file[:-4])
+            gtfs.engine.dispose()
+            close_query_service(update_sqlite)
+            os.remove(update_sqlite)
+            gtfs = pygtfs.Schedule(f"{update_sqlite}?check_same_thread=False")
+            import_feed(gtfs, gtfs_dir, file[:-4])
+        if changed or full_import:
+            check_datasource_index(hass, gtfs, gtfs_dir, file[:-4])
+            if full_import or "stops" in changed:
+                build_stops_spatial_index(gtfs)
+            rebuild_departure_index(gtfs, gtfs_dir, file[:-4])
+        gtfs.engine.dispose()
+        close_query_service(update_sqlite)
+        if changed or full_import:
+            os.replace(update_sqlite, sqlite)
+            _LOGGER.info("Updated tables %s of datasource: %s", changed or "all", file[:-4])
+    except Exception as ex:  # pylint: disable=broad-except
+        _LOGGER.error("Error updating gtfs file: %s, keeping current datasource, error: %s", file, ex)
+    finally:
+        for temp in (update_sqlite, update_sqlite + "-journal"):
+            if os.path.exists(temp):
+                os.remove(temp)
+
 def check_calendar_dates_from_zip(gtfs_dir,file):
     _LOGGER.debug("Checking if file contains only future data: %s ", file)
     filename = os.path.join(gtfs_dir, file)
@@ -545,12 +519,16 @@ def check_calendar_dates_from_zip(gtfs_dir,file):
         _LOGGER.debug(f"Removing/restoring sqlite after error")
         if os.path.exists(os.path.join(gtfs_dir, file[:-4] + ".sqlite")):
             os.remove(os.path.join(gtfs_dir, file[:-4] + ".sqlite"))
-        if os.path.exists(os.path.join(gtfs_dir, file[:-4] + ".sqlite")):
-            os.rename (os.path.join(gtfs_dir, file[:-4] + '.sqlite'), os.path.join(gtfs_dir, file[:-4] + '.sqlite_current'))
+        if os.path.exists(os.path.join(gtfs_dir, file[:-4] + ".sqlite_current")):
+            os.rename (os.path.join(gtfs_dir, file[:-4] + '.sqlite_current'), os.path.join(gtfs_dir, file[:-4] + '.sqlite'))
         return False
-    _LOGGER.debug(f"New file is not containing only newer dates, removing current/copied sqlite")    
     if os.path.exists(os.path.join(gtfs_dir, file[:-4] + ".sqlite_current")):
-        os.remove(os.path.join(gtfs_dir, file[:-4] + ".sqlite_current"))
+        if has_imported_members(os.path.join(gtfs_dir, file[:-4] + ".sqlite_current")):
+            _LOGGER.debug(f"New file is not containing only newer dates, restoring current sqlite for update")
+            os.rename (os.path.join(gtfs_dir, file[:-4] + '.sqlite_current'), os.path.join(gtfs_dir, file[:-4] + '.sqlite'))
+        else:
+            _LOGGER.debug(f"New file is not containing only newer dates, removing current/copied sqlite")
+            os.remove(os.path.join(gtfs_dir, file[:-4] + ".sqlite_current"))
     return True
 
 def remove_from_zip(delmelist,gtfs_dir,file):
@@ -581,9 +559,9 @@ def get_route_list(schedule, data):
     route_type_where = ""
     agency_where = ""
     if data["agency"].split(': ')[0] != "0":
-        agency_where = f"and r.agency_id = '{data['agency'].split(': ')[0]}'"
+        agency_where = "and r.agency_id = :agency_id"
     if data["route_type"] != "99":
-        route_type_where = f"and route_type = {data['route_type']}"
+        route_type_where = "and route_type = :route_type"
     sql_routes = f"""
     SELECT r.route_type, r.route_id, r.route_short_name, r.route_long_name, a.agency_name
     from routes r
@@ -593,9 +571,10 @@ def get_route_list(schedule, data):
     {agency_where}
     order by agency_name, cast(route_id as decimal)
     """  # noqa: S608
-    result = schedule.engine.connect().execute(
-        text(sql_routes),
-        {"q": "q"},
+    result = get_query_service(schedule).execute(
+        "route_list",
+        sql_routes,
+        {"agency_id": data["agency"].split(': ')[0], "route_type": data["route_type"]},
     )
     routes_list = []
     routes = []
@@ -615,13 +594,14 @@ def get_stop_list(schedule, route_id, direction):
     from trips t
     inner join stop_times st on st.trip_id = t.trip_id
     inner join stops s on s.stop_id = st.stop_id
-    where  t.route_id = '{route_id}'
-    and (t.direction_id = {direction} or t.direction_id is null)
+    where  t.route_id = :route_id
+    and (t.direction_id = :direction or t.direction_id is null)
     order by st.stop_sequence
     """  # noqa: S608
-    result = schedule.engine.connect().execute(
-        text(sql_stops),
-        {"q": "q"},
+    result = get_query_service(schedule).execute(
+        "stop_list",
+        sql_stops,
+        {"route_id": route_id, "direction": direction},
     )
     stops_list = []
     stops = []
@@ -641,9 +621,9 @@ def get_agency_list(schedule, data):
     from agency a
     order by a.agency_name
     """
-    result = schedule.engine.connect().execute(
-        text(sql_agencies),
-        {"q": "q"},
+    result = get_query_service(schedule).execute(
+        "agency_list",
+        sql_agencies,
     )
     agencies_list = []
     agencies = []
@@ -669,11 +649,16 @@ async def get_datasources(hass, path) -> dict[str]:
     _LOGGER.debug(f"Datasources in folder: {datasources}")
     return datasources
 
-def remove_datasource(hass, path, filename, include_sqlite):
+def remove_datasource(hass, path, filename, include_sqlite, include_index=True):
     gtfs_dir = hass.config.path(path)
     _LOGGER.info(f"Removing datasource: {os.path.join(gtfs_dir, filename)}.*")
     if include_sqlite and os.path.exists(os.path.join(gtfs_dir, filename + ".sqlite")):
+        close_query_service(os.path.join(gtfs_dir, filename + ".sqlite"))
         os.remove(os.path.join(gtfs_dir, filename + ".sqlite"))
+    if include_index:
+        remove_departure_index_pairs(gtfs_dir, filename)
+    if os.path.exists(os.path.join(gtfs_dir, filename + IMPORT_PROGRESS_FILE)):
+        os.remove(os.path.join(gtfs_dir, filename + IMPORT_PROGRESS_FILE))
     if os.path.exists(os.path.join(gtfs_dir, filename + "_temp.zip")):     
         os.remove(os.path.join(gtfs_dir, filename + "_temp.zip"))
     if os.path.exists(os.path.join(gtfs_dir, filename + "_temp_out.zip")):        
@@ -701,51 +686,12 @@ def check_datasource_index(hass, schedule, gtfs_dir, file):
     if check_extracting(hass, gtfs_dir,file):
         _LOGGER.warning("Cannot check indexes on this datasource as still unpacking: %s", file)
         return
-    sql_index_1 = f"""
-    SELECT count(*) as checkidx
-    FROM sqlite_master
-    WHERE
-    type= 'index' and tbl_name = 'stop_times' and name like '%trip_id%';
-    """
-    sql_index_2 = f"""
-    SELECT count(*) as checkidx
-    FROM sqlite_master
-    WHERE
-    type= 'index' and tbl_name = 'stop_times' and name like '%stop_id%';
-    """
-    sql_index_3 = f"""
-    SELECT count(*) as checkidx
-    FROM sqlite_master
-    WHERE
-    type= 'index' and tbl_name = 'shapes' and name like '%shape_id%';
-    """
-    sql_index_4 = f"""
+    sql_index = f"""
     SELECT count(*) as checkidx
     FROM sqlite_master
     WHERE
-    type= 'index' and tbl_name = 'stops' and name like '%stop_name%';
-    """
-    sql_index_5 = f"""
-    SELECT count(*) as checkidx
-    FROM sqlite_master
-    WHERE
-    type= 'index' and tbl_name = 'routes' and name like '%route_type%';
-    """    
-    sql_add_index_1 = f"""
-    create index gtfs2_stop_times_trip_id on stop_times(trip_id)
-    """
-    sql_add_index_2 = f"""
-    create index gtfs2_stop_times_stop_id on stop_times(stop_id)
-    """
-    sql_add_index_3 = f"""
-    create index gtfs2_shapes_shape_id on shapes(shape_id)
+    type= 'index' and tbl_name = :table and name like :name;
     """
-    sql_add_index_4 = f"""
-    create index gtfs2_stops_stop_name on stops(stop_name)
-    """    
-    sql_add_index_5 = f"""
-    create index gtfs2_routes_route_type on routes(route_type)
-    """ 
     sql_check_route_agency = f"""
     SELECT count(*) as check_agency
     FROM routes where agency_id='None'
@@ -754,86 +700,25 @@ def check_datasource_index(hass, schedule, gtfs_dir, file):
     update routes set agency_id = (select agency_id from agency limit 1)
         where agency_id='None'
     """
-    
-    result_1a = schedule.engine.connect().execute(
-        text(sql_index_1),
-        {"q": "q"},
-    )
-    for row_cursor in result_1a:
-        _LOGGER.debug("IDX result1: %s", row_cursor._asdict())
-        if row_cursor._asdict()['checkidx'] == 0:
-            _LOGGER.warning("Adding index 1 to improve performance")
-            result_1b = schedule.engine.connect().execute(
-            text(sql_add_index_1),
-            {"q": "q"},
-            )        
-        
-    result_2a = schedule.engine.connect().execute(
-        text(sql_index_2),
-        {"q": "q"},
-    )
-    for row_cursor in result_2a:
-        _LOGGER.debug("IDX result2: %s", row_cursor._asdict())
-        if row_cursor._asdict()['checkidx'] == 0:
-            _LOGGER.warning("Adding index 2 to improve performance")
-            result_2b = schedule.engine.connect().execute(
-            text(sql_add_index_2),
-            {"q": "q"},
-            )
-            
-    result_3a = schedule.engine.connect().execute(
-        text(sql_index_3),
-        {"q": "q"},
-    )
-    for row_cursor in result_3a:
-        _LOGGER.debug("IDX result3: %s", row_cursor._asdict())
-        if row_cursor._asdict()['checkidx'] == 0:
-            _LOGGER.warning("Adding index 3 to improve performance")
-            result_3b = schedule.engine.connect().execute(
-            text(sql_add_index_3),
-            {"q": "q"},
-            )    
-    result_4a = schedule.engine.connect().execute(
-        text(sql_index_4),
-        {"q": "q"},
-    )
-    for row_cursor in result_4a:
-        _LOGGER.debug("IDX result4: %s", row_cursor._asdict())
-        if row_cursor._asdict()['checkidx'] == 0:
-            _LOGGER.warning("Adding index 4 to improve performance")
-            result_4b = schedule.engine.connect().execute(
-            text(sql_add_index_4),
-            {"q": "q"},
-            )  
-    result_5a = schedule.engine.connect().execute(
-        text(sql_index_5),
-        {"q": "q"},  
-    )
-    for row_cursor in result_5a:
-        _LOGGER.debug("IDX result5: %s", row_cursor._asdict())
-        if row_cursor._asdict()['checkidx'] == 0:
-            _LOGGER.warning("Adding index 5 to improve performance")
-            result_5b = schedule.engine.connect().execute(
-            text(sql_add_index_5),
-            {"q": "q"},
-            )  
-    
-    result_6a = schedule.engine.connect().execute(
-        text(sql_check_route_agency),
-        {"q": "q"},  
-    )
-    for row_cursor in result_6a:
-        _LOGGER.debug("Agency 'None' in routes: %s", row_cursor._asdict())
-        if row_cursor._asdict()['check_agency'] > 0:
+    started = time.perf_counter()
+    with schedule.engine.connect() as conn:
+        for ix, (name, table, column) in enumerate(DATASOURCE_INDEXES, start=1):
+            checkidx = conn.execute(
+                text(sql_index),
+                {"table": table, "name": f"%{column}%"},
+            ).scalar()
+            _LOGGER.debug("IDX result%s: %s", ix, checkidx)
+            if checkidx == 0:
+                _LOGGER.warning("Adding index %s to improve performance", ix)
+                conn.execute(text(f"create index {name} on {table}({column})"))
+        check_agency = conn.execute(text(sql_check_route_agency)).scalar()
+        _LOGGER.debug("Agency 'None' in routes: %s", check_agency)
+        if check_agency > 0:
             _LOGGER.warning("Fix missing agency_id in routes table")
-            conn = schedule.engine.connect()
-            result_6b = conn.execute(
-            text(sql_fix_route_agency),
-            {"q": "q"},
-            )
-            conn.commit()
+            conn.execute(text(sql_fix_route_agency))
+        conn.commit()
+    get_query_service(schedule).record("datasource_index", time.perf_counter() - started)
 
-    
             
 def create_trip_geojson(self):
     # not in use, awaiting geojson in HA-core to cover this type of geometry
@@ -871,23 +756,8 @@ def get_local_stop_list(hass, schedule, data):
     device_tracker = hass.states.get(data['device_tracker_id'])
     latitude = device_tracker.attributes.get("latitude", None)
     longitude = device_tracker.attributes.get("longitude", None) 
-    radius = data.get("radius", DEFAULT_LOCAL_STOP_RADIUS) / 111111
-    sql_query = f"""
-        SELECT stop.stop_id, stop.stop_name
-        FROM stops stop
-        where abs(stop.stop_lat - :latitude) < :radius and abs(stop.stop_lon - :longitude) < :radius
-        """  
-    result = schedule.engine.connect().execute(
-        text(sql_query),
-        {
-            "latitude": latitude,
-            "longitude": longitude,
-            "radius": radius
-        },
-    )   
-    rowcount = 0
-    for row_cursor in result:
-        rowcount += 1
+    radius = data.get("radius", DEFAULT_LOCAL_STOP_RADIUS)
+    rowcount = len(get_local_stop_ids(schedule, latitude, longitude, radius))
     _LOGGER.debug("Local stops list output: %s", rowcount)
     return rowcount
         
@@ -915,10 +785,14 @@ def get_local_stops_next_departures(self):
     tomorrow_calendar_date_where = f"AND (calendar_date_today.date = date(:now_offset))"
     time_range = str('+' + str(self._data.get("timerange", DEFAULT_LOCAL_STOP_TIMERANGE)) + ' minute')
     time_range_history = str('-' + str(self._data.get("timerange_history", DEFAULT_LOCAL_STOP_TIMERANGE_HISTORY)) + ' minute')
-    radius = self._data.get("radius", DEFAULT_LOCAL_STOP_RADIUS) / 111111
+    radius = self._data.get("radius", DEFAULT_LOCAL_STOP_RADIUS)
     if not latitude or not longitude:
         _LOGGER.error("No latitude and/or longitude for : %s", self._data['device_tracker_id'])
         return []
+    local_stop_ids = get_local_stop_ids(schedule, latitude, longitude, radius)
+    _LOGGER.debug("Stops within radius: %s", local_stop_ids)
+    if not local_stop_ids:
+        return []
     if include_tomorrow:
         _LOGGER.debug("Includes Tomorrow")
         tomorrow_name = tomorrow.strftime("%A").lower()
@@ -943,7 +817,7 @@ def get_local_stops_next_departures(self):
         INNER JOIN stop_times st
                    ON trip.trip_id = st.trip_id
         INNER JOIN stops stop
-                   on stop.stop_id = st.stop_id and abs(stop.stop_lat - :latitude) < :radius and abs(stop.stop_lon - :longitude) < :radius
+                   on stop.stop_id = st.stop_id and stop.stop_id in :stop_ids
         INNER JOIN routes route
                    ON route.route_id = trip.route_id 
         INNER JOIN agency agency
@@ -970,7 +844,7 @@ def get_local_stops_next_departures(self):
         INNER JOIN stop_times st
                    ON trip.trip_id = st.trip_id
         INNER JOIN stops stop
-                   on stop.stop_id = st.stop_id and abs(stop.stop_lat - :latitude) < :radius and abs(stop.stop_lon - :longitude) < :radius
+                   on stop.stop_id = st.stop_id and stop.stop_id in :stop_ids
         INNER JOIN routes route
                    ON route.route_id = trip.route_id 
         INNER JOIN calendar_dates calendar_date_today
@@ -987,16 +861,16 @@ def get_local_stops_next_departures(self):
         order by stop_id, tomorrow, departure_time
         """  # noqa: S608
     _LOGGER.debug("sql: %s", sql_query)
-    result = schedule.engine.connect().execute(
-        text(sql_query),
+    result = get_query_service(schedule).execute(
+        "local_stops_next_departures",
+        sql_query,
         {
-            "latitude": latitude,
-            "longitude": longitude,
+            "stop_ids": local_stop_ids,
             "timerange": time_range,
             "timerange_history": time_range_history,
-            "radius": radius,
             "now_offset": now
         },
+        expanding=("stop_ids",),
     )        
     timetable = []
     local_stops_list = []
@@ -0,0 +1,479 @@
+"""Bulk GTFS import for the GTFS Integration."""
+from __future__ import annotations
+
+import csv
+import datetime
+import io
+import json
+import logging
+import os
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from pygtfs.gtfs_entities import (
+    Feed,
+    ServiceException,
+    ShapePoint,
+    Translation,
+    Trip,
+    Stop,
+    _stop_translations,
+    _trip_shapes,
+    gtfs_all,
+    gtfs_calendar,
+    gtfs_required,
+)
+from sqlalchemy import create_engine, exc
+from sqlalchemy.sql import func, select, text
+from sqlalchemy.types import Boolean, Date, Float, Integer, Interval, Numeric
+
+from . import zip_file as zipfile
+
+_LOGGER = logging.getLogger(__name__)
+
+IMPORT_BATCH_SIZE = 10000
+IMPORT_WORKERS = 4
+IMPORT_PROGRESS_FILE = "_import.json"
+IMPORT_PROGRESS_INTERVAL = 2
+UPDATE_DATASOURCE_FILE = ".sqlite_update"
+
+# CRC32 and size of the zip members of the last import
+FEED_MEMBERS_TABLE = "gtfs2_feed_members"
+
+# Indexes added on top of the pygtfs ones, same names as check_datasource_index
+DATASOURCE_INDEXES = [
+    ("gtfs2_stop_times_trip_id", "stop_times", "trip_id"),
+    ("gtfs2_stop_times_stop_id", "stop_times", "stop_id"),
+    ("gtfs2_shapes_shape_id", "shapes", "shape_id"),
+    ("gtfs2_stops_stop_name", "stops", "stop_name"),
+    ("gtfs2_routes_route_type", "routes", "route_type"),
+]
+
+# Only settings that are safe on a fresh datasource: the rollback journal is
+# kept as check_extracting relies on the .sqlite-journal during the import.
+BULK_LOAD_PRAGMAS = [
+    "PRAGMA synchronous = OFF",
+    "PRAGMA temp_store = MEMORY",
+    "PRAGMA cache_size = -200000",
+]
+
+
+def _to_int(value):
+    return int(value)
+
+
+def _to_float(value):
+    return float(value)
+
+
+def _to_bool(value):
+    return value == "1"
+
+
+def _to_date(value):
+    return datetime.datetime.strptime(value, "%Y%m%d").date()
+
+
+def _to_timedelta(value):
+    (hours, minutes, seconds) = map(int, value.split(":"))
+    return datetime.timedelta(hours=hours, minutes=minutes, seconds=seconds)
+
+
+def _column_converter(column):
+    """Return the converter of a csv value to the python type pygtfs would store."""
+    if isinstance(column.type, Boolean):
+        return _to_bool
+    if isinstance(column.type, Date):
+        return _to_date
+    if isinstance(column.type, Interval):
+        return _to_timedelta
+    if isinstance(column.type, Integer):
+        return _to_int
+    if isinstance(column.type, (Float, Numeric)):
+        return _to_float
+    return None
+
+
+def _column_default(column):
+    if column.default is not None and column.default.is_scalar:
+        return column.default.arg
+    return None
+
+
+def write_import_progress(gtfs_dir, file, progress):
+    """Write the import progress next to the datasource, read by the config flow."""
+    progress_file = os.path.join(gtfs_dir, file + IMPORT_PROGRESS_FILE)
+    with open(progress_file + "_temp", "w") as f:
+        json.dump(progress, f)
+    os.replace(progress_file + "_temp", progress_file)
+
+
+def get_import_progress(gtfs_dir, file):
+    """Return the last reported import progress of a datasource."""
+    progress_file = os.path.join(gtfs_dir, file + IMPORT_PROGRESS_FILE)
+    if not os.path.exists(progress_file):
+        return {}
+    try:
+        with open(progress_file) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _put_batch(batches, batch, stop):
+    """Queue a batch for the writer, giving up when the import is stopped."""
+    while not stop.is_set():
+        try:
+            batches.put(batch, timeout=0.5)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def read_member_batches(zip_path, gtfs_class, batches, stop, batch_size=IMPORT_BATCH_SIZE):
+    """Stream one csv member of the zip into batches of insert parameters."""
+    table = gtfs_class.__table__
+    with zipfile.ZipFile(zip_path, "r") as zin:
+        with zin.open(gtfs_class.__tablename__ + ".txt") as member:
+            reader = csv.reader(io.TextIOWrapper(member, encoding="utf-8-sig", newline=""))
+            header = [name.strip() for name in next(reader, [])]
+            fields = [
+                (i, name, _column_converter(table.columns[name]), _column_default(table.columns[name]))
+                for i, name in enumerate(header)
+                if name in table.columns and name != "feed_id"
+            ]
+            # columns with a default but missing in the file, pygtfs fills them in
+            missing = {
+                column.name: _column_default(column)
+                for column in table.columns
+                if column.name not in header and _column_default(column) is not None
+            }
+            rows = []
+            for line, record in enumerate(reader, start=2):
+                if not record or not any(record):
+                    continue
+                row = dict(missing)
+                try:
+                    for i, name, converter, default in fields:
+                        value = record[i].strip() if i < len(record) else ""
+                        if not value:
+                            row[name] = default
+                        elif converter is None:
+                            row[name] = value
+                        else:
+                            row[name] = converter(value)
+                except ValueError as ex:
+                    raise ValueError(f"{gtfs_class.__tablename__}.txt line {line}: {ex}") from ex
+                rows.append(row)
+                if len(rows) >= batch_size:
+                    if not _put_batch(batches, (table, rows), stop):
+                        return
+                    rows = []
+            if rows:
+                _put_batch(batches, (table, rows), stop)
+
+
+def get_zip_members(zip_path):
+    """Return the CRC32 and size of each member from the zip central directory."""
+    with zipfile.ZipFile(zip_path, "r") as zin:
+        return {item.filename: (item.CRC, item.file_size) for item in zin.infolist()}
+
+
+def get_imported_members(conn):
+    """Return the zip members of the last import, None for an older datasource."""
+    try:
+        rows = conn.execute(text(f"SELECT member, crc, size FROM {FEED_MEMBERS_TABLE}")).fetchall()
+    except exc.OperationalError:
+        return None
+    return {member: (crc, size) for member, crc, size in rows} or None
+
+
+def has_imported_members(database):
+    """Return True if the datasource can be updated per table."""
+    if not os.path.exists(database):
+        return False
+    engine = create_engine(f"sqlite:///file:{database}?mode=ro&uri=true")
+    try:
+        with engine.connect() as conn:
+            return get_imported_members(conn) is not None
+    except exc.SQLAlchemyError:
+        return False
+    finally:
+        engine.dispose()
+
+
+def _save_imported_members(conn, members):
+    conn.exec_driver_sql(
+        f"CREATE TABLE IF NOT EXISTS {FEED_MEMBERS_TABLE} (member TEXT PRIMARY KEY, crc INTEGER, size INTEGER)"
+    )
+    conn.exec_driver_sql(f"DELETE FROM {FEED_MEMBERS_TABLE}")
+    conn.execute(
+        text(f"INSERT INTO {FEED_MEMBERS_TABLE} (member, crc, size) VALUES (:member, :crc, :size)"),
+        [{"member": member, "crc": crc, "size": size} for member, (crc, size) in members.items()],
+    )
+
+
+def _get_gtfs_classes(members):
+    """Return the gtfs classes present in the zip, checking the required ones."""
+    gtfs_classes = [
+        gtfs_class for gtfs_class in gtfs_all if gtfs_class.__tablename__ + ".txt" in members
+    ]
+    for gtfs_class in gtfs_required:
+        if gtfs_class not in gtfs_classes:
+            raise IOError(f"Error: could not find {gtfs_class.__tablename__}.txt")
+    if not set(gtfs_classes) & gtfs_calendar:
+        raise IOError("Must have calendar.txt or calendar_dates.txt")
+    return gtfs_classes
+
+
+def get_changed_classes(previous, members):
+    """Return the gtfs classes whose zip member was added, changed or removed."""
+    changed = [
+        gtfs_class
+        for gtfs_class in gtfs_all
+        if previous.get(gtfs_class.__tablename__ + ".txt") != members.get(gtfs_class.__tablename__ + ".txt")
+    ]
+    # the dummy calendar entries depend on both calendar files
+    if set(changed) & gtfs_calendar:
+        changed = [
+            gtfs_class for gtfs_class in gtfs_all if gtfs_class in changed or gtfs_class in gtfs_calendar
+        ]
+    return changed
+
+
+def _load_members(conn, zip_path, gtfs_classes, feed_id, gtfs_dir, file, progress, started, workers):
+    """Stream the members of the gtfs classes into their tables."""
+    batches = queue.Queue(maxsize=workers * 2)
+    stop = threading.Event()
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="gtfs2_import") as executor:
+        readers = [
+            executor.submit(read_member_batches, zip_path, gtfs_class, batches, stop)
+            for gtfs_class in gtfs_classes
+        ]
+        reported = started
+        while not stop.is_set():
+            try:
+                table, rows = batches.get(timeout=0.5)
+            except queue.Empty:
+                if all(reader.done() for reader in readers) and batches.empty():
+                    break
+                continue
+            for row in rows:
+                row["feed_id"] = feed_id
+            try:
+                conn.execute(table.insert(), rows)
+            except Exception:
+                stop.set()
+                raise
+            progress["rows"] += len(rows)
+            progress["table"] = table.name
+            if time.monotonic() - reported > IMPORT_PROGRESS_INTERVAL:
+                reported = time.monotonic()
+                progress["elapsed"] = round(reported - started)
+                progress["rows_per_second"] = round(progress["rows"] / (reported - started))
+                write_import_progress(gtfs_dir, file, progress)
+                _LOGGER.debug("Import progress on %s: %s", file, progress)
+        for reader in readers:
+            # raise any error of the readers, rolling back the import
+            reader.result()
+
+
+def _load_derived(conn, gtfs_classes, feed_id, changed=None):
+    """Create the rows pygtfs derives from the loaded tables.
+
+    With changed, only the rows depending on the changed classes are
+    (re)created, after removing the previous ones.
+    """
+    # same as pygtfs: a service only in calendar_dates gets a dummy calendar entry
+    if ServiceException in gtfs_classes and (changed is None or ServiceException in changed):
+        conn.execute(text("""
+            INSERT INTO calendar (feed_id, service_id, monday, tuesday, wednesday,
+                thursday, friday, saturday, sunday, start_date, end_date)
+            SELECT feed_id, service_id, 0, 0, 0, 0, 0, 0, 0, min(date), min(date)
+            FROM calendar_dates cd
+            WHERE feed_id = :feed_id
+            AND NOT EXISTS (select 1 from calendar c
+                where c.feed_id = cd.feed_id and c.service_id = cd.service_id)
+            GROUP BY feed_id, service_id
+            """), {"feed_id": feed_id})
+    if changed is None or {Stop, Translation} & set(changed):
+        if changed is not None:
+            conn.execute(_stop_translations.delete().where(_stop_translations.c.stop_feed_id == feed_id))
+        if Translation in gtfs_classes:
+            conn.execute(_stop_translations.insert().from_select(
+                ["stop_feed_id", "translation_feed_id", "stop_id", "trans_id", "lang"],
+                Stop.__table__.join(
+                    Translation.__table__, Stop.stop_name == Translation.trans_id
+                ).select().with_only_columns(
+                    Stop.feed_id, Translation.feed_id, Stop.stop_id, Translation.trans_id, Translation.lang
+                ).where(Stop.feed_id == feed_id, Translation.feed_id == feed_id),
+            ))
+    if changed is None or {Trip, ShapePoint} & set(changed):
+        if changed is not None:
+            conn.execute(_trip_shapes.delete().where(_trip_shapes.c.trip_feed_id == feed_id))
+        if ShapePoint in gtfs_classes:
+            conn.execute(_trip_shapes.insert().from_select(
+                ["trip_feed_id", "shape_feed_id", "trip_id", "shape_id", "shape_pt_sequence"],
+                Trip.__table__.join(
+                    ShapePoint.__table__, ShapePoint.shape_id == Trip.shape_id
+                ).select().with_only_columns(
+                    Trip.feed_id, ShapePoint.feed_id, Trip.trip_id, ShapePoint.shape_id, ShapePoint.shape_pt_sequence
+                ).where(Trip.feed_id == feed_id, ShapePoint.feed_id == feed_id),
+            ))
+
+
+def _finish_progress(gtfs_dir, file, progress, started):
+    elapsed = time.monotonic() - started
+    progress.update(
+        {
+            "status": "done",
+            "table": None,
+            "elapsed": round(elapsed),
+            "rows_per_second": round(progress["rows"] / elapsed) if elapsed else 0,
+        }
+    )
+    write_import_progress(gtfs_dir, file, progress)
+    return elapsed
+
+
+def import_feed(schedule, gtfs_dir, file, workers=IMPORT_WORKERS):
+    """Bulk load a GTFS zip into an empty pygtfs datasource.
+
+    Members are streamed with the csv module by a pool of readers, the single
+    writer inserts their batches with executemany in one transaction. Secondary
+    indexes are dropped during the load and (re)created at the end.
+    """
+    zip_path = os.path.join(gtfs_dir, file + ".zip")
+    members = get_zip_members(zip_path)
+    gtfs_classes = _get_gtfs_classes(members)
+
+    started = time.monotonic()
+    progress = {"status": "importing", "table": None, "rows": 0, "rows_per_second": 0, "elapsed": 0}
+    write_import_progress(gtfs_dir, file, progress)
+    indexes = [index for gtfs_class in gtfs_all for index in gtfs_class.__table__.indexes]
+
+    conn = schedule.engine.connect()
+    try:
+        for pragma in BULK_LOAD_PRAGMAS:
+            conn.exec_driver_sql(pragma)
+        for index in indexes:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+        feed_id = conn.execute(
+            Feed.__table__.insert().values(
+                feed_name=os.path.basename(zip_path), feed_append_date=datetime.date.today()
+            )
+        ).inserted_primary_key[0]
+
+        _load_members(conn, zip_path, gtfs_classes, feed_id, gtfs_dir, file, progress, started, workers)
+        _load_derived(conn, gtfs_classes, feed_id)
+        _save_imported_members(conn, members)
+
+        progress["status"] = "indexing"
+        write_import_progress(gtfs_dir, file, progress)
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+        for name, table, column in DATASOURCE_INDEXES:
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({column})")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        progress["status"] = "failed"
+        write_import_progress(gtfs_dir, file, progress)
+        raise
+    finally:
+        conn.close()
+
+    elapsed = _finish_progress(gtfs_dir, file, progress, started)
+    _LOGGER.info("Imported %s rows from %s in %ss", progress["rows"], file, round(elapsed))
+    return feed_id
+
+
+def copy_datasource(database, target):
+    """Copy a datasource with the sqlite backup api, consistent while it is in use."""
+    if os.path.exists(target):
+        os.remove(target)
+    source = sqlite3.connect(f"file:{database}?mode=ro", uri=True)
+    try:
+        destination = sqlite3.connect(target)
+        try:
+            source.backup(destination)
+        finally:
+            destination.close()
+    finally:
+        source.close()
+
+
+def update_feed(schedule, gtfs_dir, file, workers=IMPORT_WORKERS):
+    """Reload the tables whose zip member changed since the last import.
+
+    The schedule is a copy of the datasource, swapped in by the caller, so the
+    rows of the changed tables are replaced in one transaction. Returns the
+    names of the reloaded tables, None if the datasource has no members of a
+    previous import and needs a full import.
+    """
+    zip_path = os.path.join(gtfs_dir, file + ".zip")
+    members = get_zip_members(zip_path)
+    gtfs_classes = _get_gtfs_classes(members)
+
+    started = time.monotonic()
+    progress = {"status": "updating", "table": None, "rows": 0, "rows_per_second": 0, "elapsed": 0}
+    conn = schedule.engine.connect()
+    try:
+        previous = get_imported_members(conn)
+        feed_id = conn.execute(select(func.max(Feed.__table__.c.feed_id))).scalar()
+        if previous is None or feed_id is None:
+            return None
+        changed = get_changed_classes(previous, members)
+        if not changed:
+            _LOGGER.info("No changed tables in %s", file)
+            return []
+        _LOGGER.debug("Updating tables of %s: %s", file, [gtfs_class.__tablename__ for gtfs_class in changed])
+        write_import_progress(gtfs_dir, file, progress)
+
+        for pragma in BULK_LOAD_PRAGMAS:
+            conn.exec_driver_sql(pragma)
+        changed_tables = {gtfs_class.__tablename__ for gtfs_class in changed}
+        indexes = [index for gtfs_class in changed for index in gtfs_class.__table__.indexes]
+        datasource_indexes = [index for index in DATASOURCE_INDEXES if index[1] in changed_tables]
+        for index in indexes:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+        for name, _, _ in datasource_indexes:
+            conn.exec_driver_sql(f"DROP INDEX IF EXISTS {name}")
+        for gtfs_class in reversed(changed):
+            conn.execute(gtfs_class.__table__.delete().where(gtfs_class.__table__.c.feed_id == feed_id))
+        conn.execute(
+            Feed.__table__.update().where(Feed.__table__.c.feed_id == feed_id).values(
+                feed_name=os.path.basename(zip_path), feed_append_date=datetime.date.today()
+            )
+        )
+
+        loaded = [gtfs_class for gtfs_class in changed if gtfs_class in gtfs_classes]
+        _load_members(conn, zip_path, loaded, feed_id, gtfs_dir, file, progress, started, workers)
+        _load_derived(conn, gtfs_classes, feed_id, changed)
+        _save_imported_members(conn, members)
+
+        progress["status"] = "indexing"
+        write_import_progress(gtfs_dir, file, progress)
+        for index in indexes:
+            index.create(conn, checkfirst=True)
+        for name, table, column in datasource_indexes:
+            conn.exec_driver_sql(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({column})")
+        conn.commit()
+    except Exception:
+        conn.rollback()
+        progress["status"] = "failed"
+        write_import_progress(gtfs_dir, file, progress)
+        raise
+    finally:
+        conn.close()
+
+    elapsed = _finish_progress(gtfs_dir, file, progress, started)
+    _LOGGER.info(
+        "Updated %s rows of tables %s from %s in %ss",
+        progress["rows"], sorted(changed_tables), file, round(elapsed),
+    )
+    return sorted(changed_tables)
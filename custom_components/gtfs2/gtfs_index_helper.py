@@ -0,0 +1,523 @@
+"""Precomputed lookup tables for the GTFS Integration."""
+from __future__ import annotations
+
+import json
+import logging
+import math
+import os
+import threading
+
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.sql import text
+
+from .gtfs_query_helper import get_query_service
+
+_LOGGER = logging.getLogger(__name__)
+
+DEPARTURE_INDEX_TABLE = "gtfs2_departure_index"
+DEPARTURE_INDEX_PAIRS_TABLE = "gtfs2_departure_index_pairs"
+DEPARTURE_INDEX_FILE = "_departure_index.json"
+STOPS_SPATIAL_TABLE = "gtfs2_stops_rtree"
+
+EARTH_RADIUS = 6371008.8
+METERS_PER_DEGREE = 111111
+
+# departures looked up per service day, the timetable lists at most these
+DEPARTURE_LOOKUP_LIMIT = 100
+SECONDS_PER_DAY = 86400
+
+TRAIN_ROUTE_TYPES = "2,100,101,102,103,104,105,106,107,108,109,110,111,112,113,114,115,116,117"
+
+_INDEX_LOCK = threading.Lock()
+# datasources with the departure index tables created (and migrated)
+_DEPARTURE_INDEX_TABLES: set[str] = set()
+# datasources checked for the stops R*Tree
+_SPATIAL_INDEXED: dict[str, bool] = {}
+# timezones of the departures of a pair, by datasource and index key
+_PAIR_TIMEZONES: dict[tuple, list] = {}
+
+# Columns shared by the index and the departure lookup, everything except the
+# calendar related columns which depend on the day the lookup is done.
+DEPARTURE_INDEX_COLUMNS = [
+    "trip_id",
+    "route_id",
+    "trip_headsign",
+    "direction_id",
+    "route_long_name",
+    "route_short_name",
+    "origin_stop_id",
+    "origin_stop_name",
+    "origin_stop_timezone",
+    "agency_timezone",
+    "origin_arrival_time",
+    "origin_depart_time",
+    "origin_depart_date",
+    "origin_drop_off_type",
+    "origin_pickup_type",
+    "origin_dist_traveled",
+    "origin_stop_headsign",
+    "origin_stop_sequence",
+    "origin_stop_timepoint",
+    "dest_stop_name",
+    "dest_stop_timezone",
+    "dest_arrival_time",
+    "dest_depart_time",
+    "dest_drop_off_type",
+    "dest_pickup_type",
+    "dest_dist_traveled",
+    "dest_stop_headsign",
+    "dest_stop_sequence",
+    "dest_stop_timepoint",
+]
+
+
+def get_departure_index_key(route_type, origin, destination):
+    """Return the index key (route_type, origin, destination) for a sensor."""
+    if route_type == "2":
+        return "2", str(origin) + "%", str(destination) + "%"
+    return "*", origin.split(": ")[0], destination.split(": ")[0]
+
+
+def _index_file(gtfs_dir, file):
+    return os.path.join(gtfs_dir, file + DEPARTURE_INDEX_FILE)
+
+
+def load_departure_index_pairs(gtfs_dir, file):
+    """Load the stop pairs indexed for a datasource, kept next to the sqlite."""
+    index_file = _index_file(gtfs_dir, file)
+    if not os.path.exists(index_file):
+        return []
+    try:
+        with open(index_file) as f:
+            return [tuple(pair) for pair in json.load(f)]
+    except (OSError, ValueError) as ex:
+        _LOGGER.warning("Could not read departure index file: %s, error: %s", index_file, ex)
+        return []
+
+
+def save_departure_index_pairs(gtfs_dir, file, pairs):
+    """Save the stop pairs indexed for a datasource."""
+    index_file = _index_file(gtfs_dir, file)
+    with open(index_file + "_temp", "w") as f:
+        json.dump(sorted(set(pairs)), f)
+    os.replace(index_file + "_temp", index_file)
+
+
+def remove_departure_index_pairs(gtfs_dir, file):
+    """Remove the stop pairs file of a datasource."""
+    index_file = _index_file(gtfs_dir, file)
+    if os.path.exists(index_file):
+        os.remove(index_file)
+
+
+def create_departure_index_tables(conn):
+    """Create the departure index tables if not yet in the datasource."""
+    columns = ",\n        ".join(DEPARTURE_INDEX_COLUMNS)
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {DEPARTURE_INDEX_TABLE} (
+        route_type_key TEXT NOT NULL,
+        origin_key TEXT NOT NULL,
+        dest_key TEXT NOT NULL,
+        departure_secs INTEGER NOT NULL,
+        service_id TEXT,
+        {columns}
+        )
+        """))
+    # the lookup seeks on departure_secs within a pair, with the service_id in
+    # the index the calendar is checked before reading the departure rows
+    conn.execute(text(f"DROP INDEX IF EXISTS {DEPARTURE_INDEX_TABLE}_lookup"))
+    conn.execute(text(f"""
+        CREATE INDEX IF NOT EXISTS {DEPARTURE_INDEX_TABLE}_seek
+        ON {DEPARTURE_INDEX_TABLE}(origin_key, dest_key, route_type_key, departure_secs, service_id)
+        """))
+    conn.execute(text(f"""
+        CREATE TABLE IF NOT EXISTS {DEPARTURE_INDEX_PAIRS_TABLE} (
+        route_type_key TEXT NOT NULL,
+        origin_key TEXT NOT NULL,
+        dest_key TEXT NOT NULL,
+        departures INTEGER,
+        PRIMARY KEY (route_type_key, origin_key, dest_key)
+        )
+        """))
+
+
+def build_departure_index(conn, key):
+    """(Re)build the departures of one origin/destination pair.
+
+    One row per trip serving origin before destination, with the stop_times,
+    stops, routes and agency columns denormalized so the lookup only needs the
+    (small) calendar tables at query time.
+    """
+    route_type_key, origin_key, dest_key = key
+    if route_type_key == "2":
+        route_type_where = f"route.route_type in ({TRAIN_ROUTE_TYPES})"
+        start_station_where = "AND start_station.stop_id in (select stop_id from stops where stop_name like :origin_key)"
+        end_station_where = "AND end_station.stop_id in (select stop_id from stops where stop_name like :dest_key)"
+    else:
+        route_type_where = "1=1"
+        start_station_where = "AND start_station.stop_id = :origin_key"
+        end_station_where = "AND end_station.stop_id = :dest_key"
+    params = {"route_type_key": route_type_key, "origin_key": origin_key, "dest_key": dest_key}
+    conn.execute(text(f"""
+        DELETE FROM {DEPARTURE_INDEX_TABLE}
+        WHERE origin_key = :origin_key AND dest_key = :dest_key AND route_type_key = :route_type_key
+        """), params)
+    result = conn.execute(text(f"""
+        INSERT INTO {DEPARTURE_INDEX_TABLE}
+        SELECT :route_type_key, :origin_key, :dest_key,
+               cast(strftime('%s', origin_stop_time.departure_time) as integer),
+               trip.service_id,
+               trip.trip_id, trip.route_id, trip.trip_headsign, trip.direction_id,
+               route.route_long_name, route.route_short_name,
+               start_station.stop_id, start_station.stop_name, start_station.stop_timezone,
+               agency.agency_timezone,
+               time(origin_stop_time.arrival_time),
+               time(origin_stop_time.departure_time),
+               date(origin_stop_time.departure_time),
+               origin_stop_time.drop_off_type, origin_stop_time.pickup_type,
+               origin_stop_time.shape_dist_traveled, origin_stop_time.stop_headsign,
+               origin_stop_time.stop_sequence, origin_stop_time.timepoint,
+               end_station.stop_name, end_station.stop_timezone,
+               time(destination_stop_time.arrival_time),
+               time(destination_stop_time.departure_time),
+               destination_stop_time.drop_off_type, destination_stop_time.pickup_type,
+               destination_stop_time.shape_dist_traveled, destination_stop_time.stop_headsign,
+               destination_stop_time.stop_sequence, destination_stop_time.timepoint
+        FROM trips trip
+        INNER JOIN stop_times origin_stop_time
+                   ON trip.trip_id = origin_stop_time.trip_id
+        INNER JOIN stops start_station
+                   ON origin_stop_time.stop_id = start_station.stop_id
+        INNER JOIN stop_times destination_stop_time
+                   ON trip.trip_id = destination_stop_time.trip_id
+        INNER JOIN stops end_station
+                   ON destination_stop_time.stop_id = end_station.stop_id
+        INNER JOIN routes route
+                   ON route.route_id = trip.route_id
+        INNER JOIN agency agency
+                   ON route.agency_id = agency.agency_id
+        WHERE {route_type_where}
+        {start_station_where}
+        {end_station_where}
+        AND origin_stop_time.stop_sequence < destination_stop_time.stop_sequence
+        """), params)  # noqa: S608
+    conn.execute(text(f"""
+        INSERT OR REPLACE INTO {DEPARTURE_INDEX_PAIRS_TABLE}
+        VALUES (:route_type_key, :origin_key, :dest_key, :departures)
+        """), {**params, "departures": result.rowcount})
+    _PAIR_TIMEZONES.clear()
+    _LOGGER.debug("Departure index built for %s: %s departures", key, result.rowcount)
+    return result.rowcount
+
+
+def _is_departure_index_built(query_service, key):
+    """Return True when the departures of a pair are in the index of the datasource."""
+    try:
+        rows = query_service.execute(
+            "departure_index",
+            f"""
+            SELECT departures FROM {DEPARTURE_INDEX_PAIRS_TABLE}
+            WHERE route_type_key = :route_type_key AND origin_key = :origin_key AND dest_key = :dest_key
+            """,  # noqa: S608
+            {"route_type_key": key[0], "origin_key": key[1], "dest_key": key[2]},
+        )
+    except OperationalError:
+        # no index tables yet
+        return False
+    return len(rows) > 0
+
+
+def ensure_departure_index(schedule, gtfs_dir, file, key):
+    """Make sure the departures of a pair are indexed, building them if needed.
+
+    The check is a read on the query service, the index tables are only
+    written (through the schedule engine) when the pair is missing.
+    """
+    query_service = get_query_service(schedule)
+    if query_service.database in _DEPARTURE_INDEX_TABLES and _is_departure_index_built(query_service, key):
+        return
+    with _INDEX_LOCK:
+        conn = schedule.engine.connect()
+        try:
+            create_departure_index_tables(conn)
+            conn.commit()
+        finally:
+            conn.close()
+        _DEPARTURE_INDEX_TABLES.add(query_service.database)
+        indexed = _is_departure_index_built(query_service, key)
+        if not indexed:
+            _LOGGER.info("Building departure index for: %s", key)
+            conn = schedule.engine.connect()
+            try:
+                build_departure_index(conn, key)
+                conn.commit()
+            finally:
+                conn.close()
+        if not indexed:
+            pairs = load_departure_index_pairs(gtfs_dir, file)
+            if key not in pairs:
+                save_departure_index_pairs(gtfs_dir, file, pairs + [key])
+
+
+def rebuild_departure_index(schedule, gtfs_dir, file):
+    """Rebuild the departure index for all pairs known for a datasource, used after (re)import."""
+    pairs = load_departure_index_pairs(gtfs_dir, file)
+    if not pairs:
+        return
+    _LOGGER.info("Rebuilding departure index for %s pairs on: %s", len(pairs), file)
+    with _INDEX_LOCK:
+        conn = schedule.engine.connect()
+        try:
+            create_departure_index_tables(conn)
+            for key in pairs:
+                build_departure_index(conn, key)
+            conn.commit()
+        finally:
+            conn.close()
+
+
+def get_departure_timezones(query_service, key):
+    """Return the (agency, origin stop) timezones of the departures of a pair."""
+    cache_key = (query_service.database, key)
+    timezones = _PAIR_TIMEZONES.get(cache_key)
+    if timezones is None:
+        timezones = _PAIR_TIMEZONES[cache_key] = [
+            (row.agency_timezone, row.origin_stop_timezone)
+            for row in query_service.execute(
+                "departure_timezones",
+                f"""
+                SELECT DISTINCT agency_timezone, origin_stop_timezone FROM {DEPARTURE_INDEX_TABLE}
+                WHERE origin_key = :origin_key AND dest_key = :dest_key AND route_type_key = :route_type_key
+                """,  # noqa: S608
+                {"route_type_key": key[0], "origin_key": key[1], "dest_key": key[2]},
+            )
+        ]
+    return timezones
+
+
+def _departure_day_query(day, active_where, seek_param, columns, calendar_select, calendar_dates_select):
+    """Return the departures of one service day, as a range seek from a departure_secs bound.
+
+    The first and last departure of the day are added, the timetable needs them
+    to flag the first and last departures now that earlier and later ones are
+    not looked up. The departures within :clock_gap seconds of the bound do not
+    count for the limit, they may still be before now on a later clock.
+    """
+    key_where = "d.origin_key = :origin_key AND d.dest_key = :dest_key AND d.route_type_key = :route_type_key"
+    bounds = f"""
+               (SELECT d.departure_secs FROM {DEPARTURE_INDEX_TABLE} d
+                WHERE {key_where} AND ({active_where["any"]})
+                ORDER BY d.departure_secs LIMIT 1) AS first_secs,
+               (SELECT d.departure_secs FROM {DEPARTURE_INDEX_TABLE} d
+                WHERE {key_where} AND ({active_where["any"]})
+                ORDER BY d.departure_secs DESC LIMIT 1) AS last_secs"""
+    arms = [
+        f"""
+        SELECT {columns}, d.departure_secs, '{day}' AS day,
+               {calendar_select},
+               {bounds}
+        FROM {DEPARTURE_INDEX_TABLE} d
+        INNER JOIN calendar calendar
+                   ON d.service_id = calendar.service_id
+        WHERE {key_where}
+        AND d.departure_secs >= :{seek_param}
+        AND {active_where["calendar"]}
+        """
+    ]
+    if calendar_dates_select:
+        arms.append(f"""
+        SELECT {columns}, d.departure_secs, '{day}' AS day,
+               {calendar_dates_select},
+               {bounds}
+        FROM {DEPARTURE_INDEX_TABLE} d
+        INNER JOIN calendar_dates calendar_date_today
+                   ON d.service_id = calendar_date_today.service_id
+        WHERE {key_where}
+        AND d.departure_secs >= :{seek_param}
+        AND {active_where["calendar_dates"]}
+        """)
+    return f"""
+        SELECT * FROM ({" UNION ALL ".join(arms)}
+        ORDER BY departure_secs
+        LIMIT :limit + (SELECT count(*) FROM {DEPARTURE_INDEX_TABLE} d
+                        WHERE {key_where} AND d.departure_secs >= :{seek_param}
+                        AND d.departure_secs < :{seek_param} + :clock_gap))
+        """
+
+
+def get_departure_index_query(yesterday_name, today_name, tomorrow_name=None):
+    """Return the departure lookup on the index, same columns as the former full join.
+
+    The departures of yesterday (after midnight), today and tomorrow are each a
+    range seek on departure_secs of the pair, from the :yesterday_secs,
+    :today_secs and :tomorrow_secs bounds, at most :limit departures per day
+    after the :clock_gap.
+    The day column tells which service day a departure was looked up for.
+    """
+    columns = ", ".join(f"d.{column}" for column in DEPARTURE_INDEX_COLUMNS)
+    tomorrow_select = tomorrow_select2 = ""
+    calendar_dates_today = "calendar_date_today.date = date('now')"
+    if tomorrow_name:
+        tomorrow_select = f"calendar.{tomorrow_name} AS tomorrow,"
+        tomorrow_select2 = "CASE WHEN date('now') < calendar_date_today.date THEN 1 else 0 END as tomorrow,"
+        calendar_dates_today = "(calendar_date_today.date = date('now') or calendar_date_today.date = date('now','+1 day') )"
+    calendar_select = f"""calendar.{yesterday_name} AS yesterday,
+               calendar.{today_name} AS today,
+               {tomorrow_select}
+               calendar.start_date AS start_date,
+               calendar.end_date AS end_date,
+               "" as calendar_date,
+               0 as today_cd"""
+    calendar_dates_select = f"""'0' AS yesterday,
+               '0' AS today,
+               {tomorrow_select2}
+               date('now') AS start_date,
+               date('now') AS end_date,
+               calendar_date_today.date as calendar_date,
+               calendar_date_today.exception_type as today_cd"""
+    calendar_in_range = """calendar.start_date <= date('now')
+        AND calendar.end_date >= date('now')
+        AND d.service_id not in (select service_id from calendar_dates where date = date('now') and exception_type = 2)"""
+
+    def active(calendar_where, calendar_dates_where=None):
+        """Service conditions of a day, on the joined tables and on the service_id alone."""
+        calendar_ids = f"""d.service_id in (select service_id from calendar calendar where {calendar_where}
+            AND calendar.start_date <= date('now') AND calendar.end_date >= date('now'))
+            AND d.service_id not in (select service_id from calendar_dates where date = date('now') and exception_type = 2)"""
+        where = {
+            "calendar": f"{calendar_where}\n        AND {calendar_in_range}",
+            "calendar_dates": calendar_dates_where,
+            "any": f"({calendar_ids})",
+        }
+        if calendar_dates_where:
+            where["any"] += f"""
+            OR d.service_id in (select service_id from calendar_dates calendar_date_today
+                                where {calendar_dates_where})"""
+        return where
+
+    parts = [
+        _departure_day_query(
+            "yesterday",
+            active(f"calendar.{yesterday_name} = 1 AND calendar.start_date <= :yesterday_date"),
+            "yesterday_secs",
+            columns,
+            calendar_select,
+            None,
+        ),
+        _departure_day_query(
+            "today",
+            active(
+                f"calendar.{today_name} = 1",
+                f"calendar_date_today.exception_type = 1 AND {calendar_dates_today}",
+            ),
+            "today_secs",
+            columns,
+            calendar_select,
+            calendar_dates_select,
+        ),
+    ]
+    if tomorrow_name:
+        parts.append(
+            _departure_day_query(
+                "tomorrow",
+                active(
+                    f"calendar.{tomorrow_name} = 1 AND calendar.end_date >= :tomorrow_date",
+                    f"""calendar_date_today.exception_type = 1 AND {calendar_dates_today}
+                    AND date('now') < calendar_date_today.date
+                    AND (:tomorrow_date <= date('now') OR :tomorrow_date = calendar_date_today.date)""",
+                ),
+                "tomorrow_secs",
+                columns,
+                calendar_select,
+                calendar_dates_select,
+            )
+        )
+    return f"""
+        SELECT * FROM ({" UNION ALL ".join(f"SELECT * FROM ({part})" for part in parts)})
+        ORDER BY calendar_date, origin_depart_date, today_cd, origin_depart_time,
+                 CASE day WHEN 'yesterday' THEN 0 WHEN 'today' THEN 1 ELSE 2 END
+        """  # noqa: S608
+
+
+
+def _has_table(query_service, name):
+    return query_service.execute(
+        "has_table", "SELECT count(*) FROM sqlite_master WHERE name = :name", {"name": name}
+    )[0][0] > 0
+
+
+def build_stops_spatial_index(schedule):
+    """(Re)build the R*Tree over the stops, done at import time."""
+    with _INDEX_LOCK:
+        conn = schedule.engine.connect()
+        try:
+            conn.execute(text(f"DROP TABLE IF EXISTS {STOPS_SPATIAL_TABLE}"))
+            try:
+                conn.execute(text(f"""
+                    CREATE VIRTUAL TABLE {STOPS_SPATIAL_TABLE}
+                    USING rtree(id, min_lat, max_lat, min_lon, max_lon, +stop_id, +stop_lat, +stop_lon)
+                    """))
+            except OperationalError as ex:
+                _LOGGER.warning("SQLite without R*Tree support, local stops use a scan on stops: %s", ex)
+                return False
+            result = conn.execute(text(f"""
+                INSERT INTO {STOPS_SPATIAL_TABLE}
+                SELECT NULL, stop_lat, stop_lat, stop_lon, stop_lon, stop_id, stop_lat, stop_lon
+                FROM stops
+                WHERE stop_lat IS NOT NULL AND stop_lon IS NOT NULL
+                """))
+            conn.commit()
+            _LOGGER.debug("Stops spatial index built with %s stops", result.rowcount)
+        finally:
+            conn.close()
+    return True
+
+
+def haversine_distance(lat1, lon1, lat2, lon2):
+    """Return the distance in meters between two coordinates."""
+    lat1, lon1, lat2, lon2 = map(math.radians, (lat1, lon1, lat2, lon2))
+    a = (
+        math.sin((lat2 - lat1) / 2) ** 2
+        + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * math.asin(math.sqrt(a))
+
+
+def get_local_stop_ids(schedule, latitude, longitude, radius):
+    """Return the ids of the stops within radius (meters) of a location.
+
+    The bounding box is looked up in the stops R*Tree (or a scan of stops on
+    datasources without it), then filtered on the true haversine distance.
+    """
+    lat_delta = radius / METERS_PER_DEGREE
+    lon_delta = radius / (METERS_PER_DEGREE * max(math.cos(math.radians(latitude)), 0.01))
+    params = {
+        "min_lat": latitude - lat_delta,
+        "max_lat": latitude + lat_delta,
+        "min_lon": longitude - lon_delta,
+        "max_lon": longitude + lon_delta,
+    }
+    query_service = get_query_service(schedule)
+    database = query_service.database
+    if database not in _SPATIAL_INDEXED:
+        if not _has_table(query_service, STOPS_SPATIAL_TABLE):
+            build_stops_spatial_index(schedule)
+        _SPATIAL_INDEXED[database] = _has_table(query_service, STOPS_SPATIAL_TABLE)
+    if _SPATIAL_INDEXED[database]:
+        sql_query = f"""
+            SELECT stop_id, stop_lat, stop_lon FROM {STOPS_SPATIAL_TABLE}
+            WHERE max_lat >= :min_lat AND min_lat <= :max_lat
+            AND max_lon >= :min_lon AND min_lon <= :max_lon
+            """
+    else:
+        sql_query = """
+            SELECT stop_id, stop_lat, stop_lon FROM stops
+            WHERE stop_lat between :min_lat and :max_lat
+            AND stop_lon between :min_lon and :max_lon
+            """
+    result = query_service.execute("local_stops", sql_query, params)  # noqa: S608
+    return [
+        row.stop_id
+        for row in result
+        if haversine_distance(latitude, longitude, row.stop_lat, row.stop_lon) <= radius
+    ]
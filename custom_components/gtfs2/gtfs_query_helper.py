@@ -0,0 +1,132 @@
+"""Schedule queries for the GTFS Integration."""
+from __future__ import annotations
+
+import logging
+import os
+import threading
+import time
+
+from sqlalchemy import create_engine
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.sql import bindparam, text
+
+_LOGGER = logging.getLogger(__name__)
+
+QUERY_POOL_SIZE = 2
+QUERY_POOL_OVERFLOW = 2
+QUERY_CACHED_STATEMENTS = 256
+
+_SERVICES: dict[str, GTFSQueryService] = {}
+_SERVICES_LOCK = threading.Lock()
+
+
+class GTFSQueryService:
+    """Read-only connections, statements and timings for one datasource.
+
+    The connections are pooled so sqlite keeps its prepared statements across
+    sensor refreshes, statements are cached by their text (the query shape)
+    with the values always passed as parameters.
+    """
+
+    def __init__(self, database: str) -> None:
+        """Initialize the service on the sqlite file of the datasource."""
+        self.database = database
+        self._file_id = _file_id(database)
+        self._engine = create_engine(
+            f"sqlite:///file:{database}?mode=ro&uri=true",
+            poolclass=QueuePool,
+            pool_size=QUERY_POOL_SIZE,
+            max_overflow=QUERY_POOL_OVERFLOW,
+            connect_args={
+                "check_same_thread": False,
+                "cached_statements": QUERY_CACHED_STATEMENTS,
+            },
+        )
+        self._statements = {}
+        self._lock = threading.Lock()
+        self.stats: dict[str, dict] = {}
+
+    def is_current(self) -> bool:
+        """Return False when the sqlite file was replaced, e.g. by an update."""
+        return self._file_id == _file_id(self.database)
+
+    def statement(self, sql, expanding=()):
+        """Return the compiled statement for a query shape."""
+        key = (sql, tuple(expanding))
+        stmt = self._statements.get(key)
+        if stmt is None:
+            stmt = text(sql)
+            if expanding:
+                stmt = stmt.bindparams(*(bindparam(name, expanding=True) for name in expanding))
+            with self._lock:
+                self._statements[key] = stmt
+        return stmt
+
+    def execute(self, query_type, sql, params=None, expanding=()):
+        """Run a read query and return all rows, timed under query_type."""
+        stmt = self.statement(sql, expanding)
+        started = time.perf_counter()
+        with self._engine.connect() as conn:
+            rows = conn.execute(stmt, params or {}).fetchall()
+        self.record(query_type, time.perf_counter() - started, len(rows))
+        return rows
+
+    def record(self, query_type, duration, rows=0):
+        """Add one run of a query type to the timing counters."""
+        with self._lock:
+            stats = self.stats.setdefault(
+                query_type, {"count": 0, "rows": 0, "total": 0.0, "max": 0.0, "last": 0.0}
+            )
+            stats["count"] += 1
+            stats["rows"] += rows
+            stats["total"] += duration
+            stats["last"] = duration
+            stats["max"] = max(stats["max"], duration)
+        _LOGGER.debug("Query %s on %s: %.3fs, %s rows", query_type, self.database, duration, rows)
+
+    def get_stats(self):
+        """Return the timing counters per query type, in milliseconds."""
+        with self._lock:
+            return {
+                query_type: {
+                    "count": stats["count"],
+                    "rows": stats["rows"],
+                    "avg_ms": round(stats["total"] / stats["count"] * 1000, 1),
+                    "max_ms": round(stats["max"] * 1000, 1),
+                    "last_ms": round(stats["last"] * 1000, 1),
+                }
+                for query_type, stats in self.stats.items()
+            }
+
+    def close(self):
+        """Close all pooled connections."""
+        self._engine.dispose()
+
+
+def _file_id(database):
+    try:
+        stat = os.stat(database)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+
+def get_query_service(schedule) -> GTFSQueryService:
+    """Return the query service of the datasource of a pygtfs schedule."""
+    database = os.path.abspath(schedule.engine.url.database)
+    with _SERVICES_LOCK:
+        service = _SERVICES.get(database)
+        if service is None or not service.is_current():
+            if service is not None:
+                _LOGGER.debug("Datasource file replaced, reopening: %s", database)
+                service.close()
+            service = _SERVICES[database] = GTFSQueryService(database)
+    return service
+
+
+def close_query_service(database):
+    """Close the query service of a datasource, before it is removed or replaced."""
+    with _SERVICES_LOCK:
+        service = _SERVICES.pop(os.path.abspath(database), None)
+    if service is not None:
+        service.close()
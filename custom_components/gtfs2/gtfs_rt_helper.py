@@ -1,16 +1,21 @@
+import asyncio
 import logging
 from datetime import datetime, timedelta
 import json
 import os
+import threading
+import time
 
 import homeassistant.helpers.config_validation as cv
 import homeassistant.util.dt as dt_util
+import aiohttp
 import requests
 import voluptuous as vol
 from google.transit import gtfs_realtime_pb2
 from homeassistant.components.sensor import PLATFORM_SCHEMA
 from homeassistant.const import ATTR_LATITUDE, ATTR_LONGITUDE, CONF_NAME
 from homeassistant.helpers import entity_registry as er
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity import Entity
 from homeassistant.util import Throttle
 import binascii
@@ -54,7 +59,11 @@ from .const import (
     DEFAULT_DIRECTION,
     DEFAULT_PATH,
     DEFAULT_PATH_GEOJSON,
+    DEFAULT_RT_FEED_EXPIRY,
+    DEFAULT_RT_FEED_MAX_AGE,
+    DEFAULT_RT_FEED_TIMEOUT,
 
+    RT_FEED_HUB,
     TIME_STR_FORMAT
 )
 
@@ -98,6 +107,209 @@ def get_gtfs_feed_entities(url: str, headers, label: str):
     
     return feed.get('entity')
 
+def decode_gtfs_feed_entities(content: bytes, label: str):
+    """Decode a GTFS RT response body the same way as get_gtfs_feed_entities."""
+    try:
+        feed = json.loads(content)
+    except ValueError:
+        _LOGGER.debug("GTFS RT data is not providing format json")
+        if label == "vehicle_positions":
+            feed = convert_gtfs_realtime_positions_to_json(content)
+        elif label == "trip_data":
+            feed = convert_gtfs_realtime_to_json(content)
+        else: # not yet converted to json
+            feed = gtfs_realtime_pb2.FeedMessage()  # type: ignore
+            feed.ParseFromString(content)
+            return feed.entity
+    return feed.get('entity')
+
+
+class GTFSRealtimeFeed:
+    """A decoded GTFS RT feed with its entities indexed per route, trip and stop."""
+
+    def __init__(self, entities, label, etag=None, last_modified=None) -> None:
+        self.entities = entities or []
+        self.label = label
+        self.etag = etag
+        self.last_modified = last_modified
+        self.fetched_at = time.monotonic()
+        self.used_at = self.fetched_at
+        self._by_route: dict[str, list[int]] | None = {}
+        self._by_trip: dict[str, list[int]] | None = {}
+        self._by_stop: dict[str, list[int]] | None = {}
+        try:
+            self._build_indexes()
+        except (AttributeError, KeyError, TypeError) as ex:
+            _LOGGER.debug("GTFS RT %s not indexed, unexpected entity format: %s", label, ex)
+            self._by_route = self._by_trip = self._by_stop = None
+
+    def _add(self, index, key, position):
+        positions = index.setdefault(str(key), [])
+        if not positions or positions[-1] != position:
+            positions.append(position)
+
+    def _build_indexes(self):
+        for position, entity in enumerate(self.entities):
+            if self.label == "alerts":
+                # same informed entity logic as get_rt_alerts: the last one counts
+                stop_id = None
+                for x in entity.alert.informed_entity:
+                    stop_id = x.stop_id if x.HasField("stop_id") else "unknown"
+                if entity.HasField("alert") and stop_id is not None:
+                    self._add(self._by_stop, stop_id, position)
+            elif entity.get("trip_update", False):
+                trip = entity["trip_update"]["trip"]
+                self._add(self._by_route, trip["route_id"], position)
+                self._add(self._by_trip, trip["trip_id"], position)
+                for stop in entity["trip_update"]["stop_time_update"]:
+                    self._add(self._by_stop, stop["stop_id"], position)
+            elif entity.get("vehicle", False):
+                trip = entity["vehicle"]["trip"]
+                self._add(self._by_route, trip["route_id"], position)
+                self._add(self._by_trip, trip["trip_id"], position)
+
+    def first_route_position(self, predicate):
+        """Return the position of the first entity with a route_id matching predicate."""
+        if self._by_route is None:
+            return None
+        positions = [positions[0] for route_id, positions in self._by_route.items() if predicate(route_id)]
+        return min(positions) if positions else None
+
+    def _select(self, index, keys):
+        if index is None:
+            return list(enumerate(self.entities))
+        positions = sorted({position for key in keys for position in index.get(str(key), [])})
+        return [(position, self.entities[position]) for position in positions]
+
+    def for_stops(self, *stop_ids):
+        """Return (position, entity) of the entities serving one of the stops, in feed order."""
+        return self._select(self._by_stop, stop_ids)
+
+    def for_routes_or_trips(self, route_ids=(), trip_ids=()):
+        """Return (position, entity) of the entities on one of the routes or trips, in feed order."""
+        if self._by_route is None:
+            return self._select(None, ())
+        positions = {position for position, _ in self._select(self._by_route, route_ids)}
+        positions.update(position for position, _ in self._select(self._by_trip, trip_ids))
+        return [(position, self.entities[position]) for position in sorted(positions)]
+
+
+class GTFSRealtimeFeedHub:
+    """Fetch and decode each GTFS RT feed once per interval for all sensors.
+
+    Feeds are keyed by url, headers and label, fetched with aiohttp using
+    ETag / If-Modified-Since and decoded once in the executor. Feeds no sensor
+    asked for within the expiry are dropped.
+    """
+
+    def __init__(self, hass, max_age=DEFAULT_RT_FEED_MAX_AGE, expiry=DEFAULT_RT_FEED_EXPIRY) -> None:
+        """Initialize the hub."""
+        self.hass = hass
+        self.max_age = max_age
+        self.expiry = expiry
+        self._feeds: dict[tuple, GTFSRealtimeFeed] = {}
+        self._locks: dict[tuple, asyncio.Lock] = {}
+        self._file_lock = threading.Lock()
+
+    @staticmethod
+    def _key(url, headers, label):
+        return (url, tuple(sorted((headers or {}).items())), label)
+
+    def _fresh(self, key):
+        feed = self._feeds.get(key)
+        if feed is not None and time.monotonic() - feed.fetched_at < self.max_age:
+            feed.used_at = time.monotonic()
+            return feed
+        return None
+
+    def _prune(self):
+        """Drop the feeds not used within the expiry, and the locks of unknown feeds."""
+        now = time.monotonic()
+        for key, feed in list(self._feeds.items()):
+            if now - feed.used_at > self.expiry:
+                _LOGGER.debug("GTFS RT %s not used anymore, dropped: %s", feed.label, key[0])
+                self._feeds.pop(key, None)
+        for key, lock in list(self._locks.items()):
+            if key not in self._feeds and not lock.locked():
+                del self._locks[key]
+
+    async def async_get_feed(self, url, headers, label):
+        """Return the decoded feed, fetching it if older than the interval."""
+        if url.startswith('file'):
+            return await self.hass.async_add_executor_job(self._get_file_feed, url, label)
+        key = self._key(url, headers, label)
+        if (feed := self._fresh(key)) is not None:
+            return feed
+        self._prune()
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            if (feed := self._fresh(key)) is not None:
+                return feed
+            cached = self._feeds.get(key)
+            request_headers = dict(headers or {})
+            if cached is not None and cached.etag:
+                request_headers["If-None-Match"] = cached.etag
+            if cached is not None and cached.last_modified:
+                request_headers["If-Modified-Since"] = cached.last_modified
+            session = async_get_clientsession(self.hass)
+            try:
+                async with session.get(url, headers=request_headers, timeout=DEFAULT_RT_FEED_TIMEOUT) as response:
+                    if response.status == 304 and cached is not None:
+                        _LOGGER.debug("GTFS RT %s not modified: %s", label, url)
+                        cached.fetched_at = cached.used_at = time.monotonic()
+                        return cached
+                    content = await response.read()
+                    if response.status != 200 or b"Bad Gateway" in content or b"Not Found" in content:
+                        _LOGGER.error("Trying to update %s, and got RT response(code): %s with text: %s", label, response.status, content[:500])
+                        return None
+                    etag = response.headers.get("ETag")
+                    last_modified = response.headers.get("Last-Modified")
+            except (asyncio.TimeoutError, aiohttp.ClientError) as ex:
+                _LOGGER.error("Trying to update %s, error: %s", label, ex)
+                return None
+            entities = await self.hass.async_add_executor_job(decode_gtfs_feed_entities, content, label)
+            feed = self._feeds[key] = GTFSRealtimeFeed(entities, label, etag, last_modified)
+            _LOGGER.debug("Successfully updated %s, %s entities", label, len(feed.entities))
+            return feed
+
+    def _get_file_feed(self, url, label):
+        """Return the feed of a local file, decoded again only when the file changed."""
+        file_path = url[7:]
+        key = self._key(url, None, label)
+        with self._file_lock:
+            try:
+                stat = os.stat(file_path)
+            except OSError as ex:
+                _LOGGER.error("Trying to update %s, error: %s", label, ex)
+                return None
+            file_id = f"{stat.st_mtime_ns}-{stat.st_size}"
+            cached = self._feeds.get(key)
+            if cached is not None and cached.etag == file_id:
+                cached.used_at = time.monotonic()
+                return cached
+            with open(file_path, "rb") as file:
+                content = file.read()
+            feed = self._feeds[key] = GTFSRealtimeFeed(decode_gtfs_feed_entities(content, label), label, file_id)
+            return feed
+
+    def get_feed(self, url, headers, label):
+        """Return the decoded feed, for use from executor jobs."""
+        if url.startswith('file'):
+            return self._get_file_feed(url, label)
+        if (feed := self._fresh(self._key(url, headers, label))) is not None:
+            return feed
+        return asyncio.run_coroutine_threadsafe(
+            self.async_get_feed(url, headers, label), self.hass.loop
+        ).result()
+
+
+def get_rt_feed_hub(hass) -> GTFSRealtimeFeedHub:
+    """Return the GTFS RT feed hub shared by all sensors."""
+    if RT_FEED_HUB not in hass.data:
+        hass.data[RT_FEED_HUB] = GTFSRealtimeFeedHub(hass)
+    return hass.data[RT_FEED_HUB]
+
+
 def get_next_services(self):
     self._stop = self._stop_id
     self._destination = self._destination_id
@@ -167,6 +379,16 @@ def get_next_services(self):
     _LOGGER.debug("Next services attributes: %s", attrs)
     return attrs
     
+def _split_route_id(self, route_id):
+    """Return the route id of the RT feed, up to the route delimiter if specified."""
+    if self._route_delimiter is not None:
+        route_id_split = route_id.split(self._route_delimiter)
+        if route_id_split[0] == self._route_delimiter:
+            return route_id
+        return route_id_split[0]
+    return route_id
+
+
 def get_rt_route_trip_statuses(self):
     ''' Get next rt departure for route (multiple) or trip (single) '''
     # explanatory logic
@@ -180,31 +402,26 @@ def get_rt_route_trip_statuses(self):
     if self._vehicle_position_url:   
         vehicle_positions = get_rt_vehicle_positions(self)
 
-    feed_entities = get_gtfs_feed_entities(
-        url=self._trip_update_url, headers=self._headers, label="trip_data"
-    )
+    feed = get_rt_feed_hub(self.hass).get_feed(self._trip_update_url, self._headers, "trip_data")
+    feed_entities = feed.entities if feed is not None else None
     self._feed_entities = feed_entities
     
     if not feed_entities:
         _LOGGER.debug("No proper RT feed entities: %s", feed_entities)
         return {}
 
+    # a trip update without route switches to trip based matching for the entities after it
+    without_route = feed.first_route_position(lambda route_id: not _split_route_id(self, route_id))
+
     _LOGGER.debug("Search departure times for route: %s, trip: %s, type: %s, direction: %s", self._route_id, self._trip_id, self._rt_group, self._direction)
-    for entity in feed_entities:
+    # only the trip updates of the stop (or without stop_id, matched on sequence) can match
+    for position, entity in feed.for_stops(self._stop_id, ""):
+        if without_route is not None and position > without_route:
+            self._rt_group = "trip"
 
         if entity.get('trip_update', False):
             
-            # If delimiter specified split the route ID in the gtfs rt feed
-            if self._route_delimiter is not None:
-                route_id_split = entity["trip_update"]["trip"]["route_id"].split(
-                    self._route_delimiter
-                )
-                if route_id_split[0] == self._route_delimiter:
-                    route_id = entity["trip_update"]["trip"]["route_id"]
-                else:
-                    route_id = route_id_split[0]
-            else:
-                route_id = entity["trip_update"]["trip"]["route_id"]
+            route_id = _split_route_id(self, entity["trip_update"]["trip"]["route_id"])
 
             if "direction_id" in entity["trip_update"]["trip"]:
                     direction_id = entity["trip_update"]["trip"]["direction_id"]
@@ -282,7 +499,10 @@ def get_rt_route_trip_statuses(self):
                             
                         departure_times[self._route_id][direction_id][stop_id]["delays"].append(delay)
 
-                        
+
+    if without_route is not None:
+        self._rt_group = "trip"
+
     # Sort by time
     for route in departure_times:
         for direction in departure_times[self._route_id]:
@@ -295,14 +515,12 @@ def get_rt_route_trip_statuses(self):
     return departure_times    
 
 def get_rt_vehicle_positions(self):
-    feed_entities = get_gtfs_feed_entities(
-        url=self._vehicle_position_url,
-        headers=self._headers,
-        label="vehicle_positions",
-    )
+    feed = get_rt_feed_hub(self.hass).get_feed(self._vehicle_position_url, self._headers, "vehicle_positions")
     geojson_body = []
     geojson_element = {"geometry": {"coordinates":[],"type": "Point"}, "properties": {"id": "", "title": "", "trip_id": "", "route_id": "", "direction_id": "", "vehicle_id": "", "vehicle_label": ""}, "type": "Feature"}
-    for entity in feed_entities:
+    # only the vehicles on the route or trip are added
+    candidates = feed.for_routes_or_trips([self._route_id], [self._trip_id]) if feed is not None else []
+    for _, entity in candidates:
         vehicle = entity["vehicle"]
         
         if not vehicle["trip"]["trip_id"]:
@@ -339,12 +557,10 @@ def get_rt_vehicle_positions(self):
 def get_rt_alerts(self):
     rt_alerts = {}
     if (self._alerts_url)[:4] == "http":
-        feed_entities = get_gtfs_feed_entities(
-            url=self._alerts_url,
-            headers=self._headers,
-            label="alerts",
-        )
-        for entity in feed_entities:
+        feed = get_rt_feed_hub(self.hass).get_feed(self._alerts_url, self._headers, "alerts")
+        # only alerts on the stops or without stop can match
+        candidates = feed.for_stops(self._stop_id, self._destination_id, "unknown") if feed is not None else []
+        for _, entity in candidates:
             if entity.HasField("alert"):
                 for x in entity.alert.informed_entity:
                     if x.HasField("stop_id"):
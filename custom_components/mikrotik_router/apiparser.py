@@ -1,7 +1,9 @@
 """API parser for JSON APIs."""
 
 from datetime import datetime
+from functools import lru_cache
 from logging import getLogger
+from operator import itemgetter
 
 from pytz import utc
 from voluptuous import Optional
@@ -12,6 +14,8 @@ from .const import TO_REDACT
 
 _LOGGER = getLogger(__name__)
 
+_MISSING = object()
+
 
 # ---------------------------
 #   utc_from_timestamp
@@ -94,9 +98,17 @@ def parse_api(
     ensure_vals=None,
     only=None,
     skip=None,
+    cache=None,
 ) -> dict:
-    """Get data from API."""
+    """Get data from API.
+
+    With a ParseCache, rows returned unchanged since the previous parse are not
+    extracted again and the uids of changed rows are collected in cache.changed.
+    """
     debug = _LOGGER.getEffectiveLevel() == 10
+    if cache is not None:
+        cache.changed = set()
+
     if type(source) == dict:
         tmp = source
         source = [tmp]
@@ -109,6 +121,8 @@ def parse_api(
     if debug:
         _LOGGER.debug("Processing source %s", async_redact_data(source, TO_REDACT))
 
+    compiled = compile_vals(vals) if vals else None
+    rows = {}
     keymap = generate_keymap(data, key_search)
     for entry in source:
         if only and not matches_only(entry, only):
@@ -129,8 +143,13 @@ def parse_api(
         if debug:
             _LOGGER.debug("Processing entry %s", async_redact_data(entry, TO_REDACT))
 
-        if vals:
-            data = fill_vals(data, entry, uid, vals)
+        if compiled:
+            if uid and cache is not None:
+                fill_cached_vals(data[uid], entry, uid, compiled, cache, rows)
+            elif uid:
+                data[uid].update(zip(compiled.names, extract_vals(entry, compiled)))
+            else:
+                data.update(zip(compiled.names, extract_vals(entry, compiled)))
 
         if ensure_vals:
             data = fill_ensure_vals(data, uid, ensure_vals)
@@ -138,9 +157,171 @@ def parse_api(
         if val_proc:
             data = fill_vals_proc(data, uid, val_proc)
 
+    if cache is not None and compiled:
+        cache.rows = rows
+
     return data
 
 
+# ---------------------------
+#   ParseCache
+# ---------------------------
+class ParseCache:
+    """Rows of an API path from the previous parse."""
+
+    def __init__(self):
+        """Initialize cache."""
+        self.rows = {}
+        self.changed = set()
+
+
+# ---------------------------
+#   CompiledVals
+# ---------------------------
+class CompiledVals:
+    """Field extractors of a vals spec."""
+
+    def __init__(self, vals):
+        """Resolve sources, defaults and types of the fields once."""
+        names = []
+        self.fields = []
+        for val in vals:
+            _name = val["name"]
+            _type = val["type"] if "type" in val else "str"
+            _source = val["source"] if "source" in val else _name
+            _path = tuple(_source.split("/")) if "/" in _source else None
+            _convert = val["convert"] if "convert" in val else None
+
+            if _type == "str":
+                _default = val["default"] if "default" in val else ""
+                if "default_val" in val and val["default_val"] in val:
+                    _default = val[val["default_val"]]
+
+                names.append(_name)
+                self.fields.append(
+                    (_source, _path, _default, False, False, _default != "", _convert)
+                )
+
+            elif _type == "bool":
+                _default = val["default"] if "default" in val else False
+                _reverse = val["reverse"] if "reverse" in val else False
+                names.append(_name)
+                self.fields.append(
+                    (_source, _path, _default, True, _reverse, False, _convert)
+                )
+
+        self.names = tuple(names)
+        self._getter = itemgetter(*names) if names else None
+
+    def get(self, row) -> tuple:
+        """Return the current values of the fields in a data row."""
+        if not self._getter:
+            return ()
+
+        return (self._getter(row),) if len(self.names) == 1 else self._getter(row)
+
+
+@lru_cache(maxsize=None)
+def _compile_vals(key) -> CompiledVals:
+    """Compile a vals spec from its items."""
+    return CompiledVals([dict(items) for items in key])
+
+
+# ---------------------------
+#   compile_vals
+# ---------------------------
+def compile_vals(vals) -> CompiledVals:
+    """Return the compiled vals spec, built once per distinct spec."""
+    try:
+        return _compile_vals(tuple(tuple(sorted(val.items())) for val in vals))
+    except TypeError:
+        # Unhashable defaults
+        return CompiledVals(vals)
+
+
+# ---------------------------
+#   extract_vals
+# ---------------------------
+def extract_vals(entry, compiled) -> tuple:
+    """Return the values of all fields from an API entry."""
+    values = []
+    for param, path, default, is_bool, reverse, coerce, convert in compiled.fields:
+        if path:
+            ret = entry
+            for tmp_param in path:
+                if isinstance(ret, dict) and tmp_param in ret:
+                    ret = ret[tmp_param]
+                else:
+                    ret = _MISSING
+                    break
+        else:
+            ret = entry[param] if param in entry else _MISSING
+
+        if ret is _MISSING:
+            ret = default
+        elif is_bool:
+            if isinstance(ret, str):
+                if ret in ("on", "On", "ON", "yes", "Yes", "YES", "up", "Up", "UP"):
+                    ret = True
+                elif ret in ("off", "Off", "OFF", "no", "No", "NO", "down", "Down", "DOWN"):
+                    ret = False
+
+            if not isinstance(ret, bool):
+                ret = default
+
+            if reverse:
+                ret = not ret
+        else:
+            if coerce:
+                if isinstance(ret, str):
+                    ret = str(ret)
+                elif isinstance(ret, int):
+                    ret = int(ret)
+                elif isinstance(ret, float):
+                    ret = round(float(ret), 2)
+
+            if isinstance(ret, str) and len(ret) > 255:
+                ret = ret[:255]
+
+        if convert == "utc_from_timestamp" and isinstance(ret, int) and ret > 0:
+            if ret > 100000000000:
+                ret = ret / 1000
+
+            ret = utc_from_timestamp(ret)
+
+        values.append(ret)
+
+    return tuple(values)
+
+
+# ---------------------------
+#   fill_cached_vals
+# ---------------------------
+def fill_cached_vals(row, entry, uid, compiled, cache, rows) -> None:
+    """Fill data of an entry, skipping entries unchanged since the previous parse."""
+    prev = cache.rows.get(uid)
+    if prev is not None and prev[0] == entry:
+        values = prev[1]
+        try:
+            current = compiled.get(row)
+        except KeyError:
+            current = None
+
+        # Fields modified after the previous parse are filled again
+        if current != values:
+            row.update(zip(compiled.names, values))
+
+        rows[uid] = prev
+        return
+
+    values = extract_vals(entry, compiled)
+    row.update(zip(compiled.names, values))
+    if prev is None or prev[1] != values:
+        cache.changed.add(uid)
+
+    rows[uid] = (entry, values)
+
+
 # ---------------------------
 #   get_uid
 # ---------------------------
@@ -250,48 +431,9 @@ def fill_defaults(data, vals) -> dict:
 # ---------------------------
 def fill_vals(data, entry, uid, vals) -> dict:
     """Fill all data."""
-    for val in vals:
-        _name = val["name"]
-        _type = val["type"] if "type" in val else "str"
-        _source = val["source"] if "source" in val else _name
-        _convert = val["convert"] if "convert" in val else None
-
-        if _type == "str":
-            _default = val["default"] if "default" in val else ""
-            if "default_val" in val and val["default_val"] in val:
-                _default = val[val["default_val"]]
-
-            if uid:
-                data[uid][_name] = from_entry(entry, _source, default=_default)
-            else:
-                data[_name] = from_entry(entry, _source, default=_default)
-
-        elif _type == "bool":
-            _default = val["default"] if "default" in val else False
-            _reverse = val["reverse"] if "reverse" in val else False
-
-            if uid:
-                data[uid][_name] = from_entry_bool(
-                    entry, _source, default=_default, reverse=_reverse
-                )
-            else:
-                data[_name] = from_entry_bool(
-                    entry, _source, default=_default, reverse=_reverse
-                )
-
-        if _convert == "utc_from_timestamp":
-            if uid:
-                if isinstance(data[uid][_name], int) and data[uid][_name] > 0:
-                    if data[uid][_name] > 100000000000:
-                        data[uid][_name] = data[uid][_name] / 1000
-
-                    data[uid][_name] = utc_from_timestamp(data[uid][_name])
-            elif isinstance(data[_name], int) and data[_name] > 0:
-                if data[_name] > 100000000000:
-                    data[_name] = data[_name] / 1000
-
-                data[_name] = utc_from_timestamp(data[_name])
-
+    compiled = compile_vals(vals)
+    target = data[uid] if uid else data
+    target.update(zip(compiled.names, extract_vals(entry, compiled)))
     return data
 
 
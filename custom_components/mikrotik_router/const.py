@@ -27,6 +27,16 @@ DEFAULT_VERIFY_SSL = False
 
 CONF_SCAN_INTERVAL = "scan_interval"
 DEFAULT_SCAN_INTERVAL = 30
+
+# Number of API connections used to poll paths concurrently
+DEFAULT_API_CONNECTIONS = 3
+# Minimum seconds between polls of a path, other paths are polled every scan
+POLL_INTERVALS = {
+    "nat": 300,
+    "mangle": 300,
+    "filter": 300,
+    "kidcontrol": 300,
+}
 CONF_TRACK_IFACE_CLIENTS = "track_iface_clients"
 DEFAULT_TRACK_IFACE_CLIENTS = True
 CONF_TRACK_HOSTS = "track_network_hosts"
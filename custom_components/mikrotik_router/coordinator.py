@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 import ipaddress
 import logging
 import re
@@ -9,6 +10,7 @@ import pytz
 
 from datetime import datetime, timedelta
 from dataclasses import dataclass
+from time import monotonic
 from ipaddress import ip_address, IPv4Network
 from mac_vendor_lookup import AsyncMacLookup
 
@@ -63,9 +65,11 @@ from .const import (
     DEFAULT_SENSOR_ENVIRONMENT,
     CONF_SENSOR_NETWATCH_TRACKER,
     DEFAULT_SENSOR_NETWATCH_TRACKER,
+    DEFAULT_API_CONNECTIONS,
+    POLL_INTERVALS,
 )
-from .apiparser import parse_api
-from .mikrotikapi import MikrotikAPI
+from .apiparser import ParseCache, parse_api
+from .mikrotikapi import MikrotikAPI, MikrotikAPIPool
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -268,7 +272,8 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
 
         self.notified_flags = []
 
-        self.api = MikrotikAPI(
+        self.api = MikrotikAPIPool(
+            DEFAULT_API_CONNECTIONS,
             config_entry.data[CONF_HOST],
             config_entry.data[CONF_USERNAME],
             config_entry.data[CONF_PASSWORD],
@@ -303,6 +308,16 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
         self.last_hwinfo_update = datetime(1970, 1, 1)
         self.rebootcheck = 0
 
+        self.poll_last = {}
+        self.poll_stats = {}
+        self.parse_cache = {
+            "nat": ParseCache(),
+            "mangle": ParseCache(),
+            "filter": ParseCache(),
+            "kid-control": ParseCache(),
+            "dhcp": ParseCache(),
+        }
+
     # ---------------------------
     #   option_track_iface_clients
     # ---------------------------
@@ -456,6 +471,7 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
     # ---------------------------
     def set_value(self, path, param, value, mod_param, mod_value):
         """Change value using Mikrotik API"""
+        self.poll_last.clear()
         return self.api.set_value(path, param, value, mod_param, mod_value)
 
     # ---------------------------
@@ -463,6 +479,7 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
     # ---------------------------
     def execute(self, path, command, param, value, attributes=None):
         """Change value using Mikrotik API"""
+        self.poll_last.clear()
         return self.api.execute(path, command, param, value, attributes)
 
     # ---------------------------
@@ -596,91 +613,153 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
             if self.api.connected():
                 self.last_hwinfo_update = datetime.now().replace(microsecond=0)
 
-        await self.hass.async_add_executor_job(self.get_system_resource)
+        for cache in self.parse_cache.values():
+            cache.changed = set()
 
-        # if self.api.connected() and "available" not in self.ds["fw-update"]:
-        #     await self.hass.async_add_executor_job(self.get_firmware_update)
+        # Reconnects when disconnected
+        await self.hass.async_add_executor_job(self.api.connection_check)
+        await self.async_poll(self.get_poll_paths())
 
-        if self.api.connected():
-            await self.hass.async_add_executor_job(self.get_system_health)
+        if self.api.connected() and not self.ds["host_hass"]:
+            await self.async_get_host_hass()
 
         if self.api.connected():
-            await self.hass.async_add_executor_job(self.get_dhcp_client)
+            await self.async_process_host()
 
         if self.api.connected():
-            await self.hass.async_add_executor_job(self.get_interface)
+            await self.hass.async_add_executor_job(self.process_interface_client)
 
-        if self.api.connected() and not self.ds["host_hass"]:
-            await self.async_get_host_hass()
+        if self.api.connected() and self.option_sensor_client_traffic:
+            if 0 < self.major_fw_version < 7:
+                await self.hass.async_add_executor_job(self.process_accounting)
+            elif 0 < self.major_fw_version >= 7:
+                await self.hass.async_add_executor_job(self.process_kid_control_devices)
 
-        if self.api.connected() and self.support_capsman:
-            await self.hass.async_add_executor_job(self.get_capsman_hosts)
+        if not self.api.connected():
+            raise UpdateFailed("Mikrotik Disconnected")
 
-        if self.api.connected() and self.support_wireless:
-            await self.hass.async_add_executor_job(self.get_wireless)
+        # async_dispatcher_send(self.hass, "update_sensors", self)
+        return self.ds
 
-        if self.api.connected() and self.support_wireless:
-            await self.hass.async_add_executor_job(self.get_wireless_hosts)
+    # ---------------------------
+    #   row_changed
+    # ---------------------------
+    def row_changed(self, data_path, uid) -> bool:
+        """Return False if the row was parsed unchanged by the last update"""
+        if data_path not in self.parse_cache:
+            return True
 
-        if self.api.connected():
-            await self.hass.async_add_executor_job(self.get_bridge)
+        return uid in self.parse_cache[data_path].changed
 
-        if self.api.connected():
-            await self.hass.async_add_executor_job(self.get_arp)
+    # ---------------------------
+    #   get_poll_paths
+    # ---------------------------
+    def get_poll_paths(self):
+        """Return the paths to poll with their getter and the paths they depend on"""
+        paths = [
+            ("resource", self.get_system_resource, ()),
+            ("health", self.get_system_health, ()),
+            ("dhcp_client", self.get_dhcp_client, ()),
+            ("interface", self.get_interface, ()),
+        ]
+        if self.support_capsman:
+            paths.append(("capsman_hosts", self.get_capsman_hosts, ()))
 
-        if self.api.connected():
-            await self.hass.async_add_executor_job(self.get_dhcp)
+        if self.support_wireless:
+            paths.append(("wireless", self.get_wireless, ("interface",)))
+            paths.append(("wireless_hosts", self.get_wireless_hosts, ()))
 
-        if self.api.connected():
-            await self.async_process_host()
+        paths.append(("bridge", self.get_bridge, ()))
+        paths.append(("arp", self.get_arp, ("bridge", "dhcp_client")))
+        paths.append(("dhcp", self.get_dhcp, ("arp",)))
 
-        if self.api.connected():
-            await self.hass.async_add_executor_job(self.process_interface_client)
+        if self.option_sensor_nat:
+            paths.append(("nat", self.get_nat, ()))
 
-        if self.api.connected() and self.option_sensor_nat:
-            await self.hass.async_add_executor_job(self.get_nat)
+        if self.option_sensor_kidcontrol:
+            paths.append(("kidcontrol", self.get_kidcontrol, ()))
 
-        if self.api.connected() and self.option_sensor_kidcontrol:
-            await self.hass.async_add_executor_job(self.get_kidcontrol)
+        if self.option_sensor_mangle:
+            paths.append(("mangle", self.get_mangle, ()))
 
-        if self.api.connected() and self.option_sensor_mangle:
-            await self.hass.async_add_executor_job(self.get_mangle)
+        if self.option_sensor_filter:
+            paths.append(("filter", self.get_filter, ()))
 
-        if self.api.connected() and self.option_sensor_filter:
-            await self.hass.async_add_executor_job(self.get_filter)
+        if self.option_sensor_netwatch:
+            paths.append(("netwatch", self.get_netwatch, ()))
 
-        if self.api.connected() and self.option_sensor_netwatch:
-            await self.hass.async_add_executor_job(self.get_netwatch)
+        if self.support_ppp and self.option_sensor_ppp:
+            paths.append(("ppp", self.get_ppp, ()))
 
-        if self.api.connected() and self.support_ppp and self.option_sensor_ppp:
-            await self.hass.async_add_executor_job(self.get_ppp)
+        if self.option_sensor_client_captive:
+            paths.append(("captive", self.get_captive, ("resource",)))
 
-        if self.api.connected() and self.option_sensor_client_traffic:
-            if 0 < self.major_fw_version < 7:
-                await self.hass.async_add_executor_job(self.process_accounting)
-            elif 0 < self.major_fw_version >= 7:
-                await self.hass.async_add_executor_job(self.process_kid_control_devices)
+        if self.option_sensor_simple_queues:
+            paths.append(("queue", self.get_queue, ()))
 
-        if self.api.connected() and self.option_sensor_client_captive:
-            await self.hass.async_add_executor_job(self.get_captive)
+        if self.option_sensor_environment:
+            paths.append(("environment", self.get_environment, ()))
 
-        if self.api.connected() and self.option_sensor_simple_queues:
-            await self.hass.async_add_executor_job(self.get_queue)
+        if self.support_ups:
+            paths.append(("ups", self.get_ups, ()))
 
-        if self.api.connected() and self.option_sensor_environment:
-            await self.hass.async_add_executor_job(self.get_environment)
+        if self.support_gps:
+            paths.append(("gps", self.get_gps, ()))
 
-        if self.api.connected() and self.support_ups:
-            await self.hass.async_add_executor_job(self.get_ups)
+        return paths
 
-        if self.api.connected() and self.support_gps:
-            await self.hass.async_add_executor_job(self.get_gps)
+    # ---------------------------
+    #   async_poll
+    # ---------------------------
+    async def async_poll(self, paths):
+        """Poll the paths due, concurrently unless they depend on each other"""
+        now = monotonic()
+        tasks = {}
 
-        if not self.api.connected():
-            raise UpdateFailed("Mikrotik Disconnected")
+        async def _async_poll_path(name, getter, depends):
+            for depend in depends:
+                if depend in tasks:
+                    await asyncio.wait([tasks[depend]])
 
-        # async_dispatcher_send(self.hass, "update_sensors", self)
-        return self.ds
+            if not self.api.connected():
+                return
+
+            start = monotonic()
+            await self.hass.async_add_executor_job(getter)
+            self.record_poll(name, monotonic() - start)
+            # Paths not polled completely are polled again on the next update
+            if self.api.connected():
+                self.poll_last[name] = now
+
+        for name, getter, depends in paths:
+            if (
+                name in self.poll_last
+                and now - self.poll_last[name] < POLL_INTERVALS.get(name, 0)
+            ):
+                continue
+
+            tasks[name] = asyncio.create_task(_async_poll_path(name, getter, depends))
+
+        results = await asyncio.gather(*tasks.values(), return_exceptions=True)
+        for result in results:
+            if isinstance(result, BaseException):
+                raise result
+
+    # ---------------------------
+    #   record_poll
+    # ---------------------------
+    def record_poll(self, name, duration):
+        """Record the latency of a path poll"""
+        stats = self.poll_stats.setdefault(
+            name, {"count": 0, "last_ms": 0, "avg_ms": 0, "max_ms": 0}
+        )
+        duration_ms = round(duration * 1000, 1)
+        stats["count"] += 1
+        stats["last_ms"] = duration_ms
+        stats["max_ms"] = max(stats["max_ms"], duration_ms)
+        stats["avg_ms"] = round(
+            stats["avg_ms"] + (duration_ms - stats["avg_ms"]) / stats["count"], 1
+        )
 
     # ---------------------------
     #   get_access
@@ -992,6 +1071,7 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
         self.ds["nat"] = parse_api(
             data=self.ds["nat"],
             source=self.api.query("/ip/firewall/nat"),
+            cache=self.parse_cache["nat"],
             key=".id",
             vals=[
                 {"name": ".id"},
@@ -1074,6 +1154,7 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
         self.ds["mangle"] = parse_api(
             data=self.ds["mangle"],
             source=self.api.query("/ip/firewall/mangle"),
+            cache=self.parse_cache["mangle"],
             key=".id",
             vals=[
                 {"name": ".id"},
@@ -1166,6 +1247,7 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
         self.ds["filter"] = parse_api(
             data=self.ds["filter"],
             source=self.api.query("/ip/firewall/filter"),
+            cache=self.parse_cache["filter"],
             key=".id",
             vals=[
                 {"name": ".id"},
@@ -1276,6 +1358,7 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
         self.ds["kid-control"] = parse_api(
             data=self.ds["kid-control"],
             source=self.api.query("/ip/kid-control"),
+            cache=self.parse_cache["kid-control"],
             key="name",
             vals=[
                 {"name": "name"},
@@ -1882,6 +1965,7 @@ class MikrotikCoordinator(DataUpdateCoordinator[None]):
         self.ds["dhcp"] = parse_api(
             data=self.ds["dhcp"],
             source=self.api.query("/ip/dhcp-server/lease"),
+            cache=self.parse_cache["dhcp"],
             key="mac-address",
             vals=[
                 {"name": "mac-address"},
@@ -22,4 +22,9 @@ async def async_get_config_entry_diagnostics(
         },
         "data": async_redact_data(data_coordinator.data, TO_REDACT),
         "tracker": async_redact_data(tracker_coordinator.data, TO_REDACT),
+        "poll": data_coordinator.poll_stats,
+        "parse": {
+            path: {"rows": len(cache.rows), "changed": len(cache.changed)}
+            for path, cache in data_coordinator.parse_cache.items()
+        },
     }
@@ -178,6 +178,7 @@ class MikrotikEntity(CoordinatorEntity[_MikrotikCoordinatorT], Entity):
         self._config_entry = self.coordinator.config_entry
         self._attr_extra_state_attributes = {ATTR_ATTRIBUTION: ATTRIBUTION}
         self._uid = uid
+        self._available_written = None
         self._data = coordinator.data[self.entity_description.data_path]
         if self._uid:
             self._data = coordinator.data[self.entity_description.data_path][self._uid]
@@ -191,6 +192,20 @@ class MikrotikEntity(CoordinatorEntity[_MikrotikCoordinatorT], Entity):
             self._data = self.coordinator.data[self.entity_description.data_path][
                 self._uid
             ]
+
+        # Rows returned unchanged by the router need no state write
+        available = self.available
+        if (
+            self._uid
+            and available == self._available_written
+            and isinstance(self.coordinator, MikrotikCoordinator)
+            and not self.coordinator.row_changed(
+                self.entity_description.data_path, self._uid
+            )
+        ):
+            return
+
+        self._available_written = available
         super()._handle_coordinator_update()
 
     @property
@@ -3,6 +3,7 @@
 import logging
 import ssl
 from time import time
+from queue import LifoQueue
 from threading import Lock
 from voluptuous import Optional
 from .const import (
@@ -478,3 +479,66 @@ class MikrotikAPI:
         time_diff = self._current_milliseconds() - self.client_traffic_last_run
         self.client_traffic_last_run = self._current_milliseconds()
         return time_diff / 1000
+
+
+# ---------------------------
+#   MikrotikAPIPool
+# ---------------------------
+class MikrotikAPIPool:
+    """Pool of API connections to one Mikrotik, used to run queries concurrently.
+
+    Queries borrow an idle connection from the pool. Everything else goes to
+    the primary connection, which also holds the connection state.
+    Additional connections are opened on first use, a connection that fails is
+    dropped from the pool until the primary connection reconnects, as the
+    router may limit the number of API sessions.
+    """
+
+    def __init__(self, size, *args, **kwargs):
+        """Initialize the pool of connections."""
+        self._apis = [MikrotikAPI(*args, **kwargs) for _ in range(max(size, 1))]
+        self._primary = self._apis[0]
+        self._idle = LifoQueue()
+        self._disabled = set()
+        for api in reversed(self._apis):
+            self._idle.put(api)
+
+    def __getattr__(self, name):
+        return getattr(self._primary, name)
+
+    # ---------------------------
+    #   has_reconnected
+    # ---------------------------
+    def has_reconnected(self) -> bool:
+        """Check if mikrotik has reconnected, enabling dropped connections again"""
+        if not self._primary.has_reconnected():
+            return False
+
+        for api in list(self._disabled):
+            self._disabled.discard(api)
+            self._idle.put(api)
+
+        return True
+
+    # ---------------------------
+    #   query
+    # ---------------------------
+    def query(self, path, command=None, args=None, return_list=True) -> Optional(list):
+        """Retrieve data from Mikrotik API over an idle connection."""
+        while True:
+            api = self._idle.get()
+            try:
+                response = api.query(path, command, args, return_list)
+            except BaseException:
+                self._idle.put(api)
+                raise
+
+            if response is None and api is not self._primary and not api.connected():
+                _LOGGER.debug(
+                    "Mikrotik %s dropping pooled connection: %s", self._host, api.error
+                )
+                self._disabled.add(api)
+                continue
+
+            self._idle.put(api)
+            return response
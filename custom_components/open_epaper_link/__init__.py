@@ -140,7 +140,8 @@ async def async_remove_storage_files(hass: HomeAssistant) -> None:
 
     1. Tag types file (open_epaper_link_tagtypes.json)
     2. Tag storage file (.storage/open_epaper_link_tags)
-    3. Image directory (www/open_epaper_link)
+    3. Render cache storage file (.storage/open_epaper_link_render_cache)
+    4. Image directory (www/open_epaper_link)
 
     This prevents orphaned files when the integration is removed
     and ensures a clean reinstallation if needed.
@@ -168,6 +169,15 @@ async def async_remove_storage_files(hass: HomeAssistant) -> None:
         except OSError as err:
             _LOGGER.error("Error removing tag storage file: %s", err)
 
+    # Remove render cache storage file
+    render_cache_file = os.path.join(storage_dir, f"{DOMAIN}_render_cache")
+    if await hass.async_add_executor_job(os.path.exists, render_cache_file):
+        try:
+            await hass.async_add_executor_job(os.remove, render_cache_file)
+            _LOGGER.debug("Removed render cache storage file")
+        except OSError as err:
+            _LOGGER.error("Error removing render cache storage file: %s", err)
+
     # Remove image directory
     image_dir = hass.config.path("www/open_epaper_link")
     if await hass.async_add_executor_job(os.path.exists, image_dir):
@@ -17,7 +17,7 @@ from homeassistant.helpers.aiohttp_client import async_get_clientsession
 import homeassistant.helpers.config_validation as cv
 from homeassistant.helpers.selector import Selector, TextSelectorType
 
-from .const import DOMAIN
+from .const import CONF_RENDER_WORKERS, CONF_SKIP_UNCHANGED_UPLOADS, DEFAULT_RENDER_WORKERS, DOMAIN
 import logging
 
 _LOGGER: Final = logging.getLogger(__name__)
@@ -206,6 +206,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
     - Tag blacklisting to hide unwanted devices
     - Button and NFC debounce intervals to prevent duplicate triggers
     - Custom font directories for the image generation system
+    - Number of workers rendering the drawcustom images
+    - Skipping drawcustom uploads of the image a tag already shows
 
     The options flow fetches current tag data from the hub to
     populate the selection fields with accurate information.
@@ -225,6 +227,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         self._button_debounce = self.config_entry.options.get("button_debounce", 0.5)
         self._nfc_debounce = self.config_entry.options.get("nfc_debounce", 1.0)
         self._custom_font_dirs = self.config_entry.options.get("custom_font_dirs", "")
+        self._render_workers = self.config_entry.options.get(CONF_RENDER_WORKERS, DEFAULT_RENDER_WORKERS)
+        self._skip_unchanged_uploads = self.config_entry.options.get(CONF_SKIP_UNCHANGED_UPLOADS, False)
 
     async def async_step_init(self, user_input=None):
         """Manage OpenEPaperLink options.
@@ -250,6 +254,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                     "button_debounce": user_input.get("button_debounce", 0.5),
                     "nfc_debounce": user_input.get("nfc_debounce", 1.0),
                     "custom_font_dirs": user_input.get("custom_font_dirs", ""),
+                    CONF_RENDER_WORKERS: int(user_input.get(CONF_RENDER_WORKERS, DEFAULT_RENDER_WORKERS)),
+                    CONF_SKIP_UNCHANGED_UPLOADS: user_input.get(CONF_SKIP_UNCHANGED_UPLOADS, False),
                 }
             )
 
@@ -315,5 +321,20 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                         autocomplete="path"
                     )
                 ),
+                vol.Optional(
+                    CONF_RENDER_WORKERS,
+                    default=self._render_workers,
+                ): selector.NumberSelector(
+                    selector.NumberSelectorConfig(
+                        min=1,
+                        max=8,
+                        step=1,
+                        mode=selector.NumberSelectorMode.BOX
+                    )
+                ),
+                vol.Optional(
+                    CONF_SKIP_UNCHANGED_UPLOADS,
+                    default=self._skip_unchanged_uploads,
+                ): selector.BooleanSelector(),
             }),
         )
\ No newline at end of file
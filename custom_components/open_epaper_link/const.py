@@ -1,4 +1,8 @@
 DOMAIN = "open_epaper_link"
 SIGNAL_TAG_UPDATE = f"{DOMAIN}_tag_update"
 SIGNAL_TAG_IMAGE_UPDATE = f"{DOMAIN}_tag_image_update"
-SIGNAL_AP_UPDATE = f"{DOMAIN}_ap_update"
\ No newline at end of file
+SIGNAL_AP_UPDATE = f"{DOMAIN}_ap_update"
+
+CONF_RENDER_WORKERS = "render_workers"
+DEFAULT_RENDER_WORKERS = 2
+CONF_SKIP_UNCHANGED_UPLOADS = "skip_unchanged_uploads"
@@ -1,4 +1,5 @@
 import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Final, Dict
 
@@ -20,8 +21,17 @@ import logging
 
 _LOGGER: Final = logging.getLogger(__name__)
 
-from .const import DOMAIN, SIGNAL_AP_UPDATE, SIGNAL_TAG_UPDATE, SIGNAL_TAG_IMAGE_UPDATE
+from .const import (
+    CONF_RENDER_WORKERS,
+    DEFAULT_RENDER_WORKERS,
+    DOMAIN,
+    SIGNAL_AP_UPDATE,
+    SIGNAL_TAG_UPDATE,
+    SIGNAL_TAG_IMAGE_UPDATE,
+)
 from .tag_types import get_tag_types_manager, get_hw_string
+from .render_cache import RenderCache
+from .upload_queue import UploadQueueHandler
 
 STORAGE_VERSION = 1
 STORAGE_KEY = f"{DOMAIN}_tags"
@@ -106,6 +116,10 @@ class Hub:
         self._nfc_last_scan: Dict[str, datetime] = {}
         self._nfc_debounce_interval = timedelta(seconds=1)
         self._update_debounce_interval()
+        self._render_executor: ThreadPoolExecutor | None = None
+        self._render_workers = 0
+        self.render_cache = RenderCache(hass)
+        self.upload_queue = UploadQueueHandler(hass, self)
 
     def _update_debounce_interval(self) -> None:
         """Update event debounce intervals from integration options.
@@ -122,6 +136,29 @@ class Hub:
         self._button_debounce_interval = timedelta(seconds=button_debounce_seconds)
         self._nfc_debounce_interval = timedelta(seconds=nfc_debounce_seconds)
 
+    @property
+    def render_executor(self) -> ThreadPoolExecutor:
+        """Worker pool rendering the drawcustom images.
+
+        Created on first use with the number of workers from the
+        render_workers option, so image rendering never runs on the
+        event loop nor fills up the default executor of Home Assistant.
+
+        Returns:
+            ThreadPoolExecutor: The render worker pool
+        """
+        workers = int(self.entry.options.get(CONF_RENDER_WORKERS, DEFAULT_RENDER_WORKERS))
+        if self._render_executor is not None and workers != self._render_workers:
+            # Option changed, running renders finish on the old pool
+            self._render_executor.shutdown(wait=False)
+            self._render_executor = None
+        if self._render_executor is None:
+            self._render_executor = ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix=f"{DOMAIN}_render"
+            )
+            self._render_workers = workers
+        return self._render_executor
+
     async def async_reload_config(self) -> None:
         """Reload configuration from config entry.
 
@@ -256,6 +293,7 @@ class Hub:
         - Sets shutdown flag to prevent new connection attempts
         - Cancels any active WebSocket connection task
         - Removes event listeners and callbacks
+        - Stops the image render workers and the upload queue
         - Updates connection status for dependent entities
 
         This should be called when unloading the integration.
@@ -281,6 +319,14 @@ class Hub:
             except Exception as err:
                 _LOGGER.debug("Error cleaning up callback: %s", err)
 
+        # Stop the render workers, running renders finish in the background
+        if self._render_executor is not None:
+            self._render_executor.shutdown(wait=False)
+            self._render_executor = None
+
+        # Stop uploading queued images
+        await self.upload_queue.async_shutdown()
+
         # Mark as offline
         self.online = False
         async_dispatcher_send(self.hass, f"{DOMAIN}_connection_status", False)
@@ -950,6 +996,7 @@ class Hub:
 
             # Update storage
             await self._store.async_save({"tags": self._data})
+            await self.render_cache.async_remove_tag(tag_mac)
 
     async def async_reload_blacklist(self) -> None:
         """Reload the tag blacklist from config entry options.
@@ -5,7 +5,7 @@ import io
 import logging
 import zlib
 
-from PIL import Image
+from PIL import Image, ImageChops
 
 from .tag_types import TagType
 
@@ -168,8 +168,8 @@ def to_image(raw_data: bytes, tag_type: TagType) -> bytes:
     The conversion process:
 
     1. Decodes the raw data using decode_esl_raw
-    2. Creates a new PIL Image with appropriate dimensions
-    3. Processes pixels based on the tag's color depth and format
+    2. Unpacks the bit planes or packed pixels of the whole image into color indices
+    3. Maps the indices to the tag's colors through a palette
     4. Applies rotation according to the tag's buffer rotation setting
     5. Converts to JPEG format
 
@@ -197,80 +197,9 @@ def to_image(raw_data: bytes, tag_type: TagType) -> bytes:
     _LOGGER.debug("\n=== Color Table Information ===")
     _LOGGER.debug(f"Color table contents: {tag_type.color_table}")
 
-    # Create initial image
-    img = Image.new('RGB', (native_width, native_height), 'white')
-    pixels = img.load()
-
-    # Convert color table to RGB tuples
-    color_table = {k: tuple(v) for k, v in tag_type.color_table.items()}
-
-    _LOGGER.debug(f"Available colors: {list(color_table.keys())}")
-
-    # Process pixels based on color depth
-    if tag_type.bpp <= 2:  # Traditional 1-2 bit plane-based format
-        bytes_per_row = (native_width + 7) // 8
-        bytes_per_plane = bytes_per_row * native_height
-
-        # Split into planes for 2bpp mode
-        black_plane = data[:bytes_per_plane]
-        color_plane = data[bytes_per_plane:bytes_per_plane * 2] if tag_type.bpp == 2 else None
-
-        # Process pixels
-        for y in range(native_height):
-            row_offset = y * bytes_per_row
-            for x in range(native_width):
-                byte_offset = row_offset + (x // 8)
-                bit_mask = 0x80 >> (x % 8)
-
-                black = bool(black_plane[byte_offset] & bit_mask)
-                color = bool(color_plane[byte_offset] & bit_mask) if color_plane else False
-
-                if black and color:
-                    pixels[x, y] = color_table['black']  # Overlap
-                elif black:
-                    pixels[x, y] = color_table['black']
-                elif color:
-                    # Use first available color that's not black or white
-                    color_key = next((k for k in color_table.keys()
-                                      if k not in ['black', 'white']), 'white')
-                    pixels[x, y] = color_table[color_key]
-                else:
-                    pixels[x, y] = color_table['white']
-
-    else:  # 3-4 bit packed format
-        bits_per_pixel = tag_type.bpp
-        pixels_per_byte = 8 // bits_per_pixel
-        bit_mask = (1 << bits_per_pixel) - 1
-        bytes_per_row = (native_width * bits_per_pixel + 7) // 8
-
-        # Convert color table to list for indexed access
-        colors_list = list(color_table.values())
-
-        for y in range(native_height):
-            for x in range(native_width):
-                # Calculate byte and bit positions
-                bit_position = (x * bits_per_pixel) % 8
-                byte_offset = (y * bytes_per_row) + (x * bits_per_pixel) // 8
-
-                if byte_offset < len(data):
-                    # Extract the color index
-                    if bit_position + bits_per_pixel <= 8:
-                        # Color index is contained within a single byte
-                        color_index = (data[byte_offset] >> (8 - bit_position - bits_per_pixel)) & bit_mask
-                    else:
-                        # Color index spans two bytes
-                        first_byte = data[byte_offset] & ((1 << (8 - bit_position)) - 1)
-                        bits_from_first = 8 - bit_position
-                        bits_from_second = bits_per_pixel - bits_from_first
-                        if byte_offset + 1 < len(data):
-                            second_byte = data[byte_offset + 1] >> (8 - bits_from_second)
-                            color_index = (first_byte << bits_from_second) | second_byte
-                        else:
-                            color_index = first_byte << bits_from_second
-
-                    # Set pixel color
-                    if color_index < len(colors_list):
-                        pixels[x, y] = colors_list[color_index]
+    if len(data) < _expected_size(tag_type.bpp, native_width, native_height):
+        _LOGGER.debug("Raw data shorter than expected, missing pixels stay white")
+    img = _decode_pixels_bulk(data, tag_type, native_width, native_height)
 
     # Apply rotation
     if tag_type.rotatebuffer == 1:  # 90 degrees CCW
@@ -285,3 +214,103 @@ def to_image(raw_data: bytes, tag_type: TagType) -> bytes:
     img.save(output, format='JPEG', quality=95)
     output.seek(0)
     return output.read()
+
+
+def _expected_size(bpp: int, width: int, height: int) -> int:
+    """Get the size in bytes of the raw bitmap data for a buffer."""
+    if bpp <= 2:
+        return ((width + 7) // 8) * height * (2 if bpp == 2 else 1)
+    return ((width * bpp + 7) // 8) * height
+
+
+def _unpack_bits(data: bytes, bits_per_row: int, row_bytes: int, height: int) -> Image.Image:
+    """Unpack MSB-first packed bits into an 'L' image with 0 or 255 per bit.
+
+    Args:
+        data: Packed data, rows padded to whole bytes
+        bits_per_row: Number of used bits in each row
+        row_bytes: Number of bytes in each row
+        height: Number of rows
+
+    Returns:
+        Image: 'L' image of bits_per_row x height
+    """
+    bits = Image.frombytes('1', (row_bytes * 8, height), data[:row_bytes * height])
+    if bits_per_row != row_bytes * 8:
+        bits = bits.crop((0, 0, bits_per_row, height))
+    return bits.convert('L')
+
+
+def _decode_pixels_bulk(data: bytes, tag_type: TagType, native_width: int, native_height: int) -> Image.Image:
+    """Decode raw bitmap data into an RGB image with whole-image operations.
+
+    Bit planes and packed pixels are unpacked by PIL into color indices,
+    which are mapped to the colors of the tag type through a palette.
+    Pixels past the end of truncated data stay white.
+
+    Args:
+        data: Decoded raw bitmap data
+        tag_type: TagType object with display specifications
+        native_width: Width of the buffer before rotation
+        native_height: Height of the buffer before rotation
+
+    Returns:
+        Image: Decoded RGB image, not rotated
+    """
+    size = (native_width, native_height)
+    data_size = len(data)
+    expected_size = _expected_size(tag_type.bpp, native_width, native_height)
+    if data_size < expected_size:
+        data = bytes(data) + bytes(expected_size - data_size)
+    color_table = {k: tuple(v) for k, v in tag_type.color_table.items()}
+
+    if tag_type.bpp <= 2:  # Traditional 1-2 bit plane-based format
+        bytes_per_row = (native_width + 7) // 8
+        bytes_per_plane = bytes_per_row * native_height
+
+        # Index 0 is white, 1 black (also when overlapping color) and 2 the color
+        color_key = next((k for k in color_table.keys()
+                          if k not in ['black', 'white']), 'white')
+        colors = [color_table['white'], color_table['black'], color_table[color_key]]
+
+        black = _unpack_bits(data[:bytes_per_plane], native_width, bytes_per_row, native_height)
+        if tag_type.bpp == 2:
+            color = _unpack_bits(data[bytes_per_plane:bytes_per_plane * 2], native_width,
+                                 bytes_per_row, native_height)
+            indices = color.point(lambda v: 2 if v else 0)
+        else:
+            indices = Image.new('L', size, 0)
+        indices.paste(1, mask=black)
+
+    else:  # 3-4 bit packed format
+        bits_per_pixel = tag_type.bpp
+        bytes_per_row = (native_width * bits_per_pixel + 7) // 8
+        colors = list(color_table.values())
+
+        # Every bits_per_pixel-th bit of a row is the same bit of each pixel index
+        bits = _unpack_bits(data, native_width * bits_per_pixel, bytes_per_row, native_height).tobytes()
+        indices = None
+        for bit in range(bits_per_pixel):
+            weight = 1 << (bits_per_pixel - 1 - bit)
+            plane = Image.frombytes('L', size, bits[bit::bits_per_pixel]).point(
+                lambda v, weight=weight: weight if v else 0
+            )
+            indices = plane if indices is None else ImageChops.add(indices, plane)
+
+        # Pixels starting past the end of truncated data get an index without color
+        if data_size < expected_size:
+            full_rows, rest = divmod(data_size, bytes_per_row)
+            first_missing = (rest * 8 + bits_per_pixel - 1) // bits_per_pixel
+            if first_missing < native_width:
+                indices.paste(255, (first_missing, full_rows, native_width, full_rows + 1))
+            if full_rows + 1 < native_height:
+                indices.paste(255, (0, full_rows + 1, native_width, native_height))
+
+    # Indices without color in the table stay white
+    palette = []
+    for index in range(256):
+        palette.extend(colors[index] if index < len(colors) else (255, 255, 255))
+    img = Image.frombytes('P', size, indices.tobytes())
+    img.putpalette(palette)
+    return img.convert('RGB')
+
@@ -5,11 +5,12 @@ import os
 import math
 import json
 import re
+import threading
 import urllib
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field, replace
 from enum import Enum
 from typing import Optional, Dict, Any, List, Tuple
-from functools import partial
+from functools import lru_cache, partial
 
 import requests
 import qrcode
@@ -21,6 +22,7 @@ from homeassistant.helpers.network import get_url
 from .const import DOMAIN, SIGNAL_TAG_IMAGE_UPDATE
 from .tag_types import TagType, get_tag_types_manager
 from .util import get_image_path
+from .render_cache import get_render_key
 from PIL import Image, ImageDraw, ImageFont
 from resizeimage import resizeimage
 from homeassistant.exceptions import HomeAssistantError
@@ -287,6 +289,36 @@ class TextSegment:
     start_x: int = 0
 
 
+@dataclass
+class RenderJob:
+    """Everything needed to render a drawcustom payload without Home Assistant.
+
+    Built on the event loop by ImageGen, with entity references resolved and
+    plot history fetched, then rendered by render_custom_image in a worker.
+    Only holds plain data so it can be handed to a thread or process pool.
+
+    Attributes:
+        canvas_width: Width of the tag display in pixels
+        canvas_height: Height of the tag display in pixels
+        accent_color: Accent color of the display (red/yellow)
+        background: Background color name
+        rotate: Rotation of the final image in degrees
+        payload: Resolved list of element dictionaries
+        font_dirs: Font directories to search, in order
+        history: Plot history per element index
+        errors: Error message per element index, from resolving the payload
+    """
+    canvas_width: int
+    canvas_height: int
+    accent_color: str
+    background: str
+    rotate: int
+    payload: List[Dict[str, Any]]
+    font_dirs: List[str]
+    history: Dict[int, Dict[str, Any]] = field(default_factory=dict)
+    errors: Dict[int, str] = field(default_factory=dict)
+
+
 class FontManager:
     """Class for managing font loading, caching and path resolution.
 
@@ -295,12 +327,13 @@ class FontManager:
     for when requested fonts are not available.
     """
 
-    def __init__(self, hass: HomeAssistant, entry=None):
+    def __init__(self, hass: HomeAssistant | None, entry=None, font_dirs: List[str] | None = None):
         """Initialize the font manager.
 
         Args:
             hass: Home Assistant instance for config path resolution
             entry: Config entry for accessing user-configured font directories
+            font_dirs: Already resolved font directories, used by render workers
         """
         self._hass = hass
         self._entry = entry
@@ -309,7 +342,10 @@ class FontManager:
 
         # Standard font directories to search
         self._font_dirs = []
-        self._setup_font_dirs()
+        if font_dirs is not None:
+            self._font_dirs = list(font_dirs)
+        else:
+            self._setup_font_dirs()
 
         # Default font names
         self._default_fonts = ["ppb.ttf", "rbm.ttf"]
@@ -370,6 +406,33 @@ class FontManager:
         Raises:
             HomeAssistantError: If no font could be loaded
         """
+        self._refresh_font_dirs()
+
+        # Create cache key (font name, size)
+        cache_key = (font_name, size)
+
+        # Return cached font if available
+        if cache_key in self._font_cache:
+            return self._font_cache[cache_key]
+
+        # Load font from file
+        font = self._load_font(font_name, size)
+
+        # Cache font
+        self._font_cache[cache_key] = font
+        return font
+
+    def get_font_dirs(self) -> List[str]:
+        """Get the font directories to search, in order.
+
+        Returns:
+            List of directory paths, including the configured custom directories
+        """
+        self._refresh_font_dirs()
+        return list(self._font_dirs)
+
+    def _refresh_font_dirs(self) -> None:
+        """Reload the font directories if the custom directories option changed."""
         # Check if config has changed since last load
         if self._entry:
             custom_dirs_str = self._entry.options.get("custom_font_dirs", "")
@@ -393,20 +456,6 @@ class FontManager:
                 # Update known dirs
                 self._known_dirs = current_dirs
 
-        # Create cache key (font name, size)
-        cache_key = (font_name, size)
-
-        # Return cached font if available
-        if cache_key in self._font_cache:
-            return self._font_cache[cache_key]
-
-        # Load font from file
-        font = self._load_font(font_name, size)
-
-        # Cache font
-        self._font_cache[cache_key] = font
-        return font
-
     def get_available_fonts(self) -> List[str]:
         """Get list of available font names from all directories.
 
@@ -559,12 +608,10 @@ class ImageGen:
     """Handles custom image generation for ESLs.
 
     This is the core class of the module, responsible for generating images
-    for electronic shelf labels (ESLs). It provides methods for drawing various
-    elements like text, shapes, images, etc., and combines them into a final image.
-
-    The class supports a variety of element types, each with its own drawing method,
-    and handles the common aspects of image generation such as tag information retrieval,
-    element validation, and drawing coordination.
+    for electronic shelf labels (ESLs). It handles the parts of image generation
+    that need Home Assistant, such as tag information retrieval, resolving image
+    entities and fetching plot history, and hands the drawing of the elements to
+    an ImageRenderer running in the render worker pool.
     """
 
     def __init__(self, hass: HomeAssistant):
@@ -583,32 +630,14 @@ class ImageGen:
 
         # Load font manager
         self._entry = None
+        self._hub = None
         if DOMAIN in hass.data and hass.data[DOMAIN]:
             entry_id = list(hass.data[DOMAIN].keys())[0]
-            self._entry = hass.data[DOMAIN][entry_id].entry
+            self._hub = hass.data[DOMAIN][entry_id]
+            self._entry = self._hub.entry
 
         self._font_manager = FontManager(self.hass, self._entry)
 
-        # Initialize handler mapping
-        self._draw_handlers = {
-            ElementType.TEXT: self._draw_text,
-            ElementType.MULTILINE: self._draw_multiline,
-            ElementType.LINE: self._draw_line,
-            ElementType.RECTANGLE: self._draw_rectangle,
-            ElementType.RECTANGLE_PATTERN: self._draw_rectangle_pattern,
-            ElementType.POLYGON: self._draw_polygon,
-            ElementType.CIRCLE: self._draw_circle,
-            ElementType.ELLIPSE: self._draw_ellipse,
-            ElementType.ARC: self._draw_arc,
-            ElementType.ICON: self._draw_icon,
-            ElementType.DLIMG: self._draw_downloaded_image,
-            ElementType.QRCODE: self._draw_qrcode,
-            ElementType.PLOT: self._draw_plot,
-            ElementType.PROGRESS_BAR: self._draw_progress_bar,
-            ElementType.DIAGRAM: self._draw_diagram,
-            ElementType.ICON_SEQUENCE: self._draw_icon_sequence,
-            ElementType.DEBUG_GRID: self._draw_debug_grid
-        }
 
     async def get_tag_info(self, entity_id: str) -> Optional[tuple[TagType, str]]:
         """Get tag type information for an entity.
@@ -698,6 +727,260 @@ class ImageGen:
                 ) from e
             raise
 
+    async def generate_custom_image(
+            self,
+            entity_id: str,
+            service_data: Dict[str, Any],
+            error_collector: list = None
+    ) -> bytes:
+        """Generate a custom image based on service data.
+
+        Main entry point for image generation. Resolves the entity references
+        and plot history of the payload on the event loop, then renders the
+        image and encodes the JPEG in the render worker pool of the hub.
+
+        Args:
+            entity_id: The entity ID to generate the image for
+            service_data: Service data containing image parameters and payload
+            error_collector: Optional list to collect error messages
+
+        Returns:
+            bytes: JPEG image data
+
+        Raises:
+            HomeAssistantError: If image generation fails
+        """
+
+        error_collector = error_collector if error_collector is not None else []
+
+        tag_type, accent_color = await self.get_tag_info(entity_id)
+        if not tag_type:
+            raise HomeAssistantError("Failed to get tag type information")
+
+        job = RenderJob(
+            canvas_width=tag_type.width,
+            canvas_height=tag_type.height,
+            accent_color=accent_color,
+            background=service_data.get("background", "white"),
+            rotate=service_data.get("rotate", 0),
+            payload=[],
+            font_dirs=self._font_manager.get_font_dirs(),
+        )
+        await self._resolve_payload(job, service_data.get("payload", []))
+
+        # Reuse the last image of the tag if it was rendered from the same input
+        render_cache = self._hub.render_cache if self._hub else None
+        render_key = self._get_render_key(job, tag_type)
+        if render_cache and render_key:
+            image_data = await render_cache.async_get_image(entity_id, render_key)
+            if image_data is not None:
+                _LOGGER.debug("Payload unchanged for %s, using cached image", entity_id)
+                return image_data
+
+        executor = self._hub.render_executor if self._hub else None
+        image_data, errors = await self.hass.loop.run_in_executor(executor, render_custom_image, job)
+        error_collector.extend(errors)
+
+        # Images with element errors are rendered again, to report the errors
+        if render_cache:
+            await render_cache.async_set_image(entity_id, None if errors else render_key, image_data)
+
+        # Save files in executor
+        async def save_files():
+            """Save generated image to web directory."""
+            web_path = get_image_path(self.hass, entity_id)
+
+            # Ensure directory exists
+            os.makedirs(os.path.dirname(web_path), exist_ok=True)
+
+            def _save_file():
+                with open(web_path, 'wb') as f:
+                    f.write(image_data)
+
+            await self.hass.async_add_executor_job(_save_file)
+            async_dispatcher_send(self.hass, f"{SIGNAL_TAG_IMAGE_UPDATE}_{entity_id.split('.')[1].upper()}", False)
+
+        # Start saving files in the background
+        self.hass.async_create_task(save_files())
+
+        return image_data
+
+    @staticmethod
+    def _get_render_key(job: RenderJob, tag_type: TagType) -> str | None:
+        """Get the render cache key of a render job.
+
+        Covers the tag type, rotation, resolved payload and fetched plot
+        history. The time range of a plot follows the current time, so only
+        the recorded states are part of the key, without the time of the first
+        state of each entity: the recorder gives the start of the range as the
+        time of the state at the start. Payloads with images from a URL or
+        file are not cached, as their content can change without the payload
+        changing.
+
+        Args:
+            job: Render job with the resolved payload
+            tag_type: Tag type the image is rendered for
+
+        Returns:
+            str: Render key, None if the job cannot be cached
+        """
+        for element in job.payload:
+            if element.get("type") == ElementType.DLIMG and not str(element.get("url", "")).startswith("data:"):
+                return None
+        history = {
+            index: {
+                entity: [{"state": states[0]["state"]}, *states[1:]] if states else []
+                for entity, states in plot_history["states"].items()
+            }
+            for index, plot_history in job.history.items()
+        }
+        return get_render_key({
+            "tag_type": getattr(tag_type, "type_id", None),
+            "job": asdict(replace(job, history={})),
+            "history": history,
+        })
+
+    async def _resolve_payload(self, job: RenderJob, payload: List[Dict[str, Any]]) -> None:
+        """Resolve the parts of the payload that need Home Assistant.
+
+        Image entities are replaced by their picture URL, relative image paths
+        by their path in the media directory and the history of plots is
+        fetched from the recorder. Errors are kept per element so they are
+        reported the same way as rendering errors.
+
+        Args:
+            job: Render job to fill with the resolved payload
+            payload: Element dictionaries from the service call
+        """
+        for i, element in enumerate(payload):
+            element = dict(element)
+            job.payload.append(element)
+            if not ImageRenderer.should_show_element(element):
+                continue
+            element_type = element.get("type")
+            try:
+                if element_type == ElementType.DLIMG and "url" in element:
+                    element["url"] = self._resolve_image_url(element["url"])
+                elif element_type == ElementType.PLOT and "data" in element:
+                    job.history[i] = await self._fetch_plot_history(element)
+            except Exception as e:
+                if element_type == ElementType.DLIMG:
+                    job.errors[i] = f"Failed to process image: {str(e)}"
+                else:
+                    job.errors[i] = f"Failed to draw plot: {str(e)}"
+
+    def _resolve_image_url(self, url: str) -> str:
+        """Resolve an image entity or relative media path of a dlimg element.
+
+        Args:
+            url: Image URL, entity ID, data URI or file path
+
+        Returns:
+            str: URL, data URI or absolute file path of the image
+
+        Raises:
+            HomeAssistantError: If the image entity or its picture is not found
+        """
+        # Check if URL is an image entity
+        if url.startswith('image.') or url.startswith('camera.'):
+            # Get state of the image entity
+            state = self.hass.states.get(url)
+            if not state:
+                raise HomeAssistantError(f"Image entity {url} not found")
+
+            # Get image URL from entity attributes
+            image_url = state.attributes.get("entity_picture")
+            if not image_url:
+                raise HomeAssistantError(f"No image URL found for entity {url}")
+
+            # If the URL is relative, make it absolute using HA's base URL
+            if image_url.startswith("/"):
+                base_url = get_url(self.hass)
+                image_url = f"{base_url}{image_url}"
+            return image_url
+
+        if url.startswith(('http://', 'https://', 'data:', '/')):
+            return url
+        return os.path.join(self.hass.config.path('media'), url)
+
+    async def _fetch_plot_history(self, element: dict) -> Dict[str, Any]:
+        """Fetch the recorded states of the entities of a plot element.
+
+        Args:
+            element: Element dictionary with plot properties
+
+        Returns:
+            dict: Time range of the plot and the states per entity, as plain
+            dictionaries with state and last_changed
+        """
+        duration = timedelta(seconds=element.get("duration", 60 * 60 * 24))
+        end = dt.now()
+        start = end - duration
+
+        # Fetch sensor data
+        all_states = await get_instance(self.hass).async_add_executor_job(partial(get_significant_states,
+                                                                                  self.hass,
+                                                                                  start_time=start,
+                                                                                  entity_ids=[plot["entity"] for
+                                                                                              plot in
+                                                                                              element["data"]],
+                                                                                  significant_changes_only=False,
+                                                                                  minimal_response=True,
+                                                                                  no_attributes=False
+                                                                                  ))
+
+        # The first state is a full State object with a minimal response
+        states = {}
+        for entity, entity_states in all_states.items():
+            states[entity] = [
+                state if isinstance(state, dict) else {
+                    "state": state.state,
+                    "last_changed": str(state.last_changed)
+                }
+                for state in entity_states
+            ]
+        return {"start": start, "end": end, "states": states}
+
+
+class ImageRenderer:
+    """Renders a drawcustom payload into a JPEG image.
+
+    Holds no reference to Home Assistant: everything the drawing methods need
+    comes from the RenderJob, so rendering can run in a worker thread or
+    process while the event loop keeps running.
+    """
+
+    def __init__(self, job: RenderJob):
+        """Initialize the renderer for one render job.
+
+        Args:
+            job: Render job with the resolved payload and fetched history
+        """
+        self._job = job
+        self._font_manager = _get_render_font_manager(job.font_dirs)
+        self._element_index = 0
+
+        # Initialize handler mapping
+        self._draw_handlers = {
+            ElementType.TEXT: self._draw_text,
+            ElementType.MULTILINE: self._draw_multiline,
+            ElementType.LINE: self._draw_line,
+            ElementType.RECTANGLE: self._draw_rectangle,
+            ElementType.RECTANGLE_PATTERN: self._draw_rectangle_pattern,
+            ElementType.POLYGON: self._draw_polygon,
+            ElementType.CIRCLE: self._draw_circle,
+            ElementType.ELLIPSE: self._draw_ellipse,
+            ElementType.ARC: self._draw_arc,
+            ElementType.ICON: self._draw_icon,
+            ElementType.DLIMG: self._draw_downloaded_image,
+            ElementType.QRCODE: self._draw_qrcode,
+            ElementType.PLOT: self._draw_plot,
+            ElementType.PROGRESS_BAR: self._draw_progress_bar,
+            ElementType.DIAGRAM: self._draw_diagram,
+            ElementType.ICON_SEQUENCE: self._draw_icon_sequence,
+            ElementType.DEBUG_GRID: self._draw_debug_grid
+        }
+
     @staticmethod
     def get_index_color(color: Optional[str], accent_color: str = "red") -> tuple[int, int, int, int] | None:
         """Convert color name to RGBA tuple.
@@ -772,52 +1055,27 @@ class ImageGen:
                 f"Missing required argument(s) '{', '.join(missing)}' for {element_type}"
             )
 
-    async def generate_custom_image(
-            self,
-            entity_id: str,
-            service_data: Dict[str, Any],
-            error_collector: list = None
-    ) -> bytes:
-        """Generate a custom image based on service data.
-
-        Main entry point for image generation. Creates an image with the
-        specified elements and returns the JPEG data.
-
-        Args:
-            entity_id: The entity ID to generate the image for
-            service_data: Service data containing image parameters and payload
-            error_collector: Optional list to collect error messages
+    def render(self) -> tuple[bytes, list[str]]:
+        """Render all elements of the payload.
 
         Returns:
-            bytes: JPEG image data
-
-        Raises:
-            HomeAssistantError: If image generation fails
+            tuple: (JPEG image data, list of error messages per element)
         """
-
-        error_collector = error_collector if error_collector is not None else []
-
-        tag_type, accent_color = await self.get_tag_info(entity_id)
-        if not tag_type:
-            raise HomeAssistantError("Failed to get tag type information")
-
-        # Get canvas dimensions from tag type
-        canvas_width = tag_type.width
-        canvas_height = tag_type.height
+        job = self._job
+        error_collector = []
 
         # Get rotation and create base image
-        rotate = service_data.get("rotate", 0)
+        rotate = job.rotate
         if rotate in (0, 180):
-            img = Image.new('RGBA', (canvas_width, canvas_height),
-                            color=self.get_index_color(service_data.get("background", "white"), accent_color))
+            img = Image.new('RGBA', (job.canvas_width, job.canvas_height),
+                            color=self.get_index_color(job.background, job.accent_color))
         else:
-            img = Image.new('RGBA', (canvas_height, canvas_width),
-                            color=self.get_index_color(service_data.get("background", "white"), accent_color))
+            img = Image.new('RGBA', (job.canvas_height, job.canvas_width),
+                            color=self.get_index_color(job.background, job.accent_color))
 
         pos_y = 0
-        payload = service_data.get("payload", [])
 
-        for i, element in enumerate(payload):
+        for i, element in enumerate(job.payload):
             if not self.should_show_element(element):
                 continue
 
@@ -825,10 +1083,15 @@ class ImageGen:
                 # Validate element and get its type
                 element_type = validate_element(element)
 
+                # Errors from resolving the element on the event loop
+                if i in job.errors:
+                    raise HomeAssistantError(job.errors[i])
+
                 # Get the appropriate handler and call it
                 handler = self._draw_handlers.get(element_type)
                 if handler:
-                    pos_y = await handler(img, element, pos_y)
+                    self._element_index = i
+                    pos_y = handler(img, element, pos_y)
                 else:
                     error_msg = f"No handler found for element type: {element_type}"
                     _LOGGER.warning(error_msg)
@@ -855,29 +1118,9 @@ class ImageGen:
         # Create BytesIO object for the JPEG data
         img_byte_arr = io.BytesIO()
         rgb_image.save(img_byte_arr, format='JPEG', quality="maximum")
-        image_data = img_byte_arr.getvalue()
-
-        # Save files in executor
-        async def save_files():
-            """Save generated image to web directory."""
-            web_path = get_image_path(self.hass, entity_id)
-
-            # Ensure directory exists
-            os.makedirs(os.path.dirname(web_path), exist_ok=True)
-
-            def _save_file():
-                with open(web_path, 'wb') as f:
-                    f.write(image_data)
-
-            await self.hass.async_add_executor_job(_save_file)
-            async_dispatcher_send(self.hass, f"{SIGNAL_TAG_IMAGE_UPDATE}_{entity_id.split('.')[1].upper()}", False)
-
-        # Start saving files in the background
-        self.hass.async_create_task(save_files())
-
-        return image_data
+        return img_byte_arr.getvalue(), error_collector
 
-    async def _draw_text(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_text(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw (coloured) text with optional wrapping or ellipsis.
 
         Renders text with support for multiple formatting options:
@@ -1114,7 +1357,7 @@ class ImageGen:
 
         return segments, total_width
 
-    async def _draw_multiline(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_multiline(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw multiline text with delimiter.
 
         Renders multiple lines of text separated by a delimiter character.
@@ -1198,7 +1441,7 @@ class ImageGen:
 
         return max_y
 
-    async def _draw_line(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_line(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw line element.
 
      Renders a straight line between two points, with options for color,
@@ -1363,7 +1606,7 @@ class ImageGen:
 
         return result[0], result[1], result[2], result[3]
 
-    async def _draw_rectangle(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_rectangle(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw rectangle element.
 
         Renders a rectangle with options for fill, outline, and rounded corners.
@@ -1412,7 +1655,7 @@ class ImageGen:
 
         return y_end
 
-    async def _draw_rectangle_pattern(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_rectangle_pattern(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw repeated rectangle pattern.
 
         Renders a grid of rectangles with consistent spacing, useful for
@@ -1469,7 +1712,7 @@ class ImageGen:
 
         return max_y
 
-    async def _draw_polygon(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_polygon(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw a polygon.
 
         Renders a polygon defined by a list of vertex coordinates.
@@ -1503,7 +1746,7 @@ class ImageGen:
 
         return pos_y
 
-    async def _draw_circle(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_circle(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw circle element.
 
         Renders a circle with options for fill and outline.
@@ -1544,7 +1787,7 @@ class ImageGen:
 
         return y + element['radius']
 
-    async def _draw_ellipse(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_ellipse(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw ellipse element.
 
         Renders an ellipse with options for fill and outline.
@@ -1587,7 +1830,7 @@ class ImageGen:
 
         return y_end
 
-    async def _draw_arc(self, img: Image, element: dict, pos_y: int):
+    def _draw_arc(self, img: Image, element: dict, pos_y: int):
         """Draw an arc or pie slice.
 
         Renders an arc (outline) or pie slice (filled) based on center point,
@@ -1652,7 +1895,7 @@ class ImageGen:
 
         return pos_y
 
-    async def _draw_icon(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_icon(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw Material Design Icons.
 
         Renders an icon from the Material Design Icons font at the specified
@@ -1688,11 +1931,7 @@ class ImageGen:
         meta_file = os.path.join(os.path.dirname(__file__), "materialdesignicons-webfont_meta.json")
 
         try:
-            def load_meta():
-                with open(meta_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-
-            mdi_data = await self.hass.async_add_executor_job(load_meta)
+            mdi_data = _load_mdi_meta(meta_file)
         except Exception as e:
             raise HomeAssistantError(f"Failed to load MDI metadata: {str(e)}")
 
@@ -1719,10 +1958,7 @@ class ImageGen:
             raise HomeAssistantError(f"Invalid icon name: {icon_name}")
 
         # Get icon properties
-        def load_font():
-            return ImageFont.truetype(font_file, element['size'])
-
-        font = await self.hass.async_add_executor_job(load_font)
+        font = ImageFont.truetype(font_file, element['size'])
         anchor = element.get('anchor', "la")
         fill = self.get_index_color(
             element.get('color') or element.get('fill', "black")
@@ -1753,7 +1989,7 @@ class ImageGen:
         )
         return bbox[3]
 
-    async def _draw_icon_sequence(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_icon_sequence(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw a sequence of icons in a specified direction.
 
         Renders multiple icons in a sequence with consistent spacing,
@@ -1796,19 +2032,12 @@ class ImageGen:
         meta_file = os.path.join(os.path.dirname(__file__), "materialdesignicons-webfont_meta.json")
 
         try:
-            def load_meta():
-                with open(meta_file, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-
-            mdi_data = await self.hass.async_add_executor_job(load_meta)
+            mdi_data = _load_mdi_meta(meta_file)
         except Exception as e:
             raise HomeAssistantError(f"Failed to load MDI metadata: {str(e)}")
 
         # Load font
-        def load_font():
-            return ImageFont.truetype(font_file, size)
-
-        font = await self.hass.async_add_executor_job(load_font)
+        font = ImageFont.truetype(font_file, size)
 
         max_y = y_start
         max_x = x_start
@@ -1875,7 +2104,7 @@ class ImageGen:
 
         return max(max_y, current_y)
 
-    async def _draw_qrcode(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_qrcode(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw QR code element.
 
         Generates and renders a QR code with the specified data and properties.
@@ -1938,7 +2167,7 @@ class ImageGen:
         except Exception as e:
             raise HomeAssistantError(f"Failed to generate QR code: {str(e)}")
 
-    async def _draw_downloaded_image(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_downloaded_image(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw downloaded or local image.
 
         Downloads and renders an image from a URL, or loads and renders
@@ -1969,31 +2198,10 @@ class ImageGen:
             rotate = element.get('rotate', 0)
             resize_method = element.get('resize_method', 'stretch')
 
-            # Check if URL is an image entity
-            if element['url'].startswith('image.') or element['url'].startswith('camera.'):
-                # Get state of the image entity
-                state = self.hass.states.get(element['url'])
-                if not state:
-                    raise HomeAssistantError(f"Image entity {element['url']} not found")
-
-                # Get image URL from entity attributes
-                image_url = state.attributes.get("entity_picture")
-                if not image_url:
-                    raise HomeAssistantError(f"No image URL found for entity {element['url']}")
-
-                # If the URL is relative, make it absolute using HA's base URL
-                if image_url.startswith("/"):
-                    base_url = get_url(self.hass)
-                    image_url = f"{base_url}{image_url}"
-
-                # Update URL to the actual image URL
-                element['url'] = image_url
-
             # Load image based on URL type
             if element['url'].startswith(('http://', 'https://')):
                 # Download web image
-                response = await self.hass.async_add_executor_job(
-                    requests.get, element['url'])
+                response = requests.get(element['url'])
                 if response.status_code != 200:
                     raise HomeAssistantError(f"Failed to download image: HTTP {response.status_code}")
                 source_img = Image.open(io.BytesIO(response.content))
@@ -2011,13 +2219,8 @@ class ImageGen:
                     raise HomeAssistantError(f"Invalid data URI: {str(e)}")
 
             else:
-                # Handle local file
-                if not element['url'].startswith('/'):
-                    media_path = self.hass.config.path('media')
-                    full_path = os.path.join(media_path, element['url'])
-                else:
-                    full_path = element['url']
-                source_img = await self.hass.async_add_executor_job(Image.open, full_path)
+                # Handle local file, relative paths were resolved to the media directory
+                source_img = Image.open(element['url'])
 
             # Process image
             if rotate:
@@ -2049,14 +2252,15 @@ class ImageGen:
         except Exception as e:
             raise HomeAssistantError(f"Failed to process image: {str(e)}")
 
-    async def _draw_plot(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_plot(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw plot of Home Assistant sensor data.
 
         Creates a line plot visualization of historical data from Home Assistant
         entities with customizable axes, legends, and styling.
 
-        This is one of the most complex drawing methods, handling data retrieval,
-        scaling, and rendering of multiple data series and plot components.
+        This is one of the most complex drawing methods, handling the history
+        fetched for the element, scaling, and rendering of multiple data series
+        and plot components.
 
         Args:
             img: PIL Image to draw on
@@ -2086,10 +2290,12 @@ class ImageGen:
             width = x_end - x_start + 1
             height = y_end - y_start + 1
 
-            # Get time range
+            # Get time range, as used to fetch the history
+            history = self._job.history[self._element_index]
             duration = timedelta(seconds=element.get("duration", 60 * 60 * 24))
-            end = dt.now()
-            start = end - duration
+            end = history["end"]
+            start = history["start"]
+            all_states = history["states"]
 
             # Set up font
             font_name = element.get("font", "ppb.ttf")
@@ -2098,18 +2304,6 @@ class ImageGen:
             min_v = element.get("low")
             max_v = element.get("high")
 
-            # Fetch sensor data
-            all_states = await get_instance(self.hass).async_add_executor_job(partial(get_significant_states,
-                                                                                      self.hass,
-                                                                                      start_time=start,
-                                                                                      entity_ids=[plot["entity"] for
-                                                                                                  plot in
-                                                                                                  element["data"]],
-                                                                                      significant_changes_only=False,
-                                                                                      minimal_response=True,
-                                                                                      no_attributes=False
-                                                                                      ))
-
             # Process data and find min/max if not specified
             raw_data = []
             for plot in element["data"]:
@@ -2117,11 +2311,6 @@ class ImageGen:
                     raise HomeAssistantError(f"No recorded data found for {plot['entity']}")
 
                 states = all_states[plot["entity"]]
-                state_obj = states[0]
-                states[0] = {
-                    "state": state_obj.state,
-                    "last_changed": str(state_obj.last_changed)
-                }
 
                 # Convert states to points
                 points = []
@@ -2697,7 +2886,7 @@ class ImageGen:
         except Exception as e:
             raise HomeAssistantError(f"Failed to draw plot: {str(e)}")
 
-    async def _draw_progress_bar(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_progress_bar(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw progress bar with optional percentage text.
 
         Renders a progress bar to visualize a percentage value, with options
@@ -2813,7 +3002,7 @@ class ImageGen:
 
         return y_end
 
-    async def _draw_diagram(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_diagram(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw diagram with optional bars.
 
         Renders a basic diagram with axes and optional bar chart elements.
@@ -2914,7 +3103,7 @@ class ImageGen:
 
         return pos_y + height
 
-    async def _draw_debug_grid(self, img: Image, element: dict, pos_y: int) -> int:
+    def _draw_debug_grid(self, img: Image, element: dict, pos_y: int) -> int:
         """Draw debug grid for layout assistance.
 
         Renders a grid with optional coordinate labels to help with positioning
@@ -2979,3 +3168,49 @@ class ImageGen:
                 draw.text((x + 2, 2), label_text, fill=label_color, font=font)
 
         return pos_y
+
+
+_render_local = threading.local()
+
+
+def _get_render_font_manager(font_dirs: List[str]) -> FontManager:
+    """Get the font manager of the current render worker.
+
+    Font objects are not shared between workers, each thread (or process)
+    keeps its own cache per list of font directories.
+
+    Args:
+        font_dirs: Font directories to search, in order
+
+    Returns:
+        FontManager: Font manager for these directories
+    """
+    managers = getattr(_render_local, "font_managers", None)
+    if managers is None:
+        managers = _render_local.font_managers = {}
+    key = tuple(font_dirs)
+    if key not in managers:
+        managers[key] = FontManager(None, font_dirs=font_dirs)
+    return managers[key]
+
+
+@lru_cache(maxsize=1)
+def _load_mdi_meta(meta_file: str) -> list:
+    """Load the Material Design Icons metadata, once per worker."""
+    with open(meta_file, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def render_custom_image(job: RenderJob) -> tuple[bytes, list[str]]:
+    """Render a drawcustom payload into a JPEG image.
+
+    Pure function of the render job, meant to run in a worker pool. Drawing,
+    text layout and the JPEG encoding all happen here, off the event loop.
+
+    Args:
+        job: Render job with the resolved payload and fetched history
+
+    Returns:
+        tuple: (JPEG image data, list of error messages per element)
+    """
+    return ImageRenderer(job).render()
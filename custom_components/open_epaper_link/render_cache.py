@@ -0,0 +1,178 @@
+"""Render cache for the drawcustom service.
+
+Remembers per tag the last rendered image with the key of what it was
+rendered from, and the last image uploaded to the AP. This allows the
+drawcustom service to reuse the image when the resolved payload did not
+change, and to skip the upload when the tag already shows the image.
+"""
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+from typing import Any, Final
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+
+from .const import DOMAIN
+from .util import get_image_path
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+STORAGE_KEY = f"{DOMAIN}_render_cache"
+SAVE_DELAY = 10
+
+
+def get_render_key(render_input: dict[str, Any]) -> str:
+    """Return the content hash of everything an image is rendered from.
+
+    Args:
+        render_input: Tag type, rotation, resolved payload and fetched data
+
+    Returns:
+        str: SHA-256 hex digest of the canonical JSON of the input
+    """
+    canonical = json.dumps(render_input, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def get_upload_key(image_data: bytes, dither: int, preload_type: int = 0, preload_lut: int = 0) -> str:
+    """Return the hash identifying an upload of an image to a tag.
+
+    The upload parameters changing what the tag shows are part of the key,
+    so the same image with another dither mode is uploaded again.
+
+    Args:
+        image_data: JPEG image data
+        dither: Dithering mode
+        preload_type: Type for image preloading (0=disabled)
+        preload_lut: Look-up table for preloading
+
+    Returns:
+        str: SHA-256 hex digest of the image and upload parameters
+    """
+    digest = hashlib.sha256(image_data)
+    digest.update(f":{dither}:{preload_type}:{preload_lut}".encode("utf-8"))
+    return digest.hexdigest()
+
+
+class RenderCache:
+    """Last rendered and uploaded image per tag.
+
+    The keys and hashes are kept in Home Assistant storage, the JPEG itself
+    is the tag image file in www/open_epaper_link written by ImageGen. Both
+    survive restarts, a cached image is only used if the file still has the
+    hash it was rendered with.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the render cache.
+
+        Args:
+            hass: Home Assistant instance
+        """
+        self._hass = hass
+        self._store = Store[dict[str, Any]](
+            hass, STORAGE_VERSION, STORAGE_KEY, private=True, atomic_writes=True
+        )
+        self._data: dict[str, dict[str, str]] | None = None
+        self._load_lock = asyncio.Lock()
+
+    async def _async_get_tags(self) -> dict[str, dict[str, str]]:
+        """Get the cache entries per tag MAC, loading them on first use."""
+        if self._data is None:
+            async with self._load_lock:
+                if self._data is None:
+                    stored = await self._store.async_load()
+                    self._data = (stored or {}).get("tags", {})
+        return self._data
+
+    def _schedule_save(self) -> None:
+        """Save the cache entries after a delay, batching updates."""
+        self._store.async_delay_save(lambda: {"tags": self._data}, SAVE_DELAY)
+
+    @staticmethod
+    def _tag_mac(entity_id: str) -> str:
+        return entity_id.split(".")[1].upper()
+
+    async def async_get_image(self, entity_id: str, render_key: str) -> bytes | None:
+        """Get the last rendered image of a tag if it was rendered from render_key.
+
+        Args:
+            entity_id: Entity ID of the tag
+            render_key: Render key of the current request
+
+        Returns:
+            bytes: JPEG image data, None if not cached
+        """
+        tags = await self._async_get_tags()
+        entry = tags.get(self._tag_mac(entity_id))
+        if not entry or entry.get("render_key") != render_key:
+            return None
+
+        image_path = get_image_path(self._hass, entity_id)
+
+        def _read_file() -> bytes | None:
+            if not os.path.exists(image_path):
+                return None
+            with open(image_path, "rb") as f:
+                return f.read()
+
+        image_data = await self._hass.async_add_executor_job(_read_file)
+        if image_data is None or hashlib.sha256(image_data).hexdigest() != entry.get("image_hash"):
+            _LOGGER.debug("Cached image of %s changed on disk, rendering again", entity_id)
+            return None
+        return image_data
+
+    async def async_set_image(self, entity_id: str, render_key: str, image_data: bytes) -> None:
+        """Remember the image rendered for a tag and what it was rendered from.
+
+        Args:
+            entity_id: Entity ID of the tag
+            render_key: Render key of the request, None if it cannot be cached
+            image_data: Rendered JPEG image data
+        """
+        tags = await self._async_get_tags()
+        entry = tags.setdefault(self._tag_mac(entity_id), {})
+        entry["render_key"] = render_key
+        entry["image_hash"] = hashlib.sha256(image_data).hexdigest()
+        self._schedule_save()
+
+    async def async_is_uploaded(self, entity_id: str, upload_key: str) -> bool:
+        """Check if the last successful upload to a tag had this upload key.
+
+        Args:
+            entity_id: Entity ID of the tag
+            upload_key: Upload key from get_upload_key
+
+        Returns:
+            bool: True if the tag already shows this image
+        """
+        tags = await self._async_get_tags()
+        entry = tags.get(self._tag_mac(entity_id))
+        return bool(entry) and entry.get("upload_key") == upload_key
+
+    async def async_set_uploaded(self, entity_id: str, upload_key: str) -> None:
+        """Remember the last successful upload to a tag.
+
+        Args:
+            entity_id: Entity ID of the tag
+            upload_key: Upload key from get_upload_key
+        """
+        tags = await self._async_get_tags()
+        tags.setdefault(self._tag_mac(entity_id), {})["upload_key"] = upload_key
+        self._schedule_save()
+
+    async def async_remove_tag(self, tag_mac: str) -> None:
+        """Forget the cached images of a tag.
+
+        Args:
+            tag_mac: MAC address of the tag
+        """
+        tags = await self._async_get_tags()
+        if tags.pop(tag_mac, None) is not None:
+            self._schedule_save()
@@ -2,19 +2,16 @@ from __future__ import annotations
 
 import asyncio
 import logging
-from datetime import datetime
 from typing import Final
 
-import async_timeout
 import requests
 
-from requests_toolbelt import MultipartEncoder
-
 from homeassistant.core import HomeAssistant, ServiceCall
 from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers import device_registry as dr
-from .const import DOMAIN
+from .const import CONF_SKIP_UNCHANGED_UPLOADS, DOMAIN
 from .imagegen import ImageGen
+from .render_cache import get_upload_key
 from .tag_types import get_tag_types_manager
 from .util import send_tag_cmd, reboot_ap
 
@@ -25,9 +22,6 @@ DITHER_FLOYD_STEINBERG = 1
 DITHER_ORDERED = 2
 DITHER_DEFAULT = DITHER_ORDERED
 
-MAX_RETRIES = 3
-INITIAL_BACKOFF = 2  # seconds
-
 
 def rgb_to_rgb332(rgb):
     """Convert RGB values to RGB332 format.
@@ -126,125 +120,6 @@ async def get_entity_id_from_device_id(hass: HomeAssistant, device_id: str) -> s
     return f"{DOMAIN}.{domain_mac[1].lower()}"
 
 
-class UploadQueueHandler:
-    """Handle queued image uploads to the AP.
-
-    Manages a queue of image upload tasks to prevent overwhelming the AP with concurrent requests.
-
-    Features include:
-
-    - Maximum concurrent upload limit
-    - Cooldown period between uploads
-    - Task tracking and status reporting
-
-    This helps maintain AP stability while processing multiple image requests from different parts of Home Assistant.
-    """
-
-    def __init__(self, max_concurrent: int = 1, cooldown: float = 1.0):
-        """Initialize the upload queue handler.
-
-        Args:
-            max_concurrent: Maximum number of concurrent uploads (default: 1)
-            cooldown: Cooldown period in seconds between uploads (default: 1.0)
-        """
-        self._queue = asyncio.Queue()
-        self._processing = False
-        self._max_concurrent = max_concurrent
-        self._cooldown = cooldown
-        self._active_uploads = 0
-        self._last_upload = None
-        self._lock = asyncio.Lock()
-
-    def __str__(self):
-        """Return queue status string."""
-        return f"Queue(active={self._active_uploads}, size={self._queue.qsize()})"
-
-    async def add_to_queue(self, upload_func, *args, **kwargs):
-        """Add an upload task to the queue.
-
-        Queues an upload function with its arguments for later execution.
-        Starts the queue processor if it's not already running.
-
-        Args:
-            upload_func: Async function that performs the actual upload
-            *args: Positional arguments to pass to the upload function
-            **kwargs: Keyword arguments to pass to the upload function
-        """
-
-        entity_id = next((arg for arg in args if isinstance(arg, str) and "." in arg), "unknown")
-
-        _LOGGER.debug("Adding upload task to queue for %s. %s", entity_id, self)
-        # Add task to queue
-        await self._queue.put((upload_func, args, kwargs))
-
-        # Start processing queue if not already running
-        if not self._processing:
-            _LOGGER.debug("Starting upload queue processor for %s", entity_id)
-            asyncio.create_task(self._process_queue())
-
-    async def _process_queue(self):
-        """Process queued upload tasks.
-
-        Long-running task that processes the upload queue, respecting:
-
-        - Maximum concurrent upload limit
-        - Cooldown period between uploads
-
-        Handles errors in individual uploads without stopping queue processing.
-        This method runs until the queue is empty, then terminates.
-        """
-        self._processing = True
-        _LOGGER.debug("Upload queue processor started. %s", self)
-
-        try:
-            while not self._queue.empty():
-                async with self._lock:
-                    # Check if the upload limit has been reached
-                    if self._active_uploads >= self._max_concurrent:
-                        _LOGGER.debug("Hit concurrent upload limit (%d). Waiting...", self._max_concurrent)
-                        await asyncio.sleep(0.1)
-                        continue
-
-                    # Check cooldown period
-                    if self._last_upload:
-                        elapsed = (datetime.now() - self._last_upload).total_seconds()
-                        if elapsed < self._cooldown:
-                            _LOGGER.debug("In cooldown period (%.1f seconds remaining)",
-                                          self._cooldown - elapsed)
-                            await asyncio.sleep(self._cooldown - elapsed)
-
-                    # Get next task from queue
-                    upload_func, args, kwargs = await self._queue.get()
-
-                    entity_id = next((arg for arg in args if isinstance(arg, str) and "." in arg), "unknown")
-
-                    try:
-                        # Increment active uploads counter
-                        self._active_uploads += 1
-                        _LOGGER.debug("Starting upload for %s. %s", entity_id, self)
-
-                        # Perform upload
-                        _LOGGER.debug("Starting queued upload task")
-                        start_time = datetime.now()
-                        await upload_func(*args, **kwargs)
-                        duration = (datetime.now() - start_time).total_seconds()
-
-                        # Update last upload timestamp
-                        self._last_upload = datetime.now()
-                        _LOGGER.debug("Upload completed for %s in %.1f seconds", entity_id, duration)
-
-                    except Exception as err:
-                        _LOGGER.error("Error processing queued upload for %s: %s", entity_id, str(err))
-                    finally:
-                        # Decrement active upload counter
-                        self._active_uploads -= 1
-                        # Mark task as done
-                        self._queue.task_done()
-                        _LOGGER.debug("Upload task for %s finished. %s", entity_id, self)
-        finally:
-            self._processing = False
-
-
 async def async_setup_services(hass: HomeAssistant) -> None:
     """Set up the OpenEPaperLink services.
 
@@ -263,8 +138,6 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         hass: Home Assistant instance
     """
 
-    upload_queue = UploadQueueHandler(max_concurrent=1, cooldown=1.0)
-
     async def get_hub():
         """Get the hub instance from Home Assistant data.
 
@@ -333,54 +206,78 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         generator = ImageGen(hass)
         errors = []
 
-        # Process each device
-        for device_id in device_ids:
+        async def generate(device_id: str) -> tuple[str | None, bytes | None, list, str | None]:
+            """Generate the image of one device, rendered in the worker pool.
+
+            Returns the entity ID, image data, element errors and the error
+            message if the device could not be processed.
+            """
             device_errors = []
             try:
                 # Get entity ID from device ID
                 entity_id = await get_entity_id_from_device_id(hass, device_id)
-                _LOGGER.debug("Processing device_id: %s (entity_id: %s)", device_id, entity_id)
-
-                try:
-                    # Generate image
-                    image_data = await generator.generate_custom_image(
-                        entity_id=entity_id,
-                        service_data=service.data,
-                        error_collector=device_errors
-                    )
+            except Exception as err:
+                return None, None, device_errors, f"Failed to process device {device_id}: {str(err)}"
+            _LOGGER.debug("Processing device_id: %s (entity_id: %s)", device_id, entity_id)
 
-                    if device_errors:
-                        errors.extend([f"Device {entity_id}: {err}" for err in device_errors])
-                        _LOGGER.warning(
-                            "Completed with warnings for device %s:\n%s",
-                            device_id,
-                            "\n".join(device_errors)
-                        )
+            try:
+                # Generate image
+                image_data = await generator.generate_custom_image(
+                    entity_id=entity_id,
+                    service_data=service.data,
+                    error_collector=device_errors
+                )
+            except Exception as err:
+                return entity_id, None, device_errors, f"Error processing device {entity_id}: {str(err)}"
+            return entity_id, image_data, device_errors, None
 
-                    if service.data.get("dry-run", False):
-                        _LOGGER.info("Dry run completed for %s", entity_id)
-                        continue
+        # Render all devices concurrently, then queue the uploads in order
+        results = await asyncio.gather(*(generate(device_id) for device_id in device_ids))
+
+        # Process each device
+        for device_id, (entity_id, image_data, device_errors, error_msg) in zip(device_ids, results):
+            if error_msg:
+                errors.append(error_msg)
+                _LOGGER.error(error_msg)
+                continue
+
+            try:
+                if device_errors:
+                    errors.extend([f"Device {entity_id}: {err}" for err in device_errors])
+                    _LOGGER.warning(
+                        "Completed with warnings for device %s:\n%s",
+                        device_id,
+                        "\n".join(device_errors)
+                    )
+
+                if service.data.get("dry-run", False):
+                    _LOGGER.info("Dry run completed for %s", entity_id)
+                    continue
 
-                    # Queue the upload
-                    await upload_queue.add_to_queue(
-                        upload_image,
-                        hub,
-                        entity_id,
+                # Skip the upload if the tag already shows this image
+                if hub.entry.options.get(CONF_SKIP_UNCHANGED_UPLOADS, False):
+                    upload_key = get_upload_key(
                         image_data,
                         service.data.get("dither", DITHER_DEFAULT),
-                        service.data.get("ttl", 60),
                         service.data.get("preload_type", 0),
                         service.data.get("preload_lut", 0)
                     )
+                    if await hub.render_cache.async_is_uploaded(entity_id, upload_key):
+                        _LOGGER.info("Image unchanged for %s, skipping upload", entity_id)
+                        continue
 
-                except Exception as err:
-                    error_msg = f"Error processing device {entity_id}: {str(err)}"
-                    errors.append(error_msg)
-                    _LOGGER.error(error_msg)
-                    continue
+                # Queue the upload
+                await hub.upload_queue.add_to_queue(
+                    entity_id,
+                    image_data,
+                    service.data.get("dither", DITHER_DEFAULT),
+                    service.data.get("ttl", 60),
+                    service.data.get("preload_type", 0),
+                    service.data.get("preload_lut", 0)
+                )
 
             except Exception as err:
-                error_msg = f"Failed to process device {device_id}: {str(err)}"
+                error_msg = f"Error processing device {entity_id}: {str(err)}"
                 errors.append(error_msg)
                 _LOGGER.error(error_msg)
                 continue
@@ -388,88 +285,6 @@ async def async_setup_services(hass: HomeAssistant) -> None:
         if errors:
             raise HomeAssistantError("\n".join(errors))
 
-    async def upload_image(hub, entity_id: str, img: bytes, dither: int, ttl: int,
-                           preload_type: int = 0, preload_lut: int = 0) -> None:
-        """Upload image to tag through AP.
-
-        Sends an image to the AP for display on a specific tag using
-        multipart/form-data POST request. Configures display parameters
-        such as dithering, TTL, and optional preloading.
-
-        Will retry upload on timeout, with increasing backoff times
-
-        Args:
-            hub: Hub instance with connection details
-            entity_id: Entity ID of the target tag
-            img: JPEG image data as bytes
-            dither: Dithering mode (0=none, 1=Floyd-Steinberg, 2=ordered)
-            ttl: Time-to-live in seconds
-            preload_type: Type for image preloading (0=disabled)
-            preload_lut: Look-up table for preloading
-
-        Raises:
-            HomeAssistantError: If upload fails or times out
-        """
-        url = f"http://{hub.host}/imgupload"
-        mac = entity_id.split(".")[1].upper()
-
-        _LOGGER.debug("Preparing upload for %s (MAC: %s)", entity_id, mac)
-        _LOGGER.debug("Upload parameters: dither=%d, ttl=%d, preload_type=%d, preload_lut=%d",
-                      dither, ttl, preload_type, preload_lut)
-
-        # Convert TTL fom seconds to minutes for the AP
-        ttl_minutes = max(1, ttl // 60)
-
-        backoff_delay = INITIAL_BACKOFF # Try up to MAX_RETRIES times to upload the image, retrying on TimeoutError.
-
-        for attempt in range(1, MAX_RETRIES + 1):
-            try:
-
-                # Create a new MultipartEncoder for each attempt
-                fields = {
-                    'mac': mac,
-                    'contentmode': "25",
-                    'dither': str(dither),
-                    'ttl': str(ttl_minutes),
-                    'image': ('image.jpg', img, 'image/jpeg'),
-                }
-
-                if preload_type > 0:
-                    fields.update({
-                        'preloadtype': str(preload_type),
-                        'preloadlut': str(preload_lut),
-                    })
-
-                mp_encoder = MultipartEncoder(fields=fields)
-
-                async with async_timeout.timeout(30):  # 30 second timeout for upload
-                    response = await hass.async_add_executor_job(
-                        lambda: requests.post(
-                            url,
-                            headers={'Content-Type': mp_encoder.content_type},
-                            data=mp_encoder
-                        )
-                    )
-
-                if response.status_code != 200:
-                    raise HomeAssistantError(
-                        f"Image upload failed for {entity_id} with status code: {response.status_code}"
-                    )
-                break
-
-            except asyncio.TimeoutError:
-                if attempt < MAX_RETRIES:
-                    _LOGGER.warning(
-                        "Timeout uploading %s (attempt %d/%d), retrying in %ds…",
-                        entity_id, attempt, MAX_RETRIES, backoff_delay
-                    )
-                    await asyncio.sleep(backoff_delay)
-                    backoff_delay *= 2  # exponential back-off
-                    continue
-                raise HomeAssistantError(f"Image upload timed out for {entity_id}")
-            except Exception as err:
-                raise HomeAssistantError(f"Failed to upload image for {entity_id}: {str(err)}")
-
     async def setled_service(service: ServiceCall) -> None:
         """Handle LED pattern service calls.
 
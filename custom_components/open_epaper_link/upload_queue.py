@@ -0,0 +1,279 @@
+"""Image upload queue of an OpenEPaperLink AP.
+
+Uploads the drawcustom images to the AP over the persistent aiohttp session
+of Home Assistant, so the connection to the AP is reused between uploads
+instead of opening a new one per image. The number of concurrent uploads
+and the cooldown between them adapt to how fast the AP answers and to how
+many updates are still pending on the AP.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Final
+
+import aiohttp
+
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import HomeAssistantError
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+
+from .render_cache import get_upload_key
+
+if TYPE_CHECKING:
+    from .hub import Hub
+
+_LOGGER: Final = logging.getLogger(__name__)
+
+MAX_RETRIES = 3
+INITIAL_BACKOFF = 2  # seconds
+UPLOAD_TIMEOUT = 30  # seconds
+
+MIN_CONCURRENT = 1
+MAX_CONCURRENT = 4
+INITIAL_COOLDOWN = 1.0  # seconds
+MIN_COOLDOWN = 0.1  # seconds
+MAX_COOLDOWN = 10.0  # seconds
+FAST_RESPONSE = 1.0  # seconds, faster uploads allow more concurrency
+SLOW_RESPONSE = 5.0  # seconds, slower uploads reduce concurrency
+MAX_PENDING = 20  # updates waiting on the AP before uploads slow down
+RESPONSE_SMOOTHING = 0.3
+
+
+@dataclass
+class UploadJob:
+    """Image waiting to be uploaded to a tag."""
+
+    entity_id: str
+    image_data: bytes
+    dither: int
+    ttl: int
+    preload_type: int = 0
+    preload_lut: int = 0
+
+
+class UploadQueueHandler:
+    """Handle queued image uploads to one AP.
+
+    Queued images are uploaded in one drain of the queue, with up to the
+    current concurrency limit running at the same time. A tag queued again
+    before its upload started only gets the newest image.
+
+    The concurrency limit and the cooldown between starting uploads are
+    tuned from the observed upload times (additive increase while the AP
+    answers fast, multiplicative decrease on slow answers and failures),
+    and the cooldown grows while many updates are pending on the AP.
+    """
+
+    def __init__(self, hass: HomeAssistant, hub: Hub):
+        """Initialize the upload queue handler.
+
+        Args:
+            hass: Home Assistant instance
+            hub: Hub of the AP the images are uploaded to
+        """
+        self._hass = hass
+        self._hub = hub
+        self._session = async_get_clientsession(hass)
+        self._queue: OrderedDict[str, UploadJob] = OrderedDict()
+        self._task: asyncio.Task | None = None
+        self._active: set[asyncio.Task] = set()
+        self._max_concurrent = MIN_CONCURRENT
+        self._cooldown = INITIAL_COOLDOWN
+        self._response_time: float | None = None
+        self._last_start: float | None = None
+
+    def __str__(self):
+        """Return queue status string."""
+        return (
+            f"Queue(active={len(self._active)}, size={len(self._queue)}, "
+            f"concurrent={self._max_concurrent}, cooldown={self._cooldown:.1f}s)"
+        )
+
+    async def add_to_queue(self, entity_id: str, image_data: bytes, dither: int, ttl: int,
+                           preload_type: int = 0, preload_lut: int = 0) -> None:
+        """Add an image upload to the queue.
+
+        Starts the queue processor if it's not already running.
+
+        Args:
+            entity_id: Entity ID of the target tag
+            image_data: JPEG image data as bytes
+            dither: Dithering mode (0=none, 1=Floyd-Steinberg, 2=ordered)
+            ttl: Time-to-live in seconds
+            preload_type: Type for image preloading (0=disabled)
+            preload_lut: Look-up table for preloading
+        """
+        if entity_id in self._queue:
+            _LOGGER.debug("Replacing queued upload for %s. %s", entity_id, self)
+        else:
+            _LOGGER.debug("Adding upload task to queue for %s. %s", entity_id, self)
+        self._queue[entity_id] = UploadJob(
+            entity_id, image_data, dither, ttl, preload_type, preload_lut
+        )
+
+        if self._task is None or self._task.done():
+            _LOGGER.debug("Starting upload queue processor for %s", entity_id)
+            self._task = self._hass.async_create_background_task(
+                self._process_queue(), f"{self._hub.entry.entry_id} image uploads"
+            )
+
+    async def async_shutdown(self) -> None:
+        """Stop the queue processor and drop the queued uploads."""
+        self._queue.clear()
+        tasks = list(self._active)
+        if self._task is not None:
+            tasks.append(self._task)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        self._task = None
+
+    async def _process_queue(self) -> None:
+        """Upload all queued images.
+
+        Starts uploads while below the concurrency limit, keeping the
+        cooldown between starting two uploads. Errors of an upload are
+        logged without stopping the queue. Runs until the queue is empty
+        and all uploads finished.
+        """
+        _LOGGER.debug("Upload queue processor started. %s", self)
+        while self._queue or self._active:
+            if not self._queue or len(self._active) >= self._max_concurrent:
+                await asyncio.wait(self._active, return_when=asyncio.FIRST_COMPLETED)
+                continue
+
+            if self._last_start is not None:
+                remaining = self._cooldown - (time.monotonic() - self._last_start)
+                if remaining > 0:
+                    _LOGGER.debug("In cooldown period (%.1f seconds remaining)", remaining)
+                    await asyncio.sleep(remaining)
+                    continue
+
+            _, job = self._queue.popitem(last=False)
+            self._last_start = time.monotonic()
+            task = asyncio.create_task(self._run_upload(job))
+            self._active.add(task)
+            task.add_done_callback(self._active.discard)
+        _LOGGER.debug("Upload queue processor finished. %s", self)
+
+    async def _run_upload(self, job: UploadJob) -> None:
+        """Upload one image and adapt the queue to how it went."""
+        _LOGGER.debug("Starting upload for %s. %s", job.entity_id, self)
+        start_time = time.monotonic()
+        try:
+            await self._upload(job)
+        except Exception as err:
+            _LOGGER.error("Error processing queued upload for %s: %s", job.entity_id, str(err))
+            self._adapt(None)
+        else:
+            duration = time.monotonic() - start_time
+            _LOGGER.debug("Upload completed for %s in %.1f seconds", job.entity_id, duration)
+            self._adapt(duration)
+
+    def _adapt(self, duration: float | None) -> None:
+        """Tune concurrency and cooldown from an upload result.
+
+        Args:
+            duration: Upload time in seconds, None if the upload failed
+        """
+        pending = self._ap_pending()
+        if duration is not None:
+            if self._response_time is None:
+                self._response_time = duration
+            else:
+                self._response_time += RESPONSE_SMOOTHING * (duration - self._response_time)
+
+        if duration is None or duration > SLOW_RESPONSE:
+            self._max_concurrent = max(MIN_CONCURRENT, self._max_concurrent // 2)
+            self._cooldown = min(MAX_COOLDOWN, self._cooldown * 2)
+        elif pending > MAX_PENDING:
+            self._cooldown = min(MAX_COOLDOWN, self._cooldown * 1.5)
+        elif self._response_time < FAST_RESPONSE:
+            self._max_concurrent = min(MAX_CONCURRENT, self._max_concurrent + 1)
+            self._cooldown = max(MIN_COOLDOWN, self._cooldown / 2)
+        _LOGGER.debug("Upload response %.2fs, %d pending on AP. %s",
+                      self._response_time or 0, pending, self)
+
+    def _ap_pending(self) -> int:
+        """Return the number of updates pending on the AP for all tags."""
+        pending = 0
+        for tag_mac in self._hub.tags:
+            try:
+                pending += int(self._hub.get_tag_data(tag_mac).get("pending") or 0)
+            except (TypeError, ValueError):
+                continue
+        return pending
+
+    async def _upload(self, job: UploadJob) -> None:
+        """Upload image to tag through AP.
+
+        Sends the image as multipart/form-data POST request with the
+        display parameters such as dithering, TTL, and optional preloading.
+
+        Will retry upload on timeout, with increasing backoff times
+
+        Args:
+            job: Queued image upload
+
+        Raises:
+            HomeAssistantError: If upload fails or times out
+        """
+        url = f"http://{self._hub.host}/imgupload"
+        mac = job.entity_id.split(".")[1].upper()
+
+        _LOGGER.debug("Preparing upload for %s (MAC: %s)", job.entity_id, mac)
+        _LOGGER.debug("Upload parameters: dither=%d, ttl=%d, preload_type=%d, preload_lut=%d",
+                      job.dither, job.ttl, job.preload_type, job.preload_lut)
+
+        # Convert TTL fom seconds to minutes for the AP
+        ttl_minutes = max(1, job.ttl // 60)
+
+        backoff_delay = INITIAL_BACKOFF  # Try up to MAX_RETRIES times to upload the image, retrying on TimeoutError.
+
+        for attempt in range(1, MAX_RETRIES + 1):
+            try:
+                # Form data is consumed by a request, create it for each attempt
+                data = aiohttp.FormData()
+                data.add_field("mac", mac)
+                data.add_field("contentmode", "25")
+                data.add_field("dither", str(job.dither))
+                data.add_field("ttl", str(ttl_minutes))
+                data.add_field("image", job.image_data, filename="image.jpg", content_type="image/jpeg")
+                if job.preload_type > 0:
+                    data.add_field("preloadtype", str(job.preload_type))
+                    data.add_field("preloadlut", str(job.preload_lut))
+
+                async with self._session.post(
+                    url, data=data, timeout=aiohttp.ClientTimeout(total=UPLOAD_TIMEOUT)
+                ) as response:
+                    await response.read()
+                    if response.status != 200:
+                        raise HomeAssistantError(
+                            f"Image upload failed for {job.entity_id} with status code: {response.status}"
+                        )
+
+                await self._hub.render_cache.async_set_uploaded(
+                    job.entity_id,
+                    get_upload_key(job.image_data, job.dither, job.preload_type, job.preload_lut)
+                )
+                break
+
+            except asyncio.TimeoutError:
+                if attempt < MAX_RETRIES:
+                    _LOGGER.warning(
+                        "Timeout uploading %s (attempt %d/%d), retrying in %ds…",
+                        job.entity_id, attempt, MAX_RETRIES, backoff_delay
+                    )
+                    await asyncio.sleep(backoff_delay)
+                    backoff_delay *= 2  # exponential back-off
+                    continue
+                raise HomeAssistantError(f"Image upload timed out for {job.entity_id}")
+            except HomeAssistantError:
+                raise
+            except Exception as err:
+                raise HomeAssistantError(f"Failed to upload image for {job.entity_id}: {str(err)}")
@@ -58,6 +58,7 @@ from .const import (
     CONF_POWER_SENSOR_FRIENDLY_NAMING,
     CONF_POWER_SENSOR_NAMING,
     CONF_POWER_SENSOR_PRECISION,
+    CONF_POWER_UPDATE_BATCH_WINDOW,
     CONF_POWER_TEMPLATE,
     CONF_SENSOR_TYPE,
     CONF_SENSORS,
@@ -72,6 +73,7 @@ from .const import (
     DATA_DOMAIN_ENTITIES,
     DATA_ENTITIES,
     DATA_GROUP_ENTITIES,
+    DATA_POWER_UPDATE_SCHEDULER,
     DATA_STANDBY_POWER_SENSORS,
     DATA_USED_UNIQUE_IDS,
     DEFAULT_ENERGY_INTEGRATION_METHOD,
@@ -80,6 +82,7 @@ from .const import (
     DEFAULT_ENERGY_UNIT_PREFIX,
     DEFAULT_ENTITY_CATEGORY,
     DEFAULT_GROUP_UPDATE_INTERVAL,
+    DEFAULT_POWER_UPDATE_BATCH_WINDOW,
     DEFAULT_POWER_NAME_PATTERN,
     DEFAULT_POWER_SENSOR_PRECISION,
     DEFAULT_UPDATE_FREQUENCY,
@@ -106,6 +109,7 @@ from .sensors.group.config_entry_utils import (
     remove_group_from_power_sensor_entry,
     remove_power_sensor_from_associated_groups,
 )
+from .sensors.scheduler import PowerUpdateScheduler
 from .service.gui_configuration import SERVICE_SCHEMA, change_gui_configuration
 
 PLATFORMS = [Platform.SENSOR]
@@ -129,6 +133,10 @@ CONFIG_SCHEMA = vol.Schema(
                         CONF_GROUP_UPDATE_INTERVAL,
                         default=DEFAULT_GROUP_UPDATE_INTERVAL,
                     ): cv.positive_int,
+                    vol.Optional(
+                        CONF_POWER_UPDATE_BATCH_WINDOW,
+                        default=DEFAULT_POWER_UPDATE_BATCH_WINDOW,
+                    ): vol.All(vol.Coerce(float), vol.Range(min=0)),
                     vol.Optional(
                         CONF_POWER_SENSOR_NAMING,
                         default=DEFAULT_POWER_NAME_PATTERN,
@@ -238,6 +246,7 @@ async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
         DATA_ENTITIES: {},
         DATA_USED_UNIQUE_IDS: [],
         DATA_STANDBY_POWER_SENSORS: {},
+        DATA_POWER_UPDATE_SCHEDULER: PowerUpdateScheduler(hass),
     }
 
     await register_services(hass)
@@ -279,6 +288,7 @@ def get_global_configuration(hass: HomeAssistant, config: ConfigType) -> ConfigT
         CONF_ENERGY_SENSOR_UNIT_PREFIX: DEFAULT_ENERGY_UNIT_PREFIX,
         CONF_FORCE_UPDATE_FREQUENCY: DEFAULT_UPDATE_FREQUENCY,
         CONF_GROUP_UPDATE_INTERVAL: DEFAULT_GROUP_UPDATE_INTERVAL,
+        CONF_POWER_UPDATE_BATCH_WINDOW: DEFAULT_POWER_UPDATE_BATCH_WINDOW,
         CONF_DISABLE_EXTENDED_ATTRIBUTES: False,
         CONF_IGNORE_UNAVAILABLE_STATE: False,
         CONF_CREATE_DOMAIN_GROUPS: [],
@@ -29,6 +29,7 @@ DATA_ENTITIES = "entities"
 DATA_GROUP_ENTITIES = "group_entities"
 DATA_USED_UNIQUE_IDS = "used_unique_ids"
 DATA_STANDBY_POWER_SENSORS = "standby_power_sensors"
+DATA_POWER_UPDATE_SCHEDULER = "power_update_scheduler"
 
 ENTRY_DATA_ENERGY_ENTITY = "_energy_entity"
 ENTRY_DATA_POWER_ENTITY = "_power_entity"
@@ -110,6 +111,7 @@ CONF_POWER_SENSOR_ID = "power_sensor_id"
 CONF_POWER_SENSOR_NAMING = "power_sensor_naming"
 CONF_POWER_SENSOR_PRECISION = "power_sensor_precision"
 CONF_POWER_TEMPLATE = "power_template"
+CONF_POWER_UPDATE_BATCH_WINDOW = "power_update_batch_window"
 CONF_REPEAT = "repeat"
 CONF_SELF_USAGE_INCLUDED = "self_usage_included"
 CONF_SENSOR_TYPE = "sensor_type"
@@ -168,6 +170,7 @@ ENTITY_CATEGORIES = [
 
 DEFAULT_GROUP_UPDATE_INTERVAL = 60
 DEFAULT_UPDATE_FREQUENCY = timedelta(minutes=10)
+DEFAULT_POWER_UPDATE_BATCH_WINDOW = 0
 DEFAULT_POWER_NAME_PATTERN = "{} power"
 DEFAULT_POWER_SENSOR_PRECISION = 2
 DEFAULT_ENERGY_INTEGRATION_METHOD = ENERGY_INTEGRATION_METHOD_LEFT
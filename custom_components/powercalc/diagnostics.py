@@ -3,6 +3,7 @@ from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 
 from custom_components.powercalc import CONF_SENSOR_TYPE, SensorType
+from custom_components.powercalc.const import DATA_POWER_UPDATE_SCHEDULER, DOMAIN
 from custom_components.powercalc.sensors.group.custom import resolve_entity_ids_recursively
 
 
@@ -14,6 +15,10 @@ async def async_get_config_entry_diagnostics(
 
     data: dict = {"entry": entry.as_dict()}
 
+    scheduler = hass.data.get(DOMAIN, {}).get(DATA_POWER_UPDATE_SCHEDULER)
+    if scheduler:
+        data["power_update_batches"] = scheduler.get_stats()
+
     if entry.data.get(CONF_SENSOR_TYPE) == SensorType.GROUP:
         data["power_entities"] = await resolve_entity_ids_recursively(hass, entry, SensorDeviceClass.POWER)
         data["energy_entities"] = await resolve_entity_ids_recursively(hass, entry, SensorDeviceClass.ENERGY)
@@ -6,6 +6,7 @@ from abc import abstractmethod
 from collections.abc import Callable
 from datetime import timedelta
 from decimal import Decimal, DecimalException
+from functools import cache
 from typing import Any
 
 from homeassistant.components.sensor import DOMAIN as SENSOR_DOMAIN
@@ -80,6 +81,7 @@ from custom_components.powercalc.const import (
     CONF_SUB_GROUPS,
     CONF_UTILITY_METER_NET_CONSUMPTION,
     DATA_DOMAIN_ENTITIES,
+    DATA_POWER_UPDATE_SCHEDULER,
     DEFAULT_ENERGY_SENSOR_PRECISION,
     DEFAULT_POWER_SENSOR_PRECISION,
     DOMAIN,
@@ -102,6 +104,7 @@ from custom_components.powercalc.sensors.abstract import (
 )
 from custom_components.powercalc.sensors.energy import EnergySensor, VirtualEnergySensor
 from custom_components.powercalc.sensors.power import PowerSensor
+from custom_components.powercalc.sensors.scheduler import PowerUpdateScheduler
 from custom_components.powercalc.sensors.utility_meter import create_utility_meters
 
 ENTITY_ID_FORMAT = SENSOR_DOMAIN + ".{}"
@@ -123,6 +126,16 @@ UNIT_CONVERTERS: dict[str | None, type[BaseUnitConverter]] = {
     **dict.fromkeys(PowerConverter.VALID_UNITS, PowerConverter),
 }
 
+# Number of member updates after which the running sum of a power group is recomputed from all members,
+# so rounding of the Decimal context cannot accumulate
+SUM_RESYNC_INTERVAL = 1000
+
+
+@cache
+def get_unit_converter(from_unit: str, to_unit: str | None) -> Callable[[float], float]:
+    """Return the conversion function between two units, created once per unit pair."""
+    return UNIT_CONVERTERS[from_unit].converter_factory(from_unit, to_unit)
+
 
 async def create_group_sensors_yaml(
     hass: HomeAssistant,
@@ -546,7 +559,7 @@ class GroupedSensor(BaseEntity, RestoreSensor, SensorEntity):
         """Set the new state and update the entity."""
         if state == STATE_UNAVAILABLE or not isinstance(state, Decimal):
             self._attr_available = self._ignore_unavailable_state
-            self.async_write_ha_state()
+            self._async_write_group_state()
             return
 
         current_time = time.time()
@@ -556,10 +569,19 @@ class GroupedSensor(BaseEntity, RestoreSensor, SensorEntity):
         if should_throttle and current_time - self._last_update_time < self._update_interval:
             write_state = False
         self._attr_available = True
-        self._set_native_value(state, write_state=write_state)
+        self._set_native_value(state, write_state=False)
+        if write_state:
+            self._async_write_group_state()
         if should_throttle and write_state:
             self._last_update_time = current_time
 
+    @callback
+    def _async_write_group_state(self) -> None:
+        """Write the state, once at the end when the change is part of a batch of power sensor updates."""
+        scheduler: PowerUpdateScheduler | None = self.hass.data.get(DOMAIN, {}).get(DATA_POWER_UPDATE_SCHEDULER)
+        if scheduler is None or not scheduler.defer_write(self):
+            self.async_write_ha_state()
+
     def _should_throttle(self, current_time: float) -> bool:
         if self._update_interval == 0:
             return False
@@ -574,8 +596,7 @@ class GroupedSensor(BaseEntity, RestoreSensor, SensorEntity):
         value = state.state
         unit_of_measurement = state.attributes.get(ATTR_UNIT_OF_MEASUREMENT)
         if unit_of_measurement and self._attr_native_unit_of_measurement != unit_of_measurement:
-            converter = UNIT_CONVERTERS[unit_of_measurement]
-            convert = converter.converter_factory(unit_of_measurement, self._attr_native_unit_of_measurement)
+            convert = get_unit_converter(unit_of_measurement, self._attr_native_unit_of_measurement)
             value = convert(float(value))
         try:
             return Decimal(value)
@@ -618,36 +639,79 @@ class GroupedSensor(BaseEntity, RestoreSensor, SensorEntity):
 
 
 class GroupedPowerSensor(GroupedSensor, PowerSensor):
-    """Grouped power sensor. Sums all values of underlying individual power sensors."""
+    """Grouped power sensor. Sums all values of underlying individual power sensors.
+
+    The sum is kept up to date by applying the difference of the changed member only,
+    so a member update costs the same for a group of five or five hundred members.
+    Nested groups propagate the same way, each level only applies the delta of its subgroup.
+    """
 
     _attr_device_class = SensorDeviceClass.POWER
     _attr_state_class = SensorStateClass.MEASUREMENT
     _attr_native_unit_of_measurement = UnitOfPower.WATT
     _is_energy_sensor = False
 
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        name: str,
+        entities: set[str],
+        entity_id: str,
+        sensor_config: dict[str, Any],
+        group_type: GroupType,
+        unique_id: str | None = None,
+        device_id: str | None = None,
+    ) -> None:
+        super().__init__(
+            hass,
+            name,
+            entities,
+            entity_id,
+            sensor_config,
+            group_type,
+            unique_id,
+            device_id,
+        )
+        self._sum = Decimal(0)
+        self._updates_since_resync = 0
+
     def calculate_initial_state(
         self,
         member_available_states: list[State],
         member_states: list[State],
     ) -> Decimal | str:
         self._states = {state.entity_id: self._get_state_value_in_native_unit(state) for state in member_available_states}
+        self._resync_sum()
         return self.get_summed_state()
 
     def calculate_new_state(self, state: State) -> Decimal | str:
         if state.state in [STATE_UNKNOWN, STATE_UNAVAILABLE]:
-            if state.entity_id in self._states:
-                del self._states[state.entity_id]
+            prev_value = self._states.pop(state.entity_id, None)
+            if prev_value is not None:
+                self._sum -= prev_value
         else:
-            self._states[state.entity_id] = self._get_state_value_in_native_unit(state)
+            value = self._get_state_value_in_native_unit(state)
+            prev_value = self._states.get(state.entity_id)
+            self._states[state.entity_id] = value
+            self._sum += value if prev_value is None else value - prev_value
+
+        self._updates_since_resync += 1
+        if not self._states or self._updates_since_resync >= SUM_RESYNC_INTERVAL:
+            self._resync_sum()
         return self.get_summed_state()
 
+    def _resync_sum(self) -> None:
+        """Recompute the running sum from all member values."""
+        self._sum = Decimal(sum(self._states.values()))
+        self._updates_since_resync = 0
+
     def get_summed_state(self) -> Decimal | str:
         if not self._states:
             if self._ignore_unavailable_state:
                 return Decimal(0)
             return STATE_UNAVAILABLE
 
-        return Decimal(sum(self._states.values()))
+        return self._sum
 
 
 class GroupedEnergySensor(GroupedSensor, EnergySensor):
@@ -73,6 +73,7 @@ from custom_components.powercalc.const import (
     CONF_STANDBY_POWER,
     CONF_UNAVAILABLE_POWER,
     DATA_DISCOVERY_MANAGER,
+    DATA_POWER_UPDATE_SCHEDULER,
     DATA_STANDBY_POWER_SENSORS,
     DEFAULT_POWER_SENSOR_PRECISION,
     DOMAIN,
@@ -107,6 +108,7 @@ from .abstract import (
     generate_power_sensor_entity_id,
     generate_power_sensor_name,
 )
+from .scheduler import PowerUpdateScheduler
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -413,9 +415,20 @@ class VirtualPowerSensor(SensorEntity, PowerSensor):
         assert self._strategy_instance is not None
         self.init_calculation_enabled_condition()
 
+        scheduler: PowerUpdateScheduler | None = self.hass.data[DOMAIN].get(DATA_POWER_UPDATE_SCHEDULER)
+
         async def appliance_state_listener(event: Event[EventStateChangedData]) -> None:
             """Handle for state changes for dependent sensors."""
             new_state = event.data.get("new_state")
+            if scheduler:
+                scheduler.async_schedule(
+                    self,
+                    self._async_update_power,
+                    self._source_entity.entity_id,
+                    new_state,
+                    event.data["entity_id"],
+                )
+                return
             await self._handle_source_entity_state_change(
                 self._source_entity.entity_id,
                 new_state,
@@ -521,6 +534,15 @@ class VirtualPowerSensor(SensorEntity, PowerSensor):
         state: State | None,
     ) -> None:
         """Update power sensor based on new dependant entity state."""
+        await self._async_update_power(trigger_entity_id, state)
+        self.async_write_ha_state()
+
+    async def _async_update_power(
+        self,
+        trigger_entity_id: str,
+        state: State | None,
+    ) -> None:
+        """Calculate the power for the new dependant entity state, without writing the state."""
         self._standby_sensors.pop(self.entity_id, None)
         if self._sleep_power_timer:
             self._sleep_power_timer()
@@ -536,7 +558,6 @@ class VirtualPowerSensor(SensorEntity, PowerSensor):
                 trigger_entity_id,
             )
             self._power = None
-            self.async_write_ha_state()
             return
 
         await self._switch_sub_profile_dynamically(state)
@@ -552,8 +573,6 @@ class VirtualPowerSensor(SensorEntity, PowerSensor):
             self._power,
         )
 
-        self.async_write_ha_state()
-
     @callback
     def _update_power_sensor(self, power: Decimal) -> None:
         self._power = power
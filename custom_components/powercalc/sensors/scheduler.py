@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from homeassistant.core import HomeAssistant, State, callback
+from homeassistant.helpers.dispatcher import async_dispatcher_send
+from homeassistant.helpers.entity import Entity
+
+from custom_components.powercalc.const import (
+    CONF_POWER_UPDATE_BATCH_WINDOW,
+    DEFAULT_POWER_UPDATE_BATCH_WINDOW,
+    DOMAIN,
+    DOMAIN_CONFIG,
+    SIGNAL_POWER_SENSOR_STATE_CHANGE,
+)
+
+_LOGGER = logging.getLogger(__name__)
+
+PowerUpdate = Callable[[str, State | None], Awaitable[None]]
+
+
+class PowerUpdateScheduler:
+    """Coalesce source entity changes of virtual power sensors into batches.
+
+    Source changes arriving within the batch window are collected, an entity tracked by a power sensor changed
+    multiple times only calculates for its latest change. A sensor calculates for each of its changed entities
+    in turn, e.g. the switches of a multi switch sensor, the sensors of the batch are calculated together.
+    After that the power states are written once, followed by one write of every group sensor depending on them.
+    A window of 0 still batches all changes arriving in the same event loop iteration, e.g. a scene.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        self._hass = hass
+        self._pending: dict[Entity, dict[str, tuple[PowerUpdate, str, State | None]]] = {}
+        self._flush_task: asyncio.Task | None = None
+        self._deferred_writes: dict[Entity, None] | None = None
+        self.stats: dict[str, int] = {
+            "events": 0,
+            "coalesced": 0,
+            "batches": 0,
+            "calculations": 0,
+            "largest_batch": 0,
+            "deferred_group_writes": 0,
+        }
+
+    @property
+    def window(self) -> float:
+        """Batch window in seconds, from the global configuration."""
+        global_config = self._hass.data[DOMAIN].get(DOMAIN_CONFIG) or {}
+        return float(global_config.get(CONF_POWER_UPDATE_BATCH_WINDOW, DEFAULT_POWER_UPDATE_BATCH_WINDOW))
+
+    @callback
+    def async_schedule(
+        self,
+        sensor: Entity,
+        update: PowerUpdate,
+        trigger_entity_id: str,
+        state: State | None,
+        entity_id: str,
+    ) -> None:
+        """Schedule a power calculation of a sensor for a change of one of its tracked entities."""
+        self.stats["events"] += 1
+        updates = self._pending.setdefault(sensor, {})
+        if entity_id in updates:
+            self.stats["coalesced"] += 1
+            # keep the order of the changes of the sensor
+            del updates[entity_id]
+        updates[entity_id] = (update, trigger_entity_id, state)
+        if self._flush_task is None:
+            self._flush_task = self._hass.async_create_task(self._async_flush(), "powercalc power update batch")
+
+    @callback
+    def defer_write(self, entity: Entity) -> bool:
+        """Defer the state write of a group sensor to the end of the running batch.
+
+        Returns False when no batch is being written, the caller should write its state itself.
+        """
+        if self._deferred_writes is None:
+            return False
+        if entity in self._deferred_writes:
+            self.stats["deferred_group_writes"] += 1
+        self._deferred_writes[entity] = None
+        return True
+
+    async def _async_flush(self) -> None:
+        await asyncio.sleep(self.window)
+        pending, self._pending = self._pending, {}
+        self._flush_task = None
+        if not pending:
+            return
+
+        self.stats["batches"] += 1
+        self.stats["calculations"] += sum(len(updates) for updates in pending.values())
+        self.stats["largest_batch"] = max(self.stats["largest_batch"], len(pending))
+        _LOGGER.debug("Calculating power for %d sensors", len(pending))
+
+        sensors = list(pending)
+        results = await asyncio.gather(
+            *(self._async_update_sensor(updates) for updates in pending.values()),
+            return_exceptions=True,
+        )
+
+        self._deferred_writes = {}
+        try:
+            for sensor, result in zip(sensors, results, strict=True):
+                if isinstance(result, BaseException):
+                    _LOGGER.error("%s: Error calculating power", sensor.entity_id, exc_info=result)
+                    continue
+                if sensor.hass is not None:
+                    sensor.async_write_ha_state()
+            # Groups with members in nested groups are deferred again while their subgroups are written
+            while self._deferred_writes:
+                groups = list(self._deferred_writes)
+                self._deferred_writes.clear()
+                for group in groups:
+                    if group.hass is not None:
+                        group.async_write_ha_state()
+        finally:
+            self._deferred_writes = None
+
+        async_dispatcher_send(self._hass, SIGNAL_POWER_SENSOR_STATE_CHANGE)
+
+    @staticmethod
+    async def _async_update_sensor(updates: dict[str, tuple[PowerUpdate, str, State | None]]) -> None:
+        """Calculate the power of a sensor for each of its changed entities, in order of the changes."""
+        for update, trigger_entity_id, state in updates.values():
+            await update(trigger_entity_id, state)
+
+    def get_stats(self) -> dict[str, Any]:
+        return {"window": self.window, **self.stats}
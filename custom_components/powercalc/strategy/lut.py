@@ -1,8 +1,10 @@
 from __future__ import annotations
 
+import asyncio
 import gzip
 import logging
 import os
+from bisect import bisect_left
 from collections import defaultdict
 from collections.abc import Mapping
 from csv import reader
@@ -37,13 +39,105 @@ from .strategy_interface import PowerCalculationStrategyInterface
 
 _LOGGER = logging.getLogger(__name__)
 
-BrightnessLutValue = float
-ColorTempLutValue = dict[int, float]
-SatLutValue = dict[int, float]
-HsLutValue = dict[int, SatLutValue]
-EffectLutValue = dict[str, float]
-LookupDictValue = BrightnessLutValue | ColorTempLutValue | HsLutValue
-LookupDictType = dict[int, LookupDictValue]
+# Number of key columns in the LUT files per lookup mode, the last column is the power
+LUT_KEY_COLUMNS = {
+    "brightness": 1,
+    "color_temp": 2,
+    "hs": 3,
+    "effect": 2,
+}
+COMPILED_LUT_SUFFIX = ".lut.npz"
+
+
+class LutTable:
+    """Compiled lookup table of one color mode or effect.
+
+    The rows of the LUT are sorted by their keys (brightness, then color temp or hue, then saturation)
+    into one sorted key array per level. The keys of a level below one key of the level above are a slice
+    of the next key array, given by the offsets, so a nearest key is found with a binary search in that slice.
+    The arrays are compiled and persisted with numpy, lookups bisect plain lists of them, as indexing numpy
+    arrays with single values is several times slower.
+    """
+
+    def __init__(self, keys: list[np.ndarray], offsets: list[np.ndarray], values: np.ndarray) -> None:
+        self.keys = keys
+        self.offsets = offsets
+        self.values = values
+        self._keys = [level_keys.tolist() for level_keys in keys]
+        self._offsets = [level_offsets.tolist() for level_offsets in offsets]
+        self._values = values.tolist()
+
+    @classmethod
+    def from_rows(cls, rows: np.ndarray) -> LutTable:
+        """Compile the (key, ..., power) rows of a LUT file."""
+        depth = rows.shape[1] - 1
+        rows = rows[np.lexsort(rows[:, depth - 1 :: -1].T)]
+        # Later rows win on duplicate keys, like they did in the dict LUT
+        duplicate = np.all(rows[1:, :depth] == rows[:-1, :depth], axis=1)
+        rows = rows[np.append(~duplicate, True)]
+
+        starts = []
+        changed = np.zeros(len(rows) - 1, dtype=bool)
+        for level in range(depth):
+            changed |= rows[1:, level] != rows[:-1, level]
+            starts.append(np.concatenate(([0], np.flatnonzero(changed) + 1)))
+
+        keys = [rows[level_starts, level].astype(np.int64) for level, level_starts in enumerate(starts)]
+        offsets = [np.append(np.searchsorted(starts[level + 1], starts[level]), len(starts[level + 1])) for level in range(depth - 1)]
+        return cls(keys, offsets, rows[:, depth].astype(np.float64))
+
+    def lookup(self, brightness: int, *keys: int) -> float:
+        """Return the power for a brightness, interpolated between the nearest brightness levels of the LUT."""
+        brightness_keys = self._keys[0]
+        index = bisect_left(brightness_keys, brightness)
+        if index < len(brightness_keys) and brightness_keys[index] == brightness:
+            return self._lookup_nearest(index, keys)
+
+        lower = max(index - 1, 0)
+        higher = min(index, len(brightness_keys) - 1)
+        lower_power = self._lookup_nearest(lower, keys)
+        if lower == higher:
+            return lower_power
+        higher_power = self._lookup_nearest(higher, keys)
+        lower_brightness = brightness_keys[lower]
+        slope = (higher_power - lower_power) / (brightness_keys[higher] - lower_brightness)
+        return slope * (brightness - lower_brightness) + lower_power
+
+    def _lookup_nearest(self, index: int, keys: tuple[int, ...]) -> float:
+        """Walk down from a brightness level, taking the nearest key on each level."""
+        for level, search_key in enumerate(keys):
+            offsets = self._offsets[level]
+            index = self._nearest(self._keys[level + 1], offsets[index], offsets[index + 1], search_key)
+        return self._values[index]
+
+    @staticmethod
+    def _nearest(keys: list[int], start: int, end: int, search_key: int) -> int:
+        """Return the index of the key nearest to search_key in keys[start:end], the lower one on a tie."""
+        index = bisect_left(keys, search_key, start, end)
+        if index == end:
+            return end - 1
+        if index > start and search_key - keys[index - 1] <= keys[index] - search_key:
+            return index - 1
+        return index
+
+    def to_arrays(self, prefix: str = "") -> dict[str, np.ndarray]:
+        arrays = {f"{prefix}values": self.values}
+        for level, keys in enumerate(self.keys):
+            arrays[f"{prefix}keys{level}"] = keys
+        for level, offsets in enumerate(self.offsets):
+            arrays[f"{prefix}offsets{level}"] = offsets
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays: Mapping[str, np.ndarray], depth: int, prefix: str = "") -> LutTable:
+        return cls(
+            [arrays[f"{prefix}keys{level}"] for level in range(depth)],
+            [arrays[f"{prefix}offsets{level}"] for level in range(depth - 1)],
+            arrays[f"{prefix}values"],
+        )
+
+
+LookupDictType = LutTable | dict[str, LutTable]
 
 
 class LookupMode(StrEnum):
@@ -60,7 +154,8 @@ class LookupMode(StrEnum):
 class LutRegistry:
     def __init__(self, hass: HomeAssistant) -> None:
         self._hass = hass
-        self._lookup_dictionaries: dict[str, dict] = {}
+        self._lookup_dictionaries: dict[str, LookupDictType] = {}
+        self._load_locks: dict[str, asyncio.Lock] = defaultdict(asyncio.Lock)
         self.supported_modes: dict[str, set[LookupMode]] = {}
 
     async def get_lookup_dictionary(
@@ -68,53 +163,102 @@ class LutRegistry:
         power_profile: PowerProfile,
         lookup_mode: LookupMode,
     ) -> LookupDictType:
+        """Get the compiled LUT, shared by all lights using the same profile."""
         cache_key = f"{power_profile.manufacturer}_{power_profile.model}_{lookup_mode}_{power_profile.sub_profile}"
         lookup_dict = self._lookup_dictionaries.get(cache_key)
         if lookup_dict is None:
-            lookup_dict = defaultdict(partial(defaultdict, dict))
-
-            csv_file = await self._hass.async_add_executor_job(partial(self.get_lut_file, power_profile, lookup_mode))
-            with csv_file:
-                csv_reader = reader(csv_file)
-                next(csv_reader)  # skip header row
-
-                line_count = 0
-                for row in csv_reader:
-                    if lookup_mode == LookupMode.HS:
-                        lookup_dict[int(row[0])][int(row[1])][int(row[2])] = float(
-                            row[3],
-                        )
-                    elif lookup_mode == LookupMode.COLOR_TEMP:
-                        lookup_dict[int(row[0])][int(row[1])] = float(row[2])
-                    elif lookup_mode == LookupMode.EFFECT:
-                        lookup_dict[row[0]][int(row[1])] = float(row[2])
-                    else:
-                        lookup_dict[int(row[0])] = float(row[1])
-                    line_count += 1
-
-            _LOGGER.debug("LUT file loaded: %d lines", line_count)
-
-            lookup_dict = dict(lookup_dict)
-            self._lookup_dictionaries[cache_key] = lookup_dict
+            # Lights of the same profile are set up together, only the first one loads the LUT
+            async with self._load_locks[cache_key]:
+                lookup_dict = self._lookup_dictionaries.get(cache_key)
+                if lookup_dict is None:
+                    lookup_dict = await self._hass.async_add_executor_job(
+                        partial(self.load_lookup_table, power_profile, lookup_mode),
+                    )
+                    self._lookup_dictionaries[cache_key] = lookup_dict
 
         return lookup_dict
 
+    @classmethod
+    def load_lookup_table(cls, power_profile: PowerProfile, lookup_mode: LookupMode) -> LookupDictType:
+        """Load the compiled LUT, compiling the LUT file when there is no up to date compiled file next to it."""
+        path = cls.get_lut_path(power_profile, lookup_mode)
+        compiled_path = os.path.join(power_profile.get_model_directory(), f"{lookup_mode}{COMPILED_LUT_SUFFIX}")
+        source_id = np.array([os.stat(path).st_mtime_ns, os.path.getsize(path)], dtype=np.int64)
+        depth = LUT_KEY_COLUMNS[lookup_mode] - (1 if lookup_mode == LookupMode.EFFECT else 0)
+
+        try:
+            with np.load(compiled_path, allow_pickle=False) as arrays:
+                if np.array_equal(arrays["source"], source_id):
+                    _LOGGER.debug("Loading compiled LUT file: %s", compiled_path)
+                    if lookup_mode == LookupMode.EFFECT:
+                        return {str(effect): LutTable.from_arrays(arrays, depth, f"{index}_") for index, effect in enumerate(arrays["effects"])}
+                    return LutTable.from_arrays(arrays, depth)
+        except Exception as err:  # noqa: BLE001
+            # A missing, outdated or corrupt compiled file is compiled again from the LUT file
+            _LOGGER.debug("Could not load compiled LUT file %s: %s", compiled_path, err)
+
+        lookup_table = cls.compile_lut_file(path, lookup_mode)
+
+        if isinstance(lookup_table, dict):
+            arrays = {"effects": np.array(list(lookup_table), dtype=str)}
+            for index, table in enumerate(lookup_table.values()):
+                arrays.update(table.to_arrays(f"{index}_"))
+        else:
+            arrays = lookup_table.to_arrays()
+        try:
+            with open(f"{compiled_path}.tmp", "wb") as compiled_file:
+                np.savez(compiled_file, source=source_id, **arrays)
+            os.replace(f"{compiled_path}.tmp", compiled_path)
+        except OSError as err:
+            _LOGGER.debug("Could not save compiled LUT file %s: %s", compiled_path, err)
+
+        return lookup_table
+
+    @classmethod
+    def compile_lut_file(cls, path: str, lookup_mode: LookupMode) -> LookupDictType:
+        """Parse the LUT file and compile it into LutTable's."""
+        rows: dict[str, list[list[float]]] = defaultdict(list)
+        with cls.open_lut_file(path) as csv_file:
+            csv_reader = reader(csv_file)
+            next(csv_reader)  # skip header row
+
+            line_count = 0
+            for row in csv_reader:
+                if lookup_mode == LookupMode.EFFECT:
+                    rows[row[0]].append([float(value) for value in row[1:]])
+                else:
+                    rows[""].append([float(value) for value in row])
+                line_count += 1
+
+        _LOGGER.debug("LUT file loaded: %d lines", line_count)
+
+        tables = {key: LutTable.from_rows(np.array(key_rows, dtype=np.float64)) for key, key_rows in rows.items()}
+        if lookup_mode == LookupMode.EFFECT:
+            return tables
+        return tables[""]
+
     @staticmethod
-    def get_lut_file(power_profile: PowerProfile, lookup_mode: LookupMode) -> TextIO:
-        """Open the LUT file for the given power profile and color mode. When the file is gzipped, it will be extracted with gzip."""
+    def get_lut_path(power_profile: PowerProfile, lookup_mode: LookupMode) -> str:
+        """Return the path of the LUT file for the given power profile and color mode, the gzipped one when present."""
         path = os.path.join(power_profile.get_model_directory(), f"{lookup_mode}.csv")
 
         gzip_path = f"{path}.gz"
         if os.path.exists(gzip_path):
-            _LOGGER.debug("Loading LUT data file: %s", gzip_path)
-            return gzip.open(gzip_path, "rt")
+            return gzip_path
 
         if os.path.exists(path):
-            _LOGGER.debug("Loading LUT data file: %s", path)
-            return open(path)
+            return path
 
         raise LutFileNotFoundError("Data file not found: %s")
 
+    @staticmethod
+    def open_lut_file(path: str) -> TextIO:
+        """Open a LUT file. When the file is gzipped, it will be extracted with gzip."""
+        _LOGGER.debug("Loading LUT data file: %s", path)
+        if path.endswith(".gz"):
+            return gzip.open(path, "rt")
+        return open(path)
+
     async def get_supported_modes(self, power_profile: PowerProfile) -> set[LookupMode]:
         """Return the color modes supported by the Profile."""
         cache_key = f"{power_profile.manufacturer}_{power_profile.model}_supported_modes"
@@ -258,80 +402,16 @@ class LutStrategy(PowerCalculationStrategyInterface):
 
     def lookup_power(
         self,
-        lookup_table: LookupDictType,
+        lookup_table: LutTable,
         light_setting: LightSetting,
     ) -> float:
-        brightness = light_setting.brightness
-        brightness_table = lookup_table.get(brightness)
-
-        # Check if we have an exact match for the selected brightness level in de LUT
-        if brightness_table:
-            return self.lookup_power_for_brightness(brightness_table, light_setting)
-
-        # We don't have an exact match, use interpolation
-        brightness_range = [
-            self.get_nearest_lower_brightness(lookup_table, brightness),
-            self.get_nearest_higher_brightness(lookup_table, brightness),
-        ]
-        power_range = [
-            self.lookup_power_for_brightness(
-                lookup_table[brightness_range[0]],
-                light_setting,
-            ),
-            self.lookup_power_for_brightness(
-                lookup_table[brightness_range[1]],
-                light_setting,
-            ),
-        ]
-        return float(np.interp(brightness, brightness_range, power_range))
-
-    def lookup_power_for_brightness(
-        self,
-        lut_value: LookupDictValue,
-        light_setting: LightSetting,
-    ) -> float:
-        if isinstance(lut_value, float):
-            return lut_value
+        if len(lookup_table.keys) == 1:
+            return lookup_table.lookup(light_setting.brightness)
 
         if light_setting.color_mode == ColorMode.COLOR_TEMP:
-            return self.get_nearest(lut_value, light_setting.color_temp or 0)  # type: ignore
-
-        sat_values = self.get_nearest(lut_value, light_setting.hue or 0)
-        return self.get_nearest(sat_values, light_setting.saturation or 0)  # type: ignore
-
-    @staticmethod
-    def get_nearest(
-        lookup_dict: ColorTempLutValue | HsLutValue | SatLutValue,
-        search_key: int,
-    ) -> LookupDictValue:
-        return lookup_dict.get(search_key) or lookup_dict[min(lookup_dict.keys(), key=lambda key: abs(key - search_key))]
+            return lookup_table.lookup(light_setting.brightness, light_setting.color_temp or 0)
 
-    @staticmethod
-    def get_nearest_lower_brightness(
-        lookup_dict: LookupDictType,
-        search_key: int,
-    ) -> int:
-        keys = lookup_dict.keys()
-        last_key = [*keys][-1]
-        if last_key < search_key:
-            return int(last_key)
-
-        return max(
-            (k for k in lookup_dict if int(k) <= int(search_key)),
-            default=next(iter(keys)),
-        )
-
-    @staticmethod
-    def get_nearest_higher_brightness(
-        lookup_dict: LookupDictType,
-        search_key: int,
-    ) -> int:
-        keys = lookup_dict.keys()
-        first_key = next(iter(keys))
-        if first_key > search_key:
-            return int(first_key)
-
-        return min((k for k in keys if int(k) >= int(search_key)), default=[*keys][-1])
+        return lookup_table.lookup(light_setting.brightness, light_setting.hue or 0, light_setting.saturation or 0)
 
     async def validate_config(self) -> None:
         if self._source_entity.domain != light.DOMAIN:
@@ -5,8 +5,9 @@ API for Tuya Local devices.
 import asyncio
 import logging
 from asyncio.exceptions import CancelledError
-from threading import Lock
-from time import time
+from functools import partial
+from inspect import iscoroutinefunction
+from time import monotonic, time
 
 import tinytuya
 from homeassistant.const import (
@@ -29,6 +30,7 @@ from .const import (
 from .helpers.config import get_device_id
 from .helpers.device_config import possible_matches
 from .helpers.log import log_json
+from .transport import AsyncTuyaTransport
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -66,6 +68,12 @@ class TuyaLocalDevice(object):
         self._name = name
         self._children = []
         self._force_dps = []
+        # entities by the ids of their dps, and dps not persisted over full polls
+        self._dps_entities = {}
+        self._non_persistent_dps = set()
+        # rate limited state writes of entities with an update_interval
+        self._last_writes = {}
+        self._delayed_writes = {}
         self._product_ids = []
         self._running = False
         self._shutdown_listener = None
@@ -74,10 +82,15 @@ class TuyaLocalDevice(object):
         self._api_protocol_working = False
         self._api_working_protocol_failures = 0
         self.dev_cid = dev_cid
+        # the socket is shared with sub-devices through tinytuya
+        shared_socket = False
         try:
             if dev_cid:
                 if hass.data[DOMAIN].get(dev_id) and name != "Test":
                     parent = hass.data[DOMAIN][dev_id]["tuyadevice"]
+                    gateway = hass.data[DOMAIN][dev_id].get("device")
+                    if gateway:
+                        gateway._transport.disable_native()
                 else:
                     parent = tinytuya.Device(dev_id, address, local_key)
                     if name != "Test":
@@ -90,6 +103,7 @@ class TuyaLocalDevice(object):
             else:
                 if hass.data[DOMAIN].get(dev_id) and name != "Test":
                     self._api = hass.data[DOMAIN][dev_id]["tuyadevice"]
+                    shared_socket = True
                 else:
                     self._api = tinytuya.Device(dev_id, address, local_key)
                     if name != "Test":
@@ -109,6 +123,11 @@ class TuyaLocalDevice(object):
             # Retries cause problems for other children of the parent device
             self._api.parent.set_socketRetryLimit(1)
 
+        # Socket calls of the receive loop run on the event loop
+        self._transport = AsyncTuyaTransport(hass, self._api)
+        if shared_socket:
+            self._transport.disable_native()
+
         self._refresh_task = None
         self._protocol_configured = protocol_version
         self._poll_only = poll_only
@@ -132,7 +151,7 @@ class TuyaLocalDevice(object):
         self._SINGLE_PROTO_CONNECTION_ATTEMPTS = 3
         # The number of failures from a working protocol before retrying other protocols.
         self._AUTO_FAILURE_RESET_COUNT = 10
-        self._lock = Lock()
+        self._lock = asyncio.Lock()
 
     @property
     def name(self):
@@ -186,10 +205,9 @@ class TuyaLocalDevice(object):
         self._running = False
         self._children.clear()
         self._force_dps.clear()
+        self._index_entity_dps()
         if self._refresh_task:
-            self._api.set_socketPersistent(False)
-            if self._api.parent:
-                self._api.parent.set_socketPersistent(False)
+            self._transport.set_socketPersistent(False)
             await self._refresh_task
         _LOGGER.debug("Monitor loop for %s stopped", self.name)
         self._refresh_task = None
@@ -204,6 +222,7 @@ class TuyaLocalDevice(object):
         for dp in entity._config.dps():
             if dp.force and dp.id not in self._force_dps:
                 self._force_dps.append(int(dp.id))
+        self._index_entity_dps()
 
         if not self._running and not self._startup_listener:
             self.start()
@@ -214,6 +233,7 @@ class TuyaLocalDevice(object):
 
     async def async_unregister_entity(self, entity):
         self._children.remove(entity)
+        self._index_entity_dps()
         if not self._children:
             try:
                 await self.async_stop()
@@ -231,19 +251,40 @@ class TuyaLocalDevice(object):
                         log_json(poll),
                     )
                     full_poll = poll.pop("full_poll", False)
+                    had_state = self.has_returned_state
+                    changed = {
+                        dp
+                        for dp, value in poll.items()
+                        if dp not in self._cached_state
+                        or self._cached_state[dp] != value
+                    }
+                    pending = set(self._pending_updates)
                     self._cached_state = self._cached_state | poll
                     self._cached_state["updated_at"] = time()
                     self._remove_properties_from_pending_updates(poll)
-
-                    for entity in self._children:
-                        # let entities trigger off poll contents directly
-                        entity.on_receive(poll, full_poll)
-                        # clear non-persistant dps that were not in a full poll
-                        if full_poll:
-                            for dp in entity._config.dps():
-                                if not dp.persist and dp.id not in poll:
-                                    self._cached_state.pop(dp.id, None)
-                        entity.schedule_update_ha_state()
+                    # confirmed or expired pending updates no longer overlay the state
+                    changed |= pending - set(self._get_pending_updates())
+
+                    # let entities trigger off poll contents directly
+                    triggered = [
+                        entity
+                        for entity in self._entities_for_dps(poll)
+                        if entity.on_receive(poll, full_poll)
+                    ]
+
+                    # clear non-persistant dps that were not in a full poll
+                    if full_poll:
+                        for dp in self._non_persistent_dps:
+                            if dp not in poll and dp in self._cached_state:
+                                del self._cached_state[dp]
+                                changed.add(dp)
+
+                    if had_state:
+                        entities = self._entities_for_dps(changed)
+                        entities += [e for e in triggered if e not in entities]
+                    else:
+                        entities = self._children
+                    self._schedule_entity_writes(entities)
                 else:
                     _LOGGER.debug(
                         "%s received non data %s",
@@ -256,9 +297,58 @@ class TuyaLocalDevice(object):
             _LOGGER.exception(
                 "%s receive loop terminated by exception %s", self.name, t
             )
-            self._api.set_socketPersistent(False)
-            if self._api.parent:
-                self._api.parent.set_socketPersistent(False)
+            self._transport.set_socketPersistent(False)
+
+    def _index_entity_dps(self):
+        """Index the registered entities by the ids of their dps."""
+        self._dps_entities = {}
+        self._non_persistent_dps = set()
+        for entity in self._children:
+            for dp in entity._config.dps():
+                self._dps_entities.setdefault(dp.id, set()).add(entity)
+                if not dp.persist:
+                    self._non_persistent_dps.add(dp.id)
+        for entity in list(self._delayed_writes):
+            if entity not in self._children:
+                self._delayed_writes.pop(entity).cancel()
+        self._last_writes = {
+            entity: last
+            for entity, last in self._last_writes.items()
+            if entity in self._children
+        }
+
+    def _entities_for_dps(self, dps):
+        """Return the entities using any of the dps, in registration order."""
+        entities = set()
+        for dp in dps:
+            entities.update(self._dps_entities.get(dp, ()))
+        return [entity for entity in self._children if entity in entities]
+
+    def _schedule_entity_writes(self, entities):
+        """
+        Schedule the state writes of entities. Entities with an update
+        interval are written at most once per interval, changes within the
+        interval are coalesced into a write at its end.
+        """
+        now = monotonic()
+        for entity in entities:
+            interval = entity._config.update_interval
+            if not interval:
+                entity.schedule_update_ha_state()
+            elif entity not in self._delayed_writes:
+                wait = self._last_writes.get(entity, 0) + interval - now
+                if wait > 0:
+                    self._delayed_writes[entity] = self._hass.loop.call_later(
+                        wait, self._delayed_entity_write, entity
+                    )
+                else:
+                    self._last_writes[entity] = now
+                    entity.schedule_update_ha_state()
+
+    def _delayed_entity_write(self, entity):
+        del self._delayed_writes[entity]
+        self._last_writes[entity] = monotonic()
+        entity.schedule_update_ha_state()
 
     @property
     def should_poll(self):
@@ -266,9 +356,7 @@ class TuyaLocalDevice(object):
 
     def pause(self):
         self._temporary_poll = True
-        self._api.set_socketPersistent(False)
-        if self._api.parent:
-            self._api.parent.set_socketPersistent(False)
+        self._transport.set_socketPersistent(False)
 
     def resume(self):
         self._temporary_poll = False
@@ -282,9 +370,7 @@ class TuyaLocalDevice(object):
         # all dps updated
         dps_updated = False
 
-        self._api.set_socketPersistent(persist)
-        if self._api.parent:
-            self._api.parent.set_socketPersistent(persist)
+        self._transport.set_socketPersistent(persist)
 
         while self._running:
             error_count = self._api_working_protocol_failures
@@ -301,9 +387,7 @@ class TuyaLocalDevice(object):
                     _LOGGER.debug(
                         "%s persistant connection set to %s", self.name, persist
                     )
-                    self._api.set_socketPersistent(persist)
-                    if self._api.parent:
-                        self._api.parent.set_socketPersistent(persist)
+                    self._transport.set_socketPersistent(persist)
 
                 if now - last_cache > self._CACHE_TIMEOUT:
                     if (
@@ -312,25 +396,20 @@ class TuyaLocalDevice(object):
                         and self._api_protocol_working
                     ):
                         poll = await self._retry_on_failed_connection(
-                            lambda: self._api.updatedps(self._force_dps),
+                            partial(self._transport.updatedps, self._force_dps),
                             f"Failed to update device dps for {self.name}",
                         )
                         dps_updated = True
                     else:
                         poll = await self._retry_on_failed_connection(
-                            lambda: self._api.status(),
+                            self._transport.status,
                             f"Failed to fetch device status for {self.name}",
                         )
                         dps_updated = False
                         full_poll = True
                 elif persist:
-                    await self._hass.async_add_executor_job(
-                        self._api.heartbeat,
-                        True,
-                    )
-                    poll = await self._hass.async_add_executor_job(
-                        self._api.receive,
-                    )
+                    await self._transport.heartbeat(True)
+                    poll = await self._transport.receive()
                 else:
                     await asyncio.sleep(5)
                     poll = None
@@ -365,9 +444,7 @@ class TuyaLocalDevice(object):
             except CancelledError:
                 self._running = False
                 # Close the persistent connection when exiting the loop
-                self._api.set_socketPersistent(False)
-                if self._api.parent:
-                    self._api.parent.set_socketPersistent(False)
+                self._transport.set_socketPersistent(False)
                 raise
             except Exception as t:
                 _LOGGER.exception(
@@ -376,15 +453,11 @@ class TuyaLocalDevice(object):
                     type(t),
                     t,
                 )
-                self._api.set_socketPersistent(False)
-                if self._api.parent:
-                    self._api.parent.set_socketPersistent(False)
+                self._transport.set_socketPersistent(False)
                 await asyncio.sleep(5)
 
         # Close the persistent connection when exiting the loop
-        self._api.set_socketPersistent(False)
-        if self._api.parent:
-            self._api.parent.set_socketPersistent(False)
+        self._transport.set_socketPersistent(False)
 
     def set_detected_product_id(self, product_id):
         self._product_ids.append(product_id)
@@ -568,14 +641,13 @@ class TuyaLocalDevice(object):
         )
 
         await self._retry_on_failed_connection(
-            lambda: self._set_values(pending_properties),
+            partial(self._async_set_values, pending_properties),
             "Failed to update device state.",
         )
 
-    def _set_values(self, properties):
-        try:
-            self._lock.acquire()
-            self._api.set_multiple_values(properties, nowait=True)
+    async def _async_set_values(self, properties):
+        async with self._lock:
+            await self._transport.set_multiple_values(properties, nowait=True)
             self._cached_state["updated_at"] = 0
             now = time()
             self._last_connection = now
@@ -583,8 +655,6 @@ class TuyaLocalDevice(object):
             for key in properties.keys():
                 pending_updates[key]["updated_at"] = now
                 pending_updates[key]["sent"] = True
-        finally:
-            self._lock.release()
 
     async def _retry_on_failed_connection(self, func, error_message):
         if self._api_protocol_version_index is None:
@@ -601,7 +671,10 @@ class TuyaLocalDevice(object):
         for i in range(connections):
             try:
                 if not self._hass.is_stopping:
-                    retval = await self._hass.async_add_executor_job(func)
+                    if iscoroutinefunction(func):
+                        retval = await func()
+                    else:
+                        retval = await self._hass.async_add_executor_job(func)
                     if isinstance(retval, dict) and "Error" in retval:
                         raise AttributeError(retval["Error"])
                     self._api_protocol_working = True
@@ -694,10 +767,7 @@ class TuyaLocalDevice(object):
         else:
             self._api.disabledetect = True
 
-        await self._hass.async_add_executor_job(
-            self._api.set_version,
-            new_version,
-        )
+        await self._transport.set_version(new_version)
         if self._api.parent:
             await self._hass.async_add_executor_job(
                 self._api.parent.set_version,
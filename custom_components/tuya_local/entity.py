@@ -122,8 +122,11 @@ class TuyaLocalEntity:
         await self._device.async_unregister_entity(self)
 
     def on_receive(self, dps, full_poll):
-        """Override to process dps directly as they are received"""
-        pass
+        """
+        Override to process dps directly as they are received.
+        Return True if the state needs updating even if no dps changed.
+        """
+        return False
 
 
 UNIT_ASCII_MAP = {
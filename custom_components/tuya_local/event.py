@@ -81,6 +81,7 @@ class TuyaLocalEvent(TuyaLocalEntity, EventEntity):
                     value,
                     self.extra_state_attributes,
                 )
+                return True
             # clear out the remembered value when a full poll comes through
             # with nothing
             elif value is None and full_poll:
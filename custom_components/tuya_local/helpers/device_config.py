@@ -2,14 +2,17 @@
 Config parser for Tuya Local devices.
 """
 
+import json
 import logging
 from base64 import b64decode, b64encode
 from collections.abc import Sequence
 from datetime import datetime
 from fnmatch import fnmatch
+from hashlib import sha1
 from numbers import Number
-from os import scandir
+from os import replace, scandir
 from os.path import dirname, exists, join, splitext
+from threading import Lock
 
 from homeassistant.util import slugify
 from homeassistant.util.yaml import load_yaml
@@ -18,6 +21,27 @@ import custom_components.tuya_local.devices as config_dir
 
 _LOGGER = logging.getLogger(__name__)
 
+_DPS_TYPES = {
+    "boolean": bool,
+    "integer": int,
+    "string": str,
+    "float": float,
+    "bitfield": int,
+    "json": str,
+    "base64": str,
+    "utf16b64": str,
+    "hex": str,
+    "unixtime": int,
+}
+
+# Version of the device index format, bump when the content changes
+_INDEX_VERSION = 1
+_INDEX_FILE = ".index.json"
+
+_index = None
+_index_lock = Lock()
+_configs = {}
+
 
 def _typematch(vtype, value):
     # Workaround annoying legacy of bool being a subclass of int in Python
@@ -349,6 +373,11 @@ class TuyaEntityConfig:
         """Return the mode (used by Number entities)."""
         return self._config.get("mode")
 
+    @property
+    def update_interval(self):
+        """Return the minimum time between state updates of this entity."""
+        return self._config.get("update_interval", 0)
+
     def dps(self):
         """Iterate through the list of dps for this entity."""
         for d in self._config["dps"]:
@@ -397,20 +426,7 @@ class TuyaDpsConfig:
 
     @property
     def type(self):
-        t = self._config["type"]
-        types = {
-            "boolean": bool,
-            "integer": int,
-            "string": str,
-            "float": float,
-            "bitfield": int,
-            "json": str,
-            "base64": str,
-            "utf16b64": str,
-            "hex": str,
-            "unixtime": int,
-        }
-        return types.get(t)
+        return _DPS_TYPES.get(self._config["type"])
 
     @property
     def rawtype(self):
@@ -1088,11 +1104,127 @@ def available_configs():
             yield direntry.name
 
 
+def _config_fingerprint(config_dir):
+    """Return a fingerprint of the names, sizes and mtimes of the config files."""
+    files = sorted(
+        (d.name, d.stat().st_size, d.stat().st_mtime_ns)
+        for d in scandir(config_dir)
+        if d.is_file() and fnmatch(d.name, "*.yaml")
+    )
+    return sha1(repr(files).encode()).hexdigest()
+
+
+def _build_index():
+    """Parse all config files into an index of what is needed for matching."""
+    index = {}
+    for cfg in available_configs():
+        try:
+            parsed = TuyaDeviceConfig(cfg)
+            index[cfg] = {
+                "legacy_type": parsed.legacy_type,
+                "products": [
+                    p.get("id", "MISSING_ID!?!")
+                    for p in parsed._config.get("products", [])
+                ],
+                "dps": [
+                    [d.id, d.rawtype, bool(d.optional)] for d in parsed._get_all_dps()
+                ],
+            }
+        except Exception as e:
+            _LOGGER.error("Unable to index device config %s: %s", cfg, e)
+    return index
+
+
+def _load_index():
+    """
+    Return the device config index, building it when the config files changed.
+    The index is persisted next to the config files, so it is only built once
+    per change of the config files rather than on each startup.
+    """
+    global _index
+    with _index_lock:
+        if _index is not None:
+            return _index
+
+        _CONFIG_DIR = dirname(config_dir.__file__)
+        fpath = join(_CONFIG_DIR, _INDEX_FILE)
+        fingerprint = _config_fingerprint(_CONFIG_DIR)
+        try:
+            with open(fpath, encoding="utf-8") as f:
+                stored = json.load(f)
+            if (
+                stored.get("version") == _INDEX_VERSION
+                and stored.get("fingerprint") == fingerprint
+            ):
+                _index = _compile_index(stored["configs"])
+                return _index
+        except (OSError, ValueError, KeyError, AttributeError):
+            pass
+
+        _LOGGER.debug("Building device config index")
+        configs = _build_index()
+        try:
+            with open(fpath + ".tmp", "w", encoding="utf-8") as f:
+                json.dump(
+                    {
+                        "version": _INDEX_VERSION,
+                        "fingerprint": fingerprint,
+                        "configs": configs,
+                    },
+                    f,
+                )
+            replace(fpath + ".tmp", fpath)
+        except OSError as e:
+            _LOGGER.debug("Unable to store device config index: %s", e)
+
+        _index = _compile_index(configs)
+        return _index
+
+
+def _compile_index(configs):
+    """Convert the stored index to lookup structures."""
+    candidates = []
+    legacy_types = {}
+    for cfg, entry in configs.items():
+        required = frozenset(dp for dp, _, optional in entry["dps"] if not optional)
+        typed = tuple(
+            (dp, _DPS_TYPES.get(rawtype)) for dp, rawtype, _ in entry["dps"]
+        )
+        candidates.append((cfg, frozenset(entry["products"]), required, typed))
+        legacy_types.setdefault(entry["legacy_type"], cfg)
+    return {"candidates": candidates, "legacy_types": legacy_types}
+
+
+def _is_candidate(dps, product_ids, products, required, typed):
+    """
+    Return whether a config could match, from its index entry.
+    Configs with unknown dps types are left for the full match to report.
+    """
+    for dp, vtype in typed:
+        if dp in dps and vtype is not None and not _typematch(vtype, dps[dp]):
+            return False
+
+    if product_ids and not products.isdisjoint(product_ids):
+        return True
+
+    return required.issubset(dps.keys())
+
+
+def load_config(fname):
+    """Return the parsed config file, shared by all devices using it."""
+    parsed = _configs.get(fname)
+    if parsed is None:
+        parsed = _configs[fname] = TuyaDeviceConfig(fname)
+    return parsed
+
+
 def possible_matches(dps, product_ids=None):
     """Return possible matching configs for a given set of
     dps values and product_ids."""
-    for cfg in available_configs():
-        parsed = TuyaDeviceConfig(cfg)
+    for cfg, products, required, typed in _load_index()["candidates"]:
+        if not _is_candidate(dps, product_ids, products, required, typed):
+            continue
+        parsed = load_config(cfg)
         try:
             if parsed.matches(dps, product_ids):
                 yield parsed
@@ -1108,7 +1240,7 @@ def get_config(conf_type):
     fname = conf_type + ".yaml"
     fpath = join(_CONFIG_DIR, fname)
     if exists(fpath):
-        return TuyaDeviceConfig(fname)
+        return load_config(fname)
     else:
         return config_for_legacy_use(conf_type)
 
@@ -1120,9 +1252,8 @@ def config_for_legacy_use(conf_type):
     to be the correct config for the device, so only use it for looking up
     the legacy class during the transition period.
     """
-    for cfg in available_configs():
-        parsed = TuyaDeviceConfig(cfg)
-        if parsed.legacy_type == conf_type:
-            return parsed
+    cfg = _load_index()["legacy_types"].get(conf_type)
+    if cfg is None:
+        return None
 
-    return None
+    return load_config(cfg)
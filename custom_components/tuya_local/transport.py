@@ -0,0 +1,209 @@
+"""
+Asyncio transport for Tuya Local devices.
+"""
+
+import asyncio
+import logging
+
+import tinytuya
+from homeassistant.core import HomeAssistant
+
+_LOGGER = logging.getLogger(__name__)
+
+PREFIX_55AA = b"\x00\x00\x55\xaa"
+PREFIX_6699 = b"\x00\x00\x66\x99"
+HEADER_LEN_55AA = 16
+HEADER_LEN_6699 = 18
+MAX_EMPTY_REPLIES = 2
+
+# tinytuya internals used to encode and decode messages
+_TINYTUYA_METHODS = (
+    "generate_payload",
+    "_encode_message",
+    "_process_message",
+    "_negotiate_session_key_generate_step_1",
+    "_negotiate_session_key_generate_step_3",
+    "_negotiate_session_key_generate_finalize",
+)
+
+
+class AsyncTuyaTransport:
+    """
+    Asyncio version of the tinytuya device calls used by TuyaLocalDevice.
+
+    Messages are encoded and decoded by the tinytuya device, including
+    protocol versions 3.1 to 3.5 and the session key negotiation of 3.4+,
+    while the connection is an asyncio stream, so a device waiting for
+    messages does not hold an executor thread.  Sub-devices share the socket
+    of their gateway with tinytuya, so they and their gateway keep calling
+    tinytuya in the executor, as do tinytuya versions without the needed
+    internals.
+    """
+
+    def __init__(self, hass: HomeAssistant, api):
+        self._hass = hass
+        self._api = api
+        self._reader = None
+        self._writer = None
+        # replies are read under the read lock, which a waiting receive can
+        # hold for the connection timeout, so sends only take the send lock
+        self._read_lock = asyncio.Lock()
+        self._send_lock = asyncio.Lock()
+        self.native = api.parent is None and all(
+            hasattr(api, method) for method in _TINYTUYA_METHODS
+        )
+
+    def __getattr__(self, name):
+        return getattr(self._api, name)
+
+    def disable_native(self):
+        """Fall back to tinytuya in the executor, when the socket is shared."""
+        self._close()
+        self.native = False
+
+    def set_socketPersistent(self, persist):
+        self._api.set_socketPersistent(persist)
+        if self._api.parent:
+            self._api.parent.set_socketPersistent(persist)
+        if not persist:
+            self._close()
+
+    async def set_version(self, version):
+        self._close()
+        await self._hass.async_add_executor_job(self._api.set_version, version)
+
+    async def status(self):
+        if not self.native:
+            return await self._hass.async_add_executor_job(self._api.status)
+
+        payload = self._api.generate_payload(tinytuya.DP_QUERY)
+        data = await self._async_send_receive(payload)
+        if data and data.get("Err") == str(tinytuya.ERR_DEVTYPE):
+            # device22 detected, resend with the updated payload
+            payload = self._api.generate_payload(tinytuya.DP_QUERY)
+            data = await self._async_send_receive(payload)
+        return data
+
+    async def updatedps(self, index):
+        if not self.native:
+            return await self._hass.async_add_executor_job(
+                self._api.updatedps, index
+            )
+
+        payload = self._api.generate_payload(tinytuya.UPDATEDPS, index)
+        return await self._async_send_receive(payload)
+
+    async def heartbeat(self, nowait=True):
+        if not self.native:
+            return await self._hass.async_add_executor_job(
+                self._api.heartbeat, nowait
+            )
+
+        payload = self._api.generate_payload(tinytuya.HEART_BEAT)
+        return await self._async_send_receive(payload, getresponse=not nowait)
+
+    async def receive(self):
+        if not self.native:
+            return await self._hass.async_add_executor_job(self._api.receive)
+
+        return await self._async_send_receive(None)
+
+    async def set_multiple_values(self, data, nowait=False):
+        if not self.native:
+            return await self._hass.async_add_executor_job(
+                self._api.set_multiple_values, data, nowait
+            )
+
+        payload = self._api.generate_payload(
+            tinytuya.CONTROL, {str(dp): value for dp, value in data.items()}
+        )
+        return await self._async_send_receive(payload, getresponse=not nowait)
+
+    async def _async_send_receive(self, payload, getresponse=True):
+        """Send a message and return the decoded reply, like tinytuya."""
+        result = None
+        try:
+            if not getresponse:
+                async with self._send_lock:
+                    await self._async_connect()
+                    await self._async_send(payload)
+            else:
+                async with self._read_lock:
+                    async with self._send_lock:
+                        await self._async_connect()
+                        dev_type = self._api.dev_type
+                        if payload:
+                            await self._async_send(payload)
+                    msg = await self._async_read_message(payload is None)
+                    # skip acknowledgements without data, like tinytuya
+                    for _ in range(MAX_EMPTY_REPLIES):
+                        if msg is None or msg.payload:
+                            break
+                        msg = await self._async_read_message(payload is None)
+                    if msg is not None:
+                        result = self._api._process_message(msg, dev_type)
+        except (OSError, asyncio.IncompleteReadError, asyncio.TimeoutError) as e:
+            _LOGGER.debug("%s connection error %s", self._api.id, e)
+            self._close()
+            return tinytuya.error_json(tinytuya.ERR_CONNECT)
+        except Exception as e:
+            _LOGGER.debug("%s error decoding message %s", self._api.id, e)
+            self._close()
+            return tinytuya.error_json(tinytuya.ERR_PAYLOAD)
+
+        if not self._api.socketPersistent and not self._read_lock.locked():
+            self._close()
+        return result
+
+    async def _async_connect(self):
+        if self._writer and not self._writer.is_closing():
+            return
+
+        self._close()
+        self._reader, self._writer = await asyncio.wait_for(
+            asyncio.open_connection(self._api.address, self._api.port),
+            self._api.connection_timeout,
+        )
+        if self._api.version >= 3.4:
+            await self._async_negotiate_session_key()
+
+    async def _async_negotiate_session_key(self):
+        await self._async_send(self._api._negotiate_session_key_generate_step_1())
+        reply = await self._async_read_message(False)
+        step3 = self._api._negotiate_session_key_generate_step_3(reply)
+        if not step3:
+            raise ConnectionError("session key negotiation failed")
+        await self._async_send(step3)
+        self._api._negotiate_session_key_generate_finalize()
+
+    async def _async_send(self, payload):
+        self._writer.write(self._api._encode_message(payload))
+        await self._writer.drain()
+
+    async def _async_read_message(self, receive_only):
+        """Read a message, None if none arrived in time when only receiving."""
+        timeout = self._api.connection_timeout
+        try:
+            data = await asyncio.wait_for(self._reader.readexactly(4), timeout)
+        except asyncio.TimeoutError:
+            if receive_only:
+                return None
+            raise
+
+        async with asyncio.timeout(timeout):
+            # skip anything before the start of a message
+            while data not in (PREFIX_55AA, PREFIX_6699):
+                data = data[1:] + await self._reader.readexactly(1)
+            header_len = HEADER_LEN_55AA if data == PREFIX_55AA else HEADER_LEN_6699
+            data += await self._reader.readexactly(header_len - len(data))
+            header = tinytuya.parse_header(data)
+            data += await self._reader.readexactly(header.total_length - len(data))
+
+        hmac_key = self._api.local_key if self._api.version >= 3.4 else None
+        return tinytuya.unpack_message(data, hmac_key=hmac_key, header=header)
+
+    def _close(self):
+        if self._writer:
+            self._writer.close()
+        self._reader = None
+        self._writer = None
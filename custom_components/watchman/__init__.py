@@ -18,7 +18,6 @@ from homeassistant.const import (
     EVENT_HOMEASSISTANT_STARTED,
     EVENT_SERVICE_REGISTERED,
     EVENT_SERVICE_REMOVED,
-    EVENT_STATE_CHANGED,
     EVENT_CALL_SERVICE,
     SERVICE_RELOAD,
 )
@@ -279,29 +278,14 @@ async def add_event_handlers(hass: HomeAssistant):
 
     async def async_on_service_changed(event):
         service = f"{event.data['domain']}.{event.data['service']}"
-        if service in hass.data[DOMAIN].get(HASS_DATA_PARSED_SERVICE_LIST, []):
-            _LOGGER.debug("Monitored service changed: %s", service)
-            coordinator = hass.data[DOMAIN][HASS_DATA_COORDINATOR]
-            await coordinator.async_refresh()
-
-    async def async_on_state_changed(event):
-        """refresh monitored entities on state change"""
-
-        def state_or_missing(state_id):
-            """return missing state if entity not found"""
-            return "missing" if not event.data[state_id] else event.data[state_id].state
-
-        if event.data["entity_id"] in hass.data[DOMAIN].get(
-            HASS_DATA_PARSED_ENTITY_LIST, []
-        ):
-            ignored_states: list[str] = get_config(hass, CONF_IGNORED_STATES, [])
-            old_state = state_or_missing("old_state")
-            new_state = state_or_missing("new_state")
-            checked_states = set(MONITORED_STATES) - set(ignored_states)
-            if new_state in checked_states or old_state in checked_states:
-                _LOGGER.debug("Monitored entity changed: %s", event.data["entity_id"])
-                coordinator = hass.data[DOMAIN][HASS_DATA_COORDINATOR]
-                await coordinator.async_refresh()
+        coordinator = hass.data[DOMAIN][HASS_DATA_COORDINATOR]
+        if service in hass.data[DOMAIN].get(HASS_DATA_PARSED_ENTITY_LIST, []):
+            # entries which are actions are not reported as entities
+            coordinator.async_invalidate_entities()
+        elif service not in hass.data[DOMAIN].get(HASS_DATA_PARSED_SERVICE_LIST, []):
+            return
+        _LOGGER.debug("Monitored service changed: %s", service)
+        await coordinator.async_request_refresh()
 
     # hass is not started yet, schedule config parsing once it loaded
     if not hass.is_running:
@@ -324,7 +308,8 @@ async def add_event_handlers(hass: HomeAssistant):
         hass.bus.async_listen(EVENT_SERVICE_REGISTERED, async_on_service_changed)
     )
     hdlr.append(hass.bus.async_listen(EVENT_SERVICE_REMOVED, async_on_service_changed))
-    hdlr.append(hass.bus.async_listen(EVENT_STATE_CHANGED, async_on_state_changed))
+    # state changes of parsed entities are tracked by the coordinator
+    hdlr.append(hass.data[DOMAIN][HASS_DATA_COORDINATOR].async_cancel_tracking)
     hass.data[DOMAIN][HASS_DATA_CANCEL_HANDLERS] = hdlr
 
 
@@ -347,6 +332,7 @@ async def parse_config(hass: HomeAssistant, reason=None):
     hass.data[DOMAIN][HASS_DATA_FILES_PARSED] = files_parsed
     hass.data[DOMAIN][HASS_DATA_FILES_IGNORED] = files_ignored
     hass.data[DOMAIN][HASS_DATA_PARSE_DURATION] = time.time() - start_time
+    hass.data[DOMAIN][HASS_DATA_COORDINATOR].async_track_entities()
     _LOGGER.debug(
         f"{INDENT}Parsing took {hass.data[DOMAIN][HASS_DATA_PARSE_DURATION]:.2f}s."
     )
@@ -19,6 +19,7 @@ HASS_DATA_PARSED_ENTITY_LIST = "entity_list"
 HASS_DATA_PARSED_SERVICE_LIST = "service_list"
 HASS_DATA_FILES_PARSED = "files_parsed"
 HASS_DATA_FILES_IGNORED = "files_ignored"
+HASS_DATA_FILES_CACHE = "files_cache"
 HASS_DATA_PARSE_DURATION = "parse_duration"
 HASS_DATA_CANCEL_HANDLERS = "cancel_handlers"
 HASS_DATA_COORDINATOR = "coordinator"
@@ -26,6 +27,9 @@ HASS_DATA_MISSING_ENTITIES = "entities_missing"
 HASS_DATA_MISSING_SERVICES = "services_missing"
 HASS_DATA_CHECK_DURATION = "check_duration"
 
+# minimum time between sensor refreshes caused by state changes of monitored entities
+REFRESH_COOLDOWN = 5
+
 COORD_DATA_MISSING_ENTITIES = "entities_missing"
 COORD_DATA_MISSING_SERVICES = "services_missing"
 COORD_DATA_LAST_UPDATE = "last_update"
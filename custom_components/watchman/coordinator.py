@@ -2,9 +2,13 @@
 
 import logging
 import time
+from homeassistant.core import callback
 from homeassistant.util import dt as dt_util
+from homeassistant.helpers.debounce import Debouncer
+from homeassistant.helpers.event import async_track_state_change_event
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 from .const import (
+    CONF_IGNORED_STATES,
     COORD_DATA_ENTITY_ATTRS,
     COORD_DATA_LAST_UPDATE,
     COORD_DATA_MISSING_ENTITIES,
@@ -16,8 +20,18 @@ from .const import (
     HASS_DATA_MISSING_SERVICES,
     HASS_DATA_PARSED_ENTITY_LIST,
     HASS_DATA_PARSED_SERVICE_LIST,
+    MONITORED_STATES,
+    REFRESH_COOLDOWN,
+)
+from .utils.utils import (
+    check_entitites,
+    check_entity,
+    check_services,
+    get_config,
+    get_entity_state,
+    get_ignored_states,
+    fill,
 )
-from .utils.utils import check_entitites, check_services, get_entity_state, fill
 from .utils.logger import _LOGGER
 
 
@@ -30,22 +44,94 @@ class WatchmanCoordinator(DataUpdateCoordinator):
             hass,
             _LOGGER,
             name=name,  # Name of the data. For logging purposes.
+            request_refresh_debouncer=Debouncer(
+                hass, _LOGGER, cooldown=REFRESH_COOLDOWN, immediate=True
+            ),
         )
         self.hass = hass
         self.data = {}
+        # missing entities are checked in full once for each parsed entity list,
+        # then kept up to date from the state changes of the tracked entities
+        self._checked_entity_list = None
+        self._missing_entities = None
+        self._ignored_states = []
+        self._monitored_states = set()
+        self._cancel_tracking = None
+
+    @callback
+    def async_track_entities(self):
+        """Track state changes of the entities found in configuration files"""
+        self.async_cancel_tracking()
+        ignored_states = get_config(self.hass, CONF_IGNORED_STATES, [])
+        self._ignored_states = get_ignored_states(self.hass)
+        self._monitored_states = set(MONITORED_STATES) - set(ignored_states)
+        parsed_entity_list = self.hass.data[DOMAIN][HASS_DATA_PARSED_ENTITY_LIST]
+        self._cancel_tracking = async_track_state_change_event(
+            self.hass, list(parsed_entity_list), self._async_on_state_changed
+        )
+
+    @callback
+    def async_cancel_tracking(self):
+        """Stop tracking state changes of monitored entities"""
+        if self._cancel_tracking:
+            self._cancel_tracking()
+            self._cancel_tracking = None
+
+    @callback
+    def async_invalidate_entities(self):
+        """Check all entities on the next refresh"""
+        self._missing_entities = None
+
+    async def _async_on_state_changed(self, event):
+        """refresh sensors when a monitored entity changes from or to a monitored state"""
+
+        def state_or_missing(state_id):
+            """return missing state if entity not found"""
+            return "missing" if not event.data[state_id] else event.data[state_id].state
+
+        entity_id = event.data["entity_id"]
+        parsed_entity_list = self.hass.data[DOMAIN].get(HASS_DATA_PARSED_ENTITY_LIST, [])
+        if entity_id not in parsed_entity_list:
+            return
+        old_state = state_or_missing("old_state")
+        new_state = state_or_missing("new_state")
+        if (
+            new_state not in self._monitored_states
+            and old_state not in self._monitored_states
+        ):
+            return
+        _LOGGER.debug("Monitored entity changed: %s", entity_id)
+        if self._missing_entities is not None:
+            if check_entity(self.hass, entity_id, self._ignored_states):
+                self._missing_entities.add(entity_id)
+            else:
+                self._missing_entities.discard(entity_id)
+        await self.async_request_refresh()
 
     async def _async_update_data(self) -> None:
         """Fetch data from API endpoint."""
         start_time = time.time()
         services_missing = check_services(self.hass)
-        entities_missing = check_entitites(self.hass)
+        parsed_entity_list = self.hass.data[DOMAIN][HASS_DATA_PARSED_ENTITY_LIST]
+        if (
+            self._missing_entities is None
+            or self._checked_entity_list is not parsed_entity_list
+        ):
+            entities_missing = check_entitites(self.hass)
+            self._checked_entity_list = parsed_entity_list
+            self._missing_entities = set(entities_missing)
+        else:
+            entities_missing = {
+                entry: occurrences
+                for entry, occurrences in parsed_entity_list.items()
+                if entry in self._missing_entities
+            }
         self.hass.data[DOMAIN][HASS_DATA_CHECK_DURATION] = time.time() - start_time
         self.hass.data[DOMAIN][HASS_DATA_MISSING_ENTITIES] = entities_missing
         self.hass.data[DOMAIN][HASS_DATA_MISSING_SERVICES] = services_missing
 
         # build entity attributes map for missing_entities sensor
         entity_attrs = []
-        parsed_entity_list = self.hass.data[DOMAIN][HASS_DATA_PARSED_ENTITY_LIST]
         for entity in entities_missing:
             state, name = get_entity_state(self.hass, entity, friendly_names=True)
             entity_attrs.append(
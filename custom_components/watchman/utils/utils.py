@@ -1,10 +1,12 @@
 """Miscellaneous support functions for watchman"""
 
 import anyio
+import bisect
 import re
 import fnmatch
 import time
 from datetime import datetime
+from pathlib import Path
 from textwrap import wrap
 import os
 from typing import Any
@@ -36,6 +38,7 @@ from ..const import (
     BUNDLED_IGNORED_ITEMS,
     DEFAULT_REPORT_FILENAME,
     HASS_DATA_CHECK_DURATION,
+    HASS_DATA_FILES_CACHE,
     HASS_DATA_FILES_IGNORED,
     HASS_DATA_FILES_PARSED,
     HASS_DATA_MISSING_ENTITIES,
@@ -195,7 +198,21 @@ def text_renderer(hass, entry_type):
         return f"Text render error: unknown entry type: {entry_type}"
 
 
-async def async_get_next_file(folder_tuples, ignored_files):
+# patterns are applied to whole files, whitespace matched by them excludes
+# line breaks so that a match never spans several lines
+ENTITY_PATTERN = re.compile(
+    r"(?:(?<=\s)|(?<=^)|(?<=\")|(?<=\'))([A-Za-z_0-9]*[^\S\n]*:)?(?:[^\S\n]*)?(?:states.)?"
+    rf"(({ "|".join([*Platform, *DEFAULT_HA_DOMAINS]) })\.[A-Za-z_*0-9]+)"
+)
+SERVICE_PATTERN = re.compile(
+    r"(?:service|action):[^\S\n]*([A-Za-z_0-9]*\.[A-Za-z_0-9]+)"
+)
+COMMENT_PATTERN = re.compile(
+    r"(^[^\S\n]*(?:description|example):.*)|([^\S\n]*#.*)", re.MULTILINE
+)
+
+
+def get_next_file(folder_tuples, ignored_files):
     """Returns next file for scan"""
     if not ignored_files:
         ignored_files = ""
@@ -206,13 +223,65 @@ async def async_get_next_file(folder_tuples, ignored_files):
         _LOGGER.debug(
             f"{INDENT}Scan folder {folder_name} with pattern {glob_pattern} for configuration files"
         )
-        async for filename in anyio.Path(folder_name).glob(glob_pattern):
+        for filename in Path(folder_name).glob(glob_pattern):
             yield (
                 str(filename),
                 (ignored_files and ignored_files_re.match(str(filename))),
             )
 
 
+def scan_file(yaml_file):
+    """Return entities and actions found in a file with their line numbers"""
+    with open(yaml_file, encoding="utf-8") as f:
+        text = COMMENT_PATTERN.sub("", f.read())
+    line_ends = [m.start() for m in re.finditer("\n", text)]
+    entities = []
+    for match in ENTITY_PATTERN.finditer(text):
+        typ, val = match.group(1), match.group(2)
+        if typ != "service:" and "*" not in val and not val.endswith(".yaml"):
+            lineno = bisect.bisect_left(line_ends, match.start()) + 1
+            entities.append((val, lineno))
+    services = [
+        (match.group(1), bisect.bisect_left(line_ends, match.start()) + 1)
+        for match in SERVICE_PATTERN.finditer(text)
+    ]
+    return entities, services
+
+
+def scan_files(folders, ignored_files, cache):
+    """Scan configuration files, reusing results of files unchanged since
+    the previous scan. Returns the scanned and ignored files, and the new cache"""
+    scanned = []
+    ignored = []
+    new_cache = {}
+    rescanned = 0
+    for yaml_file, is_ignored in get_next_file(folders, ignored_files):
+        if is_ignored:
+            ignored.append(yaml_file)
+            continue
+        try:
+            stat = os.stat(yaml_file)
+            key = (stat.st_mtime_ns, stat.st_size)
+            cached = cache.get(yaml_file)
+            if cached and cached[0] == key:
+                result = cached[1]
+            else:
+                result = scan_file(yaml_file)
+                rescanned += 1
+            new_cache[yaml_file] = (key, result)
+            scanned.append((yaml_file, result))
+        except OSError as exception:
+            _LOGGER.error("Unable to parse %s: %s", yaml_file, exception)
+        except UnicodeDecodeError as exception:
+            _LOGGER.error(
+                "Unable to parse %s: %s. Use UTF-8 encoding to avoid this error",
+                yaml_file,
+                exception,
+            )
+    _LOGGER.debug(f"{INDENT}Rescanned {rescanned} new or changed files")
+    return scanned, ignored, new_cache
+
+
 def add_entry(_list, entry, yaml_file, lineno):
     """Add entry to list of missing entities/services with line number information"""
     if entry in _list:
@@ -266,85 +335,71 @@ def check_services(hass):
     return services_missing
 
 
+def get_ignored_states(hass):
+    """ignored states from config, as reported by get_entity_state"""
+    return [
+        "unavail" if s == "unavailable" else s
+        for s in get_config(hass, CONF_IGNORED_STATES, [])
+    ]
+
+
+def check_entity(hass, entry, ignored_states):
+    """check if entry from config file is an entity without an active state"""
+    if is_action(hass, entry):  # this is a service, not entity
+        _LOGGER.debug(f"{INDENT}entry {entry} is service, skipping")
+        return False
+    state, _ = get_entity_state(hass, entry)
+    if state in ignored_states:
+        _LOGGER.debug(
+            f"{INDENT}entry {entry} with state {state} skipped due to ignored_states"
+        )
+        return False
+    if state in ["missing", "unknown", "unavail"]:
+        _LOGGER.debug(f"{INDENT}entry {entry} added to the report")
+        return True
+    return False
+
+
 def check_entitites(hass):
     """check if entries from config file are entities with an active state"""
     _LOGGER.debug(f"::check_entities:: Triaging list of found entities")
 
-    ignored_states = [
-        "unavail" if s == "unavailable" else s
-        for s in get_config(hass, CONF_IGNORED_STATES, [])
-    ]
+    ignored_states = get_ignored_states(hass)
     if DOMAIN not in hass.data or HASS_DATA_PARSED_ENTITY_LIST not in hass.data[DOMAIN]:
         _LOGGER.error(f"{INDENT}Entity list not found")
         raise Exception("Entity list not found")
     parsed_entity_list = hass.data[DOMAIN][HASS_DATA_PARSED_ENTITY_LIST]
     entities_missing = {}
     for entry, occurrences in parsed_entity_list.items():
-        if is_action(hass, entry):  # this is a service, not entity
-            _LOGGER.debug(f"{INDENT}entry {entry} is service, skipping")
-            continue
-        state, _ = get_entity_state(hass, entry)
-        if state in ignored_states:
-            _LOGGER.debug(
-                f"{INDENT}entry {entry} with state {state} skipped due to ignored_states"
-            )
-            continue
-        if state in ["missing", "unknown", "unavail"]:
+        if check_entity(hass, entry, ignored_states):
             entities_missing[entry] = occurrences
-            _LOGGER.debug(f"{INDENT}entry {entry} added to the report")
     return entities_missing
 
 
 async def parse(hass, folders, ignored_files, root=None):
     """Parse a yaml or json file for entities/services"""
-    parsed_files_count = 0
-    entity_pattern = re.compile(
-        r"(?:(?<=\s)|(?<=^)|(?<=\")|(?<=\'))([A-Za-z_0-9]*\s*:)?(?:\s*)?(?:states.)?"
-        rf"(({ "|".join([*Platform, *DEFAULT_HA_DOMAINS]) })\.[A-Za-z_*0-9]+)"
-    )
-    service_pattern = re.compile(
-        r"(?:service|action):\s*([A-Za-z_0-9]*\.[A-Za-z_0-9]+)"
-    )
-    comment_pattern = re.compile(r"(^\s*(?:description|example):.*)|(\s*#.*)")
     parsed_entity_list = {}
     parsed_service_list = {}
     parsed_files = []
     effectively_ignored_files = []
-    async for yaml_file, ignored in async_get_next_file(folders, ignored_files):
+    scanned, ignored, cache = await hass.async_add_executor_job(
+        scan_files,
+        folders,
+        ignored_files,
+        hass.data[DOMAIN].get(HASS_DATA_FILES_CACHE, {}),
+    )
+    hass.data[DOMAIN][HASS_DATA_FILES_CACHE] = cache
+    for yaml_file in ignored:
+        effectively_ignored_files.append(os.path.relpath(yaml_file, root))
+    for yaml_file, (entities, services) in scanned:
         short_path = os.path.relpath(yaml_file, root)
-        if ignored:
-            effectively_ignored_files.append(short_path)
-            continue
+        for val, lineno in entities:
+            add_entry(parsed_entity_list, val, short_path, lineno)
+        for val, lineno in services:
+            add_entry(parsed_service_list, val, short_path, lineno)
+        parsed_files.append(short_path)
+    parsed_files_count = len(parsed_files)
 
-        try:
-            lineno = 1
-            async with await anyio.open_file(
-                yaml_file, mode="r", encoding="utf-8"
-            ) as f:
-                async for line in f:
-                    line = re.sub(comment_pattern, "", line)
-                    for match in re.finditer(entity_pattern, line):
-                        typ, val = match.group(1), match.group(2)
-                        if (
-                            typ != "service:"
-                            and "*" not in val
-                            and not val.endswith(".yaml")
-                        ):
-                            add_entry(parsed_entity_list, val, short_path, lineno)
-                    for match in re.finditer(service_pattern, line):
-                        val = match.group(1)
-                        add_entry(parsed_service_list, val, short_path, lineno)
-                    lineno += 1
-            parsed_files_count += 1
-            parsed_files.append(short_path)
-        except OSError as exception:
-            _LOGGER.error("Unable to parse %s: %s", yaml_file, exception)
-        except UnicodeDecodeError as exception:
-            _LOGGER.error(
-                "Unable to parse %s: %s. Use UTF-8 encoding to avoid this error",
-                yaml_file,
-                exception,
-            )
     # remove ignored entities and services from resulting lists
     ignored_items = get_config(hass, CONF_IGNORED_ITEMS, [])
     ignored_items = list(set(ignored_items + BUNDLED_IGNORED_ITEMS))
@@ -278,6 +278,7 @@ class VacuumCamera(Camera):
         if self._device is None and self._logged_in:
             self._handle_device()
 
+        previous_map_name = self._map_name
         new_map_name = self._handle_map_name(counter)
         if new_map_name != "retry":
             # sometimes this fails for no reason, so try and mitigate that by
@@ -288,7 +289,10 @@ class VacuumCamera(Camera):
             self._status = CameraStatus.FAILED_TO_RETRIEVE_MAP_FROM_VACUUM
 
         if self._logged_in and self._map_name is not None and self._device is not None:
-            self._handle_map_data(self._map_name)
+            if self._is_map_unchanged(previous_map_name, new_map_name):
+                _LOGGER.debug("Vacuum docked and map name unchanged, skipping map retrieval")
+            else:
+                self._handle_map_data(self._map_name)
         else:
             _LOGGER.debug("Unable to retrieve map, reasons: Logged in - %s, map name - %s, device retrieved - %s",
                           self._logged_in, new_map_name, self._device is not None)
@@ -356,6 +360,18 @@ class VacuumCamera(Camera):
             time.sleep(backoff.backoff())
         return map_name
 
+    def _is_map_unchanged(self, previous_map_name: Optional[str], new_map_name: str) -> bool:
+        # only vacuums providing the map name tell about a new map by its name
+        if not self._device.should_get_map_from_vacuum() or self._status != CameraStatus.OK:
+            return False
+        if new_map_name != previous_map_name:
+            return False
+        try:
+            return self._vacuum.status().state_code in VACUUM_STATES_DOCKED
+        except (OSError, DeviceException) as exc:
+            _LOGGER.debug("Unable to retrieve vacuum state: %s", exc)
+            return False
+
     def _handle_map_data(self, map_name: str):
         _LOGGER.debug("Retrieving map from Xiaomi cloud")
         store_map_path = self._store_map_path if self._store_map_raw else None
@@ -384,6 +400,8 @@ class VacuumCamera(Camera):
             self._status = CameraStatus.UNABLE_TO_RETRIEVE_MAP
 
     def _set_map_data(self, map_data: MapData):
+        if map_data is self._map_data:
+            return
         img_byte_arr = io.BytesIO()
         map_data.image.data.save(img_byte_arr, format='PNG')
         self._image = img_byte_arr.getvalue()
@@ -1,6 +1,10 @@
+import copy
+import hashlib
 import logging
 import math
-from typing import Callable, Dict, List
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 from PIL import Image, ImageDraw, ImageFont
 from PIL.Image import Image as ImageType
@@ -12,6 +16,8 @@ from custom_components.xiaomi_cloud_map_extractor.types import Color, Colors, Si
 
 _LOGGER = logging.getLogger(__name__)
 
+BASE_LAYER_CACHE_SIZE = 4
+
 
 class ImageHandler:
     COLORS = {
@@ -64,6 +70,8 @@ class ImageHandler:
         COLOR_ROOM_15: (72, 201, 176),
         COLOR_ROOM_16: (165, 105, 189)
     }
+    _base_layers: OrderedDict = OrderedDict()
+    _base_layers_lock = threading.Lock()
     ROOM_COLORS = [COLOR_ROOM_1, COLOR_ROOM_2, COLOR_ROOM_3, COLOR_ROOM_4, COLOR_ROOM_5, COLOR_ROOM_6, COLOR_ROOM_7,
                    COLOR_ROOM_8, COLOR_ROOM_9, COLOR_ROOM_10, COLOR_ROOM_11, COLOR_ROOM_12, COLOR_ROOM_13,
                    COLOR_ROOM_14, COLOR_ROOM_15, COLOR_ROOM_16]
@@ -341,6 +349,72 @@ class ImageHandler:
             return ImageHandler.COLORS[name]
         return ImageHandler.COLORS[default_name]
 
+    @staticmethod
+    def __cached_base_layer__(raw_data: bytes, parameters: Tuple, render: Callable[[], Tuple[Any, ...]]) \
+            -> Tuple[Any, ...]:
+        # the map image changes far less often than the vacuum position and paths drawn on top of it, so the
+        # rendered image and rooms are kept per hash of the raw image block and the parameters they depend on
+        key = hashlib.sha1(bytes(raw_data))
+        key.update(repr(parameters).encode())
+        key = key.hexdigest()
+        with ImageHandler._base_layers_lock:
+            cached = ImageHandler._base_layers.get(key)
+            if cached is not None:
+                ImageHandler._base_layers.move_to_end(key)
+        if cached is None:
+            cached = render()
+            with ImageHandler._base_layers_lock:
+                ImageHandler._base_layers[key] = cached
+                while len(ImageHandler._base_layers) > BASE_LAYER_CACHE_SIZE:
+                    ImageHandler._base_layers.popitem(last=False)
+        else:
+            _LOGGER.debug("Map image unchanged, reusing rendered base layer")
+        # the layers are drawn on afterwards, never hand out the cached ones
+        return copy.deepcopy(cached)
+
+    @staticmethod
+    def __map_pixels__(raw_data: bytes, width: int, height: int, trim_left: int, trim_right: int, trim_top: int,
+                       trim_bottom: int) -> ImageType:
+        # pixel types of the trimmed map as 'L' image, the first map row is the last image row
+        pixels = Image.frombytes('L', (width, height), bytes(raw_data[:width * height]))
+        pixels = pixels.crop((trim_left, trim_bottom, width - trim_right, height - trim_top))
+        return pixels.transpose(Image.FLIP_TOP_BOTTOM)
+
+    @staticmethod
+    def __render_pixels__(pixels: ImageType, pixel_color: Callable[[int], Optional[Color]]) -> ImageType:
+        # colors are resolved once per pixel type present in the map, None leaves the pixel transparent
+        lut = [(0, 0, 0, 0)] * 256
+        for pixel_type, count in enumerate(pixels.histogram()):
+            if count:
+                color = pixel_color(pixel_type)
+                if color is not None:
+                    lut[pixel_type] = ImageHandler.__to_rgba__(color)
+        return Image.merge('RGBA', [pixels.point([color[band] for color in lut]) for band in range(4)])
+
+    @staticmethod
+    def __to_rgba__(color: Color) -> Tuple[int, int, int, int]:
+        return tuple(color) if len(color) > 3 else (*color, 255)
+
+    @staticmethod
+    def __room_bounds__(pixels: ImageType, room_of_pixel: Callable[[int], Optional[int]], trim_left: int,
+                        trim_bottom: int) -> Dict[int, Tuple[int, int, int, int]]:
+        pixel_types = {}
+        for pixel_type, count in enumerate(pixels.histogram()):
+            room_number = room_of_pixel(pixel_type) if count else None
+            if room_number is not None:
+                pixel_types.setdefault(room_number, set()).add(pixel_type)
+        height = pixels.size[1]
+        bounds = []
+        for room_number, types in pixel_types.items():
+            mask = pixels.point([255 if pixel_type in types else 0 for pixel_type in range(256)])
+            left, upper, right, lower = mask.getbbox()
+            first_x = mask.crop((0, lower - 1, mask.size[0], lower)).getbbox()[0]
+            bounds.append(((height - lower, first_x), room_number,
+                           (left + trim_left, height - lower + trim_bottom,
+                            right - 1 + trim_left, height - 1 - upper + trim_bottom)))
+        # keep the order in which a scan of the map rows finds the rooms
+        return {room_number: room for _, room_number, room in sorted(bounds)}
+
     @staticmethod
     def __draw_on_new_layer__(image: ImageData, draw_function: Callable, scale: float = 1, use_transparency=False):
         if scale == 1 and not use_transparency:
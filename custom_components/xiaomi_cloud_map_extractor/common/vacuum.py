@@ -1,3 +1,5 @@
+import hashlib
+import logging
 from abc import abstractmethod
 from typing import Optional, Tuple
 
@@ -6,6 +8,8 @@ from custom_components.xiaomi_cloud_map_extractor.common.map_data_parser import
 from custom_components.xiaomi_cloud_map_extractor.common.xiaomi_cloud_connector import XiaomiCloudConnector
 from custom_components.xiaomi_cloud_map_extractor.types import Colors, Drawables, ImageConfig, Sizes, Texts
 
+_LOGGER = logging.getLogger(__name__)
+
 
 class XiaomiCloudVacuum:
 
@@ -15,6 +19,8 @@ class XiaomiCloudVacuum:
         self._user_id = user_id
         self._device_id = device_id
         self.model = model
+        self._last_map_hash = None
+        self._last_map_data = None
 
     def get_map(self,
                 map_name: str,
@@ -33,10 +39,17 @@ class XiaomiCloudVacuum:
             raw_map_file.write(response)
             raw_map_file.close()
             map_stored = True
+        map_hash = hashlib.sha1(response).hexdigest()
+        if map_hash == self._last_map_hash and self._last_map_data is not None \
+                and self._last_map_data.map_name == map_name:
+            _LOGGER.debug("Map data unchanged, reusing parsed map")
+            return self._last_map_data, map_stored
         map_data = self.decode_map(response, colors, drawables, texts, sizes, image_config)
         if map_data is None:
             return None, map_stored
         map_data.map_name = map_name
+        self._last_map_hash = map_hash
+        self._last_map_data = map_data
         return map_data, map_stored
 
     def get_raw_map_data(self, map_name: Optional[str]) -> Optional[bytes]:
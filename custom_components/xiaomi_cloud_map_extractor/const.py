@@ -51,6 +51,9 @@ CONF_AVAILABLE_SIZES = [CONF_SIZE_VACUUM_RADIUS, CONF_SIZE_PATH_WIDTH, CONF_SIZE
 
 MINIMAL_IMAGE_WIDTH = 20
 MINIMAL_IMAGE_HEIGHT = 20
+
+# charging, charging complete
+VACUUM_STATES_DOCKED = [8, 100]
 CONTENT_TYPE = "image/png"
 DEFAULT_NAME = "Xiaomi Cloud Map Extractor"
 
@@ -1,12 +1,12 @@
 import logging
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from PIL import Image
 from PIL.Image import Image as ImageType
 
 from custom_components.xiaomi_cloud_map_extractor.common.image_handler import ImageHandler
 from custom_components.xiaomi_cloud_map_extractor.const import *
-from custom_components.xiaomi_cloud_map_extractor.types import Colors, ImageConfig
+from custom_components.xiaomi_cloud_map_extractor.types import Color, Colors, ImageConfig
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,6 +20,14 @@ class ImageHandlerRoidmi(ImageHandler):
     def parse(raw_data: bytes, width: int, height: int, colors: Colors, image_config: ImageConfig,
               room_numbers: List[int]) \
             -> Tuple[ImageType, Dict[int, Tuple[int, int, int, int]]]:
+        return ImageHandler.__cached_base_layer__(
+            raw_data, (width, height, colors, image_config, room_numbers),
+            lambda: ImageHandlerRoidmi.__render__(raw_data, width, height, colors, image_config, room_numbers))
+
+    @staticmethod
+    def __render__(raw_data: bytes, width: int, height: int, colors: Colors, image_config: ImageConfig,
+                   room_numbers: List[int]) \
+            -> Tuple[ImageType, Dict[int, Tuple[int, int, int, int]]]:
         rooms = {}
         scale = image_config[CONF_SCALE]
         trim_left = int(image_config[CONF_TRIM][CONF_LEFT] * width / 100)
@@ -30,36 +38,30 @@ class ImageHandlerRoidmi(ImageHandler):
         trimmed_width = width - trim_left - trim_right
         if trimmed_width == 0 or trimmed_height == 0:
             return ImageHandler.create_empty_map_image(colors), rooms
-        image = Image.new('RGBA', (trimmed_width, trimmed_height))
-        pixels = image.load()
+        pixels = ImageHandler.__map_pixels__(raw_data, width, height, trim_left, trim_right, trim_top, trim_bottom)
         unknown_pixels = set()
-        for img_y in range(trimmed_height):
-            for img_x in range(trimmed_width):
-                pixel_type = raw_data[img_x + trim_left + width * (img_y + trim_bottom)]
-                x = img_x
-                y = trimmed_height - 1 - img_y
-                if pixel_type == ImageHandlerRoidmi.MAP_OUTSIDE:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_OUTSIDE, colors)
-                elif pixel_type == ImageHandlerRoidmi.MAP_WALL:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_WALL_V2, colors)
-                elif pixel_type == ImageHandlerRoidmi.MAP_UNKNOWN:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_UNKNOWN, colors)
-                elif pixel_type in room_numbers:
-                    room_x = img_x + trim_left
-                    room_y = img_y + trim_bottom
-                    room_number = pixel_type
-                    if room_number not in rooms:
-                        rooms[room_number] = (room_x, room_y, room_x, room_y)
-                    else:
-                        rooms[room_number] = (min(rooms[room_number][0], room_x),
-                                              min(rooms[room_number][1], room_y),
-                                              max(rooms[room_number][2], room_x),
-                                              max(rooms[room_number][3], room_y))
-                    default = ImageHandler.ROOM_COLORS[room_number % len(ImageHandler.ROOM_COLORS)]
-                    pixels[x, y] = ImageHandler.__get_color__(f"{COLOR_ROOM_PREFIX}{room_number}", colors, default)
-                else:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_UNKNOWN, colors)
-                    unknown_pixels.add(pixel_type)
+
+        def pixel_color(pixel_type: int) -> Color:
+            if pixel_type == ImageHandlerRoidmi.MAP_OUTSIDE:
+                return ImageHandler.__get_color__(COLOR_MAP_OUTSIDE, colors)
+            elif pixel_type == ImageHandlerRoidmi.MAP_WALL:
+                return ImageHandler.__get_color__(COLOR_MAP_WALL_V2, colors)
+            elif pixel_type == ImageHandlerRoidmi.MAP_UNKNOWN:
+                return ImageHandler.__get_color__(COLOR_UNKNOWN, colors)
+            elif pixel_type in room_numbers:
+                default = ImageHandler.ROOM_COLORS[pixel_type % len(ImageHandler.ROOM_COLORS)]
+                return ImageHandler.__get_color__(f"{COLOR_ROOM_PREFIX}{pixel_type}", colors, default)
+            unknown_pixels.add(pixel_type)
+            return ImageHandler.__get_color__(COLOR_UNKNOWN, colors)
+
+        def room_of_pixel(pixel_type: int) -> Optional[int]:
+            if pixel_type in [ImageHandlerRoidmi.MAP_OUTSIDE, ImageHandlerRoidmi.MAP_WALL,
+                              ImageHandlerRoidmi.MAP_UNKNOWN] or pixel_type not in room_numbers:
+                return None
+            return pixel_type
+
+        image = ImageHandler.__render_pixels__(pixels, pixel_color)
+        rooms = ImageHandler.__room_bounds__(pixels, room_of_pixel, trim_left, trim_bottom)
         if image_config["scale"] != 1 and trimmed_width != 0 and trimmed_height != 0:
             image = image.resize((int(trimmed_width * scale), int(trimmed_height * scale)), resample=Image.NEAREST)
         if len(unknown_pixels) > 0:
@@ -36,6 +36,13 @@ class ParsingBuffer:
         self._length -= 1
         return self._data[self._offs - 1]
 
+    def get_bytes(self, field: str, n: int) -> bytes:
+        if self._length < n:
+            raise ValueError(f"error parsing {self._name}.{field} at offset {self._offs:#x}: buffer underrun")
+        self._offs += n
+        self._length -= n
+        return self._data[self._offs - n:self._offs]
+
     def get_uint16(self, field: str) -> int:
         if self._length < 2:
             raise ValueError(f"error parsing {self._name}.{field} at offset {self._offs:#x}: buffer underrun")
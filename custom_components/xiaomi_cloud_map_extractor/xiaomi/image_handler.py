@@ -1,12 +1,12 @@
 import logging
-from typing import Set, Tuple
+from typing import Optional, Set, Tuple
 
-from PIL import Image
+from PIL import Image, ImageChops
 from PIL.Image import Image as ImageType
 
 from custom_components.xiaomi_cloud_map_extractor.common.image_handler import ImageHandler
 from custom_components.xiaomi_cloud_map_extractor.const import *
-from custom_components.xiaomi_cloud_map_extractor.types import Colors, ImageConfig
+from custom_components.xiaomi_cloud_map_extractor.types import Color, Colors, ImageConfig
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -20,7 +20,13 @@ class ImageHandlerXiaomi(ImageHandler):
     @staticmethod
     def parse(raw_data: bytes, width: int, height: int, carpet_map: Set[int], colors: Colors,
               image_config: ImageConfig) -> Tuple[ImageType, dict]:
-        rooms = {}
+        return ImageHandler.__cached_base_layer__(
+            raw_data, (width, height, hash(frozenset(carpet_map)), colors, image_config),
+            lambda: ImageHandlerXiaomi.__render__(raw_data, width, height, carpet_map, colors, image_config))
+
+    @staticmethod
+    def __render__(raw_data: bytes, width: int, height: int, carpet_map: Set[int], colors: Colors,
+                   image_config: ImageConfig) -> Tuple[ImageType, dict]:
         scale = image_config[CONF_SCALE]
         trim_left = int(image_config[CONF_TRIM][CONF_LEFT] * width / 100)
         trim_right = int(image_config[CONF_TRIM][CONF_RIGHT] * width / 100)
@@ -28,51 +34,70 @@ class ImageHandlerXiaomi(ImageHandler):
         trim_bottom = int(image_config[CONF_TRIM][CONF_BOTTOM] * height / 100)
         trimmed_height = height - trim_top - trim_bottom
         trimmed_width = width - trim_left - trim_right
-        image = Image.new('RGBA', (trimmed_width, trimmed_height))
         if width == 0 or height == 0:
             return ImageHandler.create_empty_map_image(colors), {}
-        pixels = image.load()
-        for img_y in range(trimmed_height):
-            for img_x in range(trimmed_width):
-                idx = img_x + trim_left + width * (img_y + trim_bottom)
-                pixel_type = raw_data[idx]
-                x = img_x
-                y = trimmed_height - img_y - 1
-                if idx in carpet_map and (x + y) % 2:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_CARPETS, colors)
-                elif pixel_type == ImageHandlerXiaomi.MAP_OUTSIDE:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_OUTSIDE, colors)
-                elif pixel_type == ImageHandlerXiaomi.MAP_WALL:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_WALL, colors)
-                elif pixel_type == ImageHandlerXiaomi.MAP_INSIDE:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_INSIDE, colors)
-                elif pixel_type == ImageHandlerXiaomi.MAP_SCAN:
-                    pixels[x, y] = ImageHandler.__get_color__(COLOR_SCAN, colors)
-                else:
-                    obstacle = pixel_type & 0x07
-                    if obstacle == 0:
-                        pixels[x, y] = ImageHandler.__get_color__(COLOR_GREY_WALL, colors)
-                    elif obstacle == 1:
-                        pixels[x, y] = ImageHandler.__get_color__(COLOR_MAP_WALL_V2, colors)
-                    elif obstacle == 7:
-                        room_number = (pixel_type & 0xFF) >> 3
-                        room_x = img_x + trim_left
-                        room_y = img_y + trim_bottom
-                        if room_number not in rooms:
-                            rooms[room_number] = (room_x, room_y, room_x, room_y)
-                        else:
-                            rooms[room_number] = (min(rooms[room_number][0], room_x),
-                                                  min(rooms[room_number][1], room_y),
-                                                  max(rooms[room_number][2], room_x),
-                                                  max(rooms[room_number][3], room_y))
-                        default = ImageHandler.ROOM_COLORS[room_number >> 1]
-                        pixels[x, y] = ImageHandler.__get_color__(f"{COLOR_ROOM_PREFIX}{room_number}", colors, default)
-                    else:
-                        pixels[x, y] = ImageHandler.__get_color__(COLOR_UNKNOWN, colors)
+        pixels = ImageHandler.__map_pixels__(raw_data, width, height, trim_left, trim_right, trim_top, trim_bottom)
+
+        def pixel_color(pixel_type: int) -> Color:
+            if pixel_type == ImageHandlerXiaomi.MAP_OUTSIDE:
+                return ImageHandler.__get_color__(COLOR_MAP_OUTSIDE, colors)
+            elif pixel_type == ImageHandlerXiaomi.MAP_WALL:
+                return ImageHandler.__get_color__(COLOR_MAP_WALL, colors)
+            elif pixel_type == ImageHandlerXiaomi.MAP_INSIDE:
+                return ImageHandler.__get_color__(COLOR_MAP_INSIDE, colors)
+            elif pixel_type == ImageHandlerXiaomi.MAP_SCAN:
+                return ImageHandler.__get_color__(COLOR_SCAN, colors)
+            obstacle = pixel_type & 0x07
+            if obstacle == 0:
+                return ImageHandler.__get_color__(COLOR_GREY_WALL, colors)
+            elif obstacle == 1:
+                return ImageHandler.__get_color__(COLOR_MAP_WALL_V2, colors)
+            elif obstacle == 7:
+                room_number = (pixel_type & 0xFF) >> 3
+                default = ImageHandler.ROOM_COLORS[room_number >> 1]
+                return ImageHandler.__get_color__(f"{COLOR_ROOM_PREFIX}{room_number}", colors, default)
+            return ImageHandler.__get_color__(COLOR_UNKNOWN, colors)
+
+        image = ImageHandler.__render_pixels__(pixels, pixel_color)
+        carpets = ImageHandlerXiaomi.__carpet_mask__(carpet_map, width, height, trim_left, trim_right, trim_top,
+                                                     trim_bottom)
+        if carpets is not None:
+            image.paste(ImageHandler.__to_rgba__(ImageHandler.__get_color__(COLOR_CARPETS, colors)), mask=carpets)
+            # carpet pixels do not count for the room bounds
+            pixels.paste(ImageHandlerXiaomi.MAP_OUTSIDE, mask=carpets)
+        rooms = ImageHandler.__room_bounds__(pixels, ImageHandlerXiaomi.__room_of_pixel__, trim_left, trim_bottom)
         if image_config["scale"] != 1 and width != 0 and height != 0:
             image = image.resize((int(trimmed_width * scale), int(trimmed_height * scale)), resample=Image.NEAREST)
         return image, rooms
 
+    @staticmethod
+    def __room_of_pixel__(pixel_type: int) -> Optional[int]:
+        if pixel_type in [ImageHandlerXiaomi.MAP_INSIDE, ImageHandlerXiaomi.MAP_SCAN]:
+            return None
+        if pixel_type & 0x07 == 7:
+            return (pixel_type & 0xFF) >> 3
+        return None
+
+    @staticmethod
+    def __carpet_mask__(carpet_map: Set[int], width: int, height: int, trim_left: int, trim_right: int,
+                        trim_top: int, trim_bottom: int) -> Optional[ImageType]:
+        # carpets are drawn as a checkerboard, on the image pixels where x + y is odd
+        if not carpet_map:
+            return None
+        size = width * height
+        carpet_pixels = bytearray(size)
+        for idx in carpet_map:
+            if idx < size:
+                carpet_pixels[idx] = 0xFF
+        carpets = ImageHandler.__map_pixels__(carpet_pixels, width, height, trim_left, trim_right, trim_top,
+                                              trim_bottom)
+        trimmed_width, trimmed_height = carpets.size
+        even_row = (b"\x00\xff" * (trimmed_width // 2 + 1))[:trimmed_width]
+        odd_row = (b"\xff\x00" * (trimmed_width // 2 + 1))[:trimmed_width]
+        checkerboard = Image.frombytes('L', carpets.size,
+                                       b"".join(odd_row if y % 2 else even_row for y in range(trimmed_height)))
+        return ImageChops.multiply(carpets, checkerboard)
+
     @staticmethod
     def get_room_at_pixel(raw_data: bytes, width: int, x: int, y: int) -> int:
         room_number = None
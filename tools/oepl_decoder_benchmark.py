@@ -0,0 +1,156 @@
+"""Benchmark and self-check of the OpenEPaperLink raw image decoder.
+
+Compares the whole-image decoder of the open_epaper_link integration with a
+per-pixel reference decoder on random data, for complete and truncated
+buffers, and reports the best time of each for every bpp.
+
+Run from the configuration directory, with the Python environment of Home
+Assistant (Pillow is required):
+
+    python tools/oepl_decoder_benchmark.py [--width 800] [--height 480] [--repeat 3]
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from PIL import Image  # noqa: E402
+
+from custom_components.open_epaper_link.image_decompressor import (  # noqa: E402
+    _decode_pixels_bulk,
+    _expected_size,
+)
+from custom_components.open_epaper_link.tag_types import TagType  # noqa: E402
+
+COLOR_TABLES = {
+    1: {'white': [255, 255, 255], 'black': [0, 0, 0]},
+    2: {'white': [255, 255, 255], 'black': [0, 0, 0], 'red': [255, 0, 0]},
+    3: {'white': [255, 255, 255], 'black': [0, 0, 0], 'red': [255, 0, 0], 'yellow': [255, 255, 0],
+        'green': [0, 255, 0], 'blue': [0, 0, 255]},
+    4: {f'color{i}': [i * 16, 255 - i * 16, (i * 48) % 256] for i in range(16)},
+}
+
+
+def decode_pixels_loop(data: bytes, tag_type: TagType, native_width: int, native_height: int) -> Image.Image:
+    """Decode raw bitmap data into an RGB image, one pixel at a time.
+
+    Reference for the whole-image decoder: pixels past the end of truncated
+    data stay white.
+    """
+    img = Image.new('RGB', (native_width, native_height), 'white')
+    pixels = img.load()
+    color_table = {k: tuple(v) for k, v in tag_type.color_table.items()}
+
+    if tag_type.bpp <= 2:  # Traditional 1-2 bit plane-based format
+        bytes_per_row = (native_width + 7) // 8
+        bytes_per_plane = bytes_per_row * native_height
+        black_plane = data[:bytes_per_plane]
+        color_plane = data[bytes_per_plane:bytes_per_plane * 2] if tag_type.bpp == 2 else b''
+        color_key = next((k for k in color_table.keys()
+                          if k not in ['black', 'white']), 'white')
+
+        for y in range(native_height):
+            row_offset = y * bytes_per_row
+            for x in range(native_width):
+                byte_offset = row_offset + (x // 8)
+                bit_mask = 0x80 >> (x % 8)
+                black = byte_offset < len(black_plane) and bool(black_plane[byte_offset] & bit_mask)
+                color = byte_offset < len(color_plane) and bool(color_plane[byte_offset] & bit_mask)
+
+                if black:
+                    pixels[x, y] = color_table['black']
+                elif color:
+                    pixels[x, y] = color_table[color_key]
+                else:
+                    pixels[x, y] = color_table['white']
+
+    else:  # 3-4 bit packed format
+        bits_per_pixel = tag_type.bpp
+        bit_mask = (1 << bits_per_pixel) - 1
+        bytes_per_row = (native_width * bits_per_pixel + 7) // 8
+        colors_list = list(color_table.values())
+
+        for y in range(native_height):
+            for x in range(native_width):
+                bit_position = (x * bits_per_pixel) % 8
+                byte_offset = (y * bytes_per_row) + (x * bits_per_pixel) // 8
+                if byte_offset >= len(data):
+                    continue
+
+                if bit_position + bits_per_pixel <= 8:
+                    color_index = (data[byte_offset] >> (8 - bit_position - bits_per_pixel)) & bit_mask
+                else:
+                    first_byte = data[byte_offset] & ((1 << (8 - bit_position)) - 1)
+                    bits_from_second = bits_per_pixel - (8 - bit_position)
+                    second_byte = data[byte_offset + 1] >> (8 - bits_from_second) if byte_offset + 1 < len(data) else 0
+                    color_index = (first_byte << bits_from_second) | second_byte
+
+                if color_index < len(colors_list):
+                    pixels[x, y] = colors_list[color_index]
+
+    return img
+
+
+def benchmark_decoders(width: int = 800, height: int = 480, repeat: int = 3) -> dict[int, dict[str, float]]:
+    """Compare the bulk and per-pixel decoders on random data for each bpp.
+
+    Checks that both decoders produce the same image, also for truncated
+    data, and reports the best time of each for a display of the given size
+    (800x480 is a 7.5" tag).
+
+    Returns:
+        dict: Per bpp the loop and bulk time in milliseconds and the speedup
+    """
+    results = {}
+    for bpp, color_table in COLOR_TABLES.items():
+        tag_type = TagType(0, {'width': width, 'height': height, 'bpp': bpp, 'colortable': color_table})
+        data = os.urandom(_expected_size(bpp, width, height))
+
+        timings = {}
+        images = {}
+        for name, decoder in (("loop", decode_pixels_loop), ("bulk", _decode_pixels_bulk)):
+            best = None
+            for _ in range(repeat):
+                started = time.perf_counter()
+                images[name] = decoder(data, tag_type, width, height)
+                elapsed = time.perf_counter() - started
+                best = elapsed if best is None else min(best, elapsed)
+            timings[name] = best
+
+        if images["loop"].tobytes() != images["bulk"].tobytes():
+            raise AssertionError(f"Bulk decoder differs from the per-pixel decoder for {bpp} bpp")
+
+        # Cut inside a row, and inside a pixel where pixels span two bytes
+        for size in (len(data) // 3, len(data) // 3 + 1, 0):
+            truncated = data[:size]
+            if (decode_pixels_loop(truncated, tag_type, width, height).tobytes()
+                    != _decode_pixels_bulk(truncated, tag_type, width, height).tobytes()):
+                raise AssertionError(
+                    f"Bulk decoder differs from the per-pixel decoder for {bpp} bpp truncated to {size} bytes"
+                )
+
+        results[bpp] = {
+            "loop_ms": round(timings["loop"] * 1000, 1),
+            "bulk_ms": round(timings["bulk"] * 1000, 1),
+            "speedup": round(timings["loop"] / timings["bulk"], 1),
+        }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--width", type=int, default=800)
+    parser.add_argument("--height", type=int, default=480)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    for bpp, result in benchmark_decoders(args.width, args.height, args.repeat).items():
+        print(f"{bpp} bpp {args.width}x{args.height}: {result}")
+
+
+if __name__ == "__main__":
+    main()
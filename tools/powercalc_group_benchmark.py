@@ -0,0 +1,192 @@
+"""Benchmark and self-check of the running sum of Powercalc power groups.
+
+Builds a 500-member group tree of 5 floors, 10 rooms per floor and 10 plugs
+per room, next to a flat 500-member whole-house group, and applies random
+plug updates, some of them unavailable or unknown. Each group passes its new
+state on to its parent group, as the state change event of the subgroup
+does in Home Assistant.
+
+The running sum of every group is checked against a full Decimal re-sum of
+its members, and against groups re-summing all members on each update, for
+enough updates to pass the resync at SUM_RESYNC_INTERVAL. Then the time per
+plug update is reported for both.
+
+Run from the configuration directory, with the Python environment of Home
+Assistant:
+
+    python tools/powercalc_group_benchmark.py [--updates 20000] [--seed 1]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from homeassistant.const import (  # noqa: E402
+    ATTR_UNIT_OF_MEASUREMENT,
+    STATE_UNAVAILABLE,
+    STATE_UNKNOWN,
+    UnitOfPower,
+)
+from homeassistant.core import HomeAssistant, State  # noqa: E402
+
+from custom_components.powercalc.const import GroupType  # noqa: E402
+from custom_components.powercalc.sensors.group.custom import (  # noqa: E402
+    SUM_RESYNC_INTERVAL,
+    GroupedPowerSensor,
+)
+
+FLOORS = 5
+ROOMS_PER_FLOOR = 10
+PLUGS_PER_ROOM = 10
+ATTRIBUTES = {ATTR_UNIT_OF_MEASUREMENT: UnitOfPower.WATT}
+
+
+class FullSumPowerSensor(GroupedPowerSensor):
+    """Power group re-summing all members on each update, as before the running sum."""
+
+    def calculate_new_state(self, state: State) -> Decimal | str:
+        if state.state in [STATE_UNKNOWN, STATE_UNAVAILABLE]:
+            self._states.pop(state.entity_id, None)
+        else:
+            self._states[state.entity_id] = self._get_state_value_in_native_unit(state)
+        if not self._states:
+            return Decimal(0) if self._ignore_unavailable_state else STATE_UNAVAILABLE
+        return Decimal(sum(self._states.values()))
+
+
+class GroupTree:
+    """The group tree and the flat group, with the parent group of every member."""
+
+    def __init__(self, hass: HomeAssistant, group_class: type[GroupedPowerSensor], plug_states: dict[str, str]):
+        self.parents: dict[str, GroupedPowerSensor] = {}
+        self.groups: list[GroupedPowerSensor] = []
+        self.house = self._add_group(hass, group_class, "house", None)
+        for floor in range(FLOORS):
+            floor_group = self._add_group(hass, group_class, f"floor_{floor}", self.house)
+            for room in range(ROOMS_PER_FLOOR):
+                room_group = self._add_group(hass, group_class, f"room_{floor}_{room}", floor_group)
+                for plug in range(PLUGS_PER_ROOM):
+                    self.parents[f"sensor.plug_{floor}_{room}_{plug}_power"] = room_group
+                    room_group.entities.add(f"sensor.plug_{floor}_{room}_{plug}_power")
+        self.flat = self._add_group(hass, group_class, "house_flat", None)
+        self.flat.entities.update(plug_states)
+
+        # initial states from the plugs up, the house group last
+        values = dict(plug_states)
+        for group in [*reversed(self.groups[:-1]), self.flat]:
+            states = [State(entity_id, values[entity_id], ATTRIBUTES) for entity_id in group.entities]
+            available = [state for state in states if state.state not in [STATE_UNKNOWN, STATE_UNAVAILABLE]]
+            values[group.entity_id] = str(group.calculate_initial_state(available, states))
+
+    def _add_group(
+        self,
+        hass: HomeAssistant,
+        group_class: type[GroupedPowerSensor],
+        name: str,
+        parent: GroupedPowerSensor | None,
+    ) -> GroupedPowerSensor:
+        group = group_class(hass, name, set(), f"sensor.{name}_power", {}, GroupType.CUSTOM)
+        self.groups.append(group)
+        if parent:
+            self.parents[group.entity_id] = parent
+            parent.entities.add(group.entity_id)
+        return group
+
+    def update(self, state: State) -> None:
+        """Apply a plug update to its room, floor and house group and to the flat group."""
+        self.flat.calculate_new_state(state)
+        group = self.parents.get(state.entity_id)
+        while group is not None:
+            state = State(group.entity_id, str(group.calculate_new_state(state)), ATTRIBUTES)
+            group = self.parents.get(group.entity_id)
+
+
+def random_value(rng: random.Random) -> str:
+    """Return a random plug state, unavailable or unknown for one in ten updates."""
+    roll = rng.random()
+    if roll < 0.05:
+        return STATE_UNAVAILABLE
+    if roll < 0.1:
+        return STATE_UNKNOWN
+    return str(round(rng.uniform(0, 100), 2))
+
+
+def check_groups(tree: GroupTree, reference: GroupTree) -> None:
+    """Check the running sums against a full re-sum and against the re-summing groups."""
+    for group, reference_group in zip(tree.groups, reference.groups):
+        state = group.get_summed_state()
+        if group._states and group._sum != Decimal(sum(group._states.values())):
+            raise AssertionError(f"Running sum of {group.entity_id} differs from a full re-sum")
+        reference_state = (
+            Decimal(sum(reference_group._states.values())) if reference_group._states else STATE_UNAVAILABLE
+        )
+        if state != reference_state:
+            raise AssertionError(f"{group.entity_id} is {state}, re-summing all members gives {reference_state}")
+
+
+def time_updates(tree: GroupTree, updates: list[State]) -> float:
+    """Return the time per plug update in microseconds."""
+    started = time.perf_counter()
+    for state in updates:
+        tree.update(state)
+    return (time.perf_counter() - started) / len(updates) * 1e6
+
+
+async def benchmark_groups(updates: int, seed: int) -> dict[str, float]:
+    """Check the running sums on random updates and time both implementations."""
+    if updates <= SUM_RESYNC_INTERVAL:
+        raise ValueError(f"More than {SUM_RESYNC_INTERVAL} updates are needed to check the resync")
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        plug_states = {
+            f"sensor.plug_{floor}_{room}_{plug}_power": random_value(rng)
+            for floor in range(FLOORS)
+            for room in range(ROOMS_PER_FLOOR)
+            for plug in range(PLUGS_PER_ROOM)
+        }
+        plugs = list(plug_states)
+        random_updates = [State(rng.choice(plugs), random_value(rng), ATTRIBUTES) for _ in range(updates)]
+
+        tree = GroupTree(hass, GroupedPowerSensor, plug_states)
+        reference = GroupTree(hass, FullSumPowerSensor, plug_states)
+        for state in random_updates:
+            tree.update(state)
+            reference.update(state)
+            check_groups(tree, reference)
+
+        running_us = time_updates(GroupTree(hass, GroupedPowerSensor, plug_states), random_updates)
+        full_us = time_updates(GroupTree(hass, FullSumPowerSensor, plug_states), random_updates)
+
+    return {
+        "full_resum_us": round(full_us, 1),
+        "running_sum_us": round(running_us, 1),
+        "speedup": round(full_us / running_us, 1),
+        "house_power": tree.house.get_summed_state(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--updates", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+
+    result = asyncio.run(benchmark_groups(args.updates, args.seed))
+    print(
+        f"{FLOORS}x{ROOMS_PER_FLOOR}x{PLUGS_PER_ROOM} group tree and flat group, {args.updates} plug updates: "
+        f"full re-sum {result['full_resum_us']} us/update, running sum {result['running_sum_us']} us/update "
+        f"({result['speedup']}x), house {result['house_power']} W"
+    )
+
+
+if __name__ == "__main__":
+    main()
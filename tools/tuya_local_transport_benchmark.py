@@ -0,0 +1,206 @@
+"""Benchmark of the Tuya Local asyncio transport against tinytuya in the executor.
+
+Runs the receive loop of TuyaLocalDevice (heartbeat and receive on a
+persistent connection) for many simulated devices against a local stand-in
+device server, which pushes a dps update per device about every second over
+protocol 3.3. Each device runs once with tinytuya in the executor and once
+with AsyncTuyaTransport, reporting the executor threads busy, the wait of an
+unrelated executor job and the event loop lag.
+
+Run from the configuration directory, with the Python environment of Home
+Assistant (tinytuya is required):
+
+    python tools/tuya_local_transport_benchmark.py [--devices 100] [--duration 15] [--workers 64]
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import statistics
+import struct
+import subprocess
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import tinytuya  # noqa: E402
+
+from custom_components.tuya_local.transport import AsyncTuyaTransport  # noqa: E402
+
+LOCAL_KEY = "0123456789abcdef"
+PROTOCOL_VERSION = 3.3
+
+
+def device_message(seqno: int, cmd: int, dps: dict | None = None, version_header: bool = False) -> bytes:
+    """Pack a message from a 3.3 device, with an encrypted dps payload if given."""
+    payload = b""
+    if dps is not None:
+        payload = tinytuya.AESCipher(LOCAL_KEY.encode()).encrypt(json.dumps({"dps": dps}).encode(), False)
+        if version_header:
+            payload = tinytuya.PROTOCOL_33_HEADER + payload
+    return tinytuya.pack_message(
+        tinytuya.TuyaMessage(seqno, cmd, 0, struct.pack(">I", 0) + payload, 0, True)
+    )
+
+
+async def handle_device(reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+    """Answer queries and heartbeats of one connection, pushing a dps update about every second."""
+    seqno = 0
+
+    async def push():
+        nonlocal seqno
+        while True:
+            await asyncio.sleep(random.uniform(0.8, 1.2))
+            seqno += 1
+            writer.write(device_message(seqno, tinytuya.STATUS, {"19": random.randint(0, 3000)}, True))
+
+    pusher = asyncio.create_task(push())
+    try:
+        while True:
+            data = await reader.readexactly(16)
+            header = tinytuya.parse_header(data)
+            await reader.readexactly(header.total_length - 16)
+            seqno += 1
+            if header.cmd in (tinytuya.DP_QUERY, tinytuya.UPDATEDPS):
+                writer.write(device_message(seqno, header.cmd, {"1": True, "19": 100}))
+            else:
+                writer.write(device_message(seqno, header.cmd))
+    except (asyncio.IncompleteReadError, ConnectionError):
+        pass
+    finally:
+        pusher.cancel()
+        writer.close()
+
+
+async def serve(port: int) -> None:
+    """Run the stand-in device server until terminated."""
+    server = await asyncio.start_server(handle_device, "127.0.0.1", port, backlog=1024)
+    print("ready", flush=True)
+    async with server:
+        await server.serve_forever()
+
+
+class BenchmarkHass:
+    """The part of Home Assistant used by the transport, counting busy executor threads."""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, executor: ThreadPoolExecutor):
+        self.loop = loop
+        self.executor = executor
+        self.busy = 0
+
+    def _track(self, func, *args):
+        self.busy += 1
+        try:
+            return func(*args)
+        finally:
+            self.busy -= 1
+
+    def async_add_executor_job(self, func, *args):
+        return self.loop.run_in_executor(self.executor, self._track, func, *args)
+
+
+async def device_loop(transport: AsyncTuyaTransport, stats: dict, stop: asyncio.Event) -> None:
+    """Receive loop of a device with a persistent connection, as in TuyaLocalDevice."""
+    transport.set_socketPersistent(True)
+    await transport.status()
+    while not stop.is_set():
+        await transport.heartbeat(True)
+        poll = await transport.receive()
+        if poll and "dps" in poll:
+            stats["updates"] += 1
+        await asyncio.sleep(0.1)
+
+
+async def run(native: bool, port: int, devices: int, duration: float, workers: int) -> dict[str, float]:
+    """Run the receive loops of all devices and measure the executor and the event loop."""
+    loop = asyncio.get_running_loop()
+    executor = ThreadPoolExecutor(max_workers=workers)
+    hass = BenchmarkHass(loop, executor)
+    stats = {"updates": 0}
+    stop = asyncio.Event()
+
+    transports = []
+    for index in range(devices):
+        api = tinytuya.Device(f"bench{index:015d}", "127.0.0.1", LOCAL_KEY, version=PROTOCOL_VERSION, port=port)
+        transport = AsyncTuyaTransport(hass, api)
+        if not native:
+            transport.disable_native()
+        transports.append(transport)
+    tasks = [asyncio.create_task(device_loop(transport, stats, stop)) for transport in transports]
+
+    await asyncio.sleep(2)  # let all devices connect
+    stats["updates"] = 0
+    lags, waits, busy = [], [], []
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        started = time.monotonic()
+        await asyncio.sleep(0.01)
+        lags.append(time.monotonic() - started - 0.01)
+        if len(lags) % 10 == 0:
+            started = time.monotonic()
+            await loop.run_in_executor(executor, lambda: None)
+            waits.append(time.monotonic() - started)
+            busy.append(hass.busy)
+
+    stop.set()
+    for transport in transports:
+        transport.set_socketPersistent(False)
+    await asyncio.wait(tasks, timeout=10)
+    executor.shutdown(wait=False, cancel_futures=True)
+
+    def p99(values):
+        return sorted(values)[max(0, int(len(values) * 0.99) - 1)]
+
+    return {
+        "busy_avg": round(statistics.mean(busy), 1),
+        "busy_max": max(busy),
+        "wait_avg_ms": round(statistics.mean(waits) * 1000, 1),
+        "wait_p99_ms": round(p99(waits) * 1000, 1),
+        "lag_avg_ms": round(statistics.mean(lags) * 1000, 1),
+        "lag_p99_ms": round(p99(lags) * 1000, 1),
+        "updates_per_s": round(stats["updates"] / duration, 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--devices", type=int, default=100)
+    parser.add_argument("--duration", type=float, default=15, help="seconds measured per transport")
+    parser.add_argument("--workers", type=int, default=64, help="executor threads")
+    parser.add_argument("--serve", type=int, metavar="PORT", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.serve:
+        asyncio.run(serve(args.serve))
+        return
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    # the server runs in its own process, so it does not load the measured event loop
+    server = subprocess.Popen(
+        [sys.executable, os.path.abspath(__file__), "--serve", str(port)], stdout=subprocess.PIPE, text=True
+    )
+    try:
+        server.stdout.readline()
+        for native in (False, True):
+            result = asyncio.run(run(native, port, args.devices, args.duration, args.workers))
+            print(
+                f"{'asyncio' if native else 'executor':8s} {args.devices} devices: "
+                f"executor threads busy {result['busy_avg']}/{args.workers} (max {result['busy_max']}), "
+                f"unrelated job wait {result['wait_avg_ms']} ms (p99 {result['wait_p99_ms']} ms), "
+                f"loop lag {result['lag_avg_ms']} ms (p99 {result['lag_p99_ms']} ms), "
+                f"dps updates {result['updates_per_s']}/s"
+            )
+    finally:
+        server.terminate()
+
+
+if __name__ == "__main__":
+    main()